@@ -0,0 +1,131 @@
+import json
+import math
+import time
+import shutil
+import logging
+from config import Config
+from artifacts import ArtifactRegistry
+
+logger = logging.getLogger(__name__)
+
+class AdmissionError(Exception):
+    """İş kabul edilmedi (HTTP durum kodu ve Retry-After ile)"""
+    def __init__(self, message, status_code=429, retry_after=None):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+        self.retry_after = retry_after or Config.ADMISSION_RETRY_AFTER
+
+class AdmissionController:
+    """Yükleme ve finalize isteklerini disk, kuyruk ve iş yüküne göre kabul eder
+    
+    Celery kuyruğu sınırlı bekleme kuyruğu olarak kullanılır: kuyruk
+    ADMISSION_MAX_QUEUE_DEPTH'e ulaştığında ya da bekleyen render işlerinin
+    tahmini toplam süresi ADMISSION_MAX_BACKLOG_SECONDS'ı aştığında yeni iş
+    429 ile reddedilir. Disk yetersizse 503 döner. İstemci Retry-After
+    kadar bekleyip tekrar dener; böylece çalışan işlerin gecikmesi korunur.
+    """
+    
+    JOBS_KEY = 'admission:render_jobs'
+    STATS_KEY = 'admission:stats'
+    
+    def __init__(self, redis_client, broker_client=None):
+        self.redis_client = redis_client
+        self.broker_client = broker_client or redis_client
+    
+    def _reject(self, reason, message, status_code, retry_after=None):
+        self.redis_client.hincrby(self.STATS_KEY, f'rejected_{reason}', 1)
+        logger.warning(f"İş reddedildi ({reason}): {message}")
+        raise AdmissionError(message, status_code, retry_after)
+    
+    @staticmethod
+    def free_bytes():
+        """Yükleme ve çıktı klasörlerinden en az boş alana sahip olanın boş alanı"""
+        return min(
+            shutil.disk_usage(folder).free
+            for folder in (Config.UPLOAD_FOLDER, Config.PROCESSED_FOLDER)
+        )
+    
+    def check_disk(self, required_bytes):
+        """Gerekli alan + güvenlik payı yoksa önce LRU temizliği dene, yine yoksa reddet"""
+        needed = (required_bytes or 0) + Config.ADMISSION_MIN_FREE_BYTES
+        if self.free_bytes() >= needed:
+            return
+            
+        ArtifactRegistry(self.redis_client).enforce_watermark()
+        if self.free_bytes() < needed:
+            self._reject('disk', 'Sunucuda yeterli disk alanı yok, lütfen daha sonra tekrar deneyin', 503,
+                         Config.ADMISSION_DISK_RETRY_AFTER)
+    
+    def queue_depth(self, queue):
+        """Broker'daki bekleyen mesaj sayısı (tüm öncelik listeleri dahil)"""
+        pipe = self.broker_client.pipeline()
+        pipe.llen(queue)
+        for priority in range(1, 10):
+            pipe.llen(f'{queue}:{priority}')
+        return sum(pipe.execute())
+    
+    def check_queue(self, queue):
+        if self.queue_depth(queue) >= Config.ADMISSION_MAX_QUEUE_DEPTH:
+            self._reject('queue', 'Sunucu yoğun, lütfen daha sonra tekrar deneyin', 429)
+    
+    def admit_upload(self, queue, size):
+        """Yüklemeyi dosya yazılmadan önce kabul et"""
+        self.check_disk(size)
+        self.check_queue(queue)
+    
+    def render_backlog(self):
+        """Kabul edilmiş ama bitmemiş render işlerinin tahmini toplam süresi (saniye)
+        
+        Worker çökmesiyle serbest bırakılamayan kayıtlar görev zaman sınırından
+        sonra yok sayılır ve silinir.
+        """
+        stale_before = time.time() - Config.ADMISSION_JOB_STALE_SECONDS
+        backlog = 0.0
+        stale = []
+        
+        for job_id, job_str in self.redis_client.hgetall(self.JOBS_KEY).items():
+            job = json.loads(job_str)
+            if job['admitted_at'] < stale_before:
+                stale.append(job_id)
+                continue
+            backlog += job['cost']
+            
+        if stale:
+            self.redis_client.hdel(self.JOBS_KEY, *stale)
+        return backlog
+    
+    def admit_render(self, job_id, queue, cost_seconds, output_bytes):
+        """Render işini kabul et ve tahmini maliyetini kaydet"""
+        self.check_disk(output_bytes)
+        self.check_queue(queue)
+        
+        backlog = self.render_backlog()
+        if backlog > 0 and backlog + cost_seconds > Config.ADMISSION_MAX_BACKLOG_SECONDS:
+            excess = backlog + cost_seconds - Config.ADMISSION_MAX_BACKLOG_SECONDS
+            self._reject(
+                'backlog',
+                'İşleme kuyruğu dolu, lütfen daha sonra tekrar deneyin',
+                429,
+                min(max(math.ceil(excess), Config.ADMISSION_RETRY_AFTER), 600)
+            )
+            
+        self.redis_client.hset(self.JOBS_KEY, job_id, json.dumps({
+            'cost': cost_seconds,
+            'admitted_at': time.time()
+        }))
+        self.redis_client.hincrby(self.STATS_KEY, 'admitted_render', 1)
+    
+    def release_render(self, job_id):
+        """Biten (başarılı ya da başarısız) render işini iş yükünden düş"""
+        self.redis_client.hdel(self.JOBS_KEY, job_id)
+    
+    def stats(self):
+        raw = self.redis_client.hgetall(self.STATS_KEY)
+        stats = {
+            (k.decode() if isinstance(k, bytes) else k): int(v)
+            for k, v in raw.items()
+        }
+        stats['render_backlog_seconds'] = round(self.render_backlog(), 1)
+        stats['free_bytes'] = self.free_bytes()
+        return stats
@@ -0,0 +1,126 @@
+import re
+import json
+import time
+import hashlib
+import logging
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+class ResponseCache:
+    """AI kesim önerileri için Redis tabanlı yanıt önbelleği
+    
+    Anahtar: (video içerik özeti, model, normalize edilmiş istem, konuşma
+    durumu özeti). Girdiler TTL ile düşer, ayrıca AI_CACHE_MAX_ENTRIES
+    aşıldığında en uzun süre kullanılmayanlar atılır. Aynı anahtar için
+    eşzamanlı istekler tek bir üst akış çağrısını bekler.
+    """
+    
+    LRU_KEY = 'ai_cache:lru'
+    STATS_KEY = 'ai_cache:stats'
+    
+    def __init__(self, redis_client):
+        self.redis_client = redis_client
+    
+    @staticmethod
+    def normalize_prompt(prompt):
+        """Büyük/küçük harf, boşluk ve sondaki noktalama farklarını yok say"""
+        prompt = re.sub(r'\s+', ' ', prompt.strip().lower())
+        return prompt.rstrip('.!?… ')
+    
+    def make_key(self, content_key, model, prompt, state_hash=''):
+        raw = json.dumps([content_key, model, self.normalize_prompt(prompt), state_hash])
+        return hashlib.sha256(raw.encode()).hexdigest()
+    
+    def _entry_key(self, key):
+        return f'ai_cache:entry:{key}'
+    
+    def _lock_key(self, key):
+        return f'ai_cache:lock:{key}'
+    
+    def get(self, key):
+        value_str = self.redis_client.get(self._entry_key(key))
+        if not value_str:
+            return None
+            
+        self.redis_client.zadd(self.LRU_KEY, {key: time.time()})
+        return json.loads(value_str)
+    
+    def set(self, key, value):
+        pipe = self.redis_client.pipeline()
+        pipe.setex(self._entry_key(key), Config.AI_CACHE_TTL, json.dumps(value))
+        pipe.zadd(self.LRU_KEY, {key: time.time()})
+        pipe.execute()
+        self._evict()
+    
+    def _evict(self):
+        """Boyut sınırı aşıldıysa en eski erişilen girdileri sil"""
+        overflow = self.redis_client.zcard(self.LRU_KEY) - Config.AI_CACHE_MAX_ENTRIES
+        if overflow <= 0:
+            return
+            
+        evicted = [key for key, _ in self.redis_client.zpopmin(self.LRU_KEY, overflow)]
+        if evicted:
+            self.redis_client.delete(*[
+                self._entry_key(key.decode() if isinstance(key, bytes) else key)
+                for key in evicted
+            ])
+            self.redis_client.hincrby(self.STATS_KEY, 'evictions', len(evicted))
+            logger.debug(f"AI cache evicted {len(evicted)} entries")
+    
+    def get_or_compute(self, key, compute):
+        """Önbellekten döndür ya da tek bir çağrıyla hesapla
+        
+        compute() -> (value, cacheable). ('hit' | 'coalesced' | 'miss', value) döner.
+        """
+        value = self.get(key)
+        if value is not None:
+            self.redis_client.hincrby(self.STATS_KEY, 'hits', 1)
+            return 'hit', value
+            
+        lock_key = self._lock_key(key)
+        if not self.redis_client.set(lock_key, '1', nx=True, ex=Config.AI_CACHE_LOCK_TIMEOUT):
+            # Aynı istek şu an hesaplanıyor, sonucunu bekle
+            value = self._wait_for_value(key, lock_key)
+            if value is not None:
+                self.redis_client.hincrby(self.STATS_KEY, 'coalesced', 1)
+                return 'coalesced', value
+            lock_key = None
+            
+        try:
+            self.redis_client.hincrby(self.STATS_KEY, 'misses', 1)
+            value, cacheable = compute()
+            if cacheable:
+                self.set(key, value)
+            return 'miss', value
+            
+        finally:
+            if lock_key:
+                self.redis_client.delete(lock_key)
+    
+    def _wait_for_value(self, key, lock_key):
+        deadline = time.time() + Config.AI_CACHE_LOCK_TIMEOUT
+        while time.time() < deadline:
+            value = self.get(key)
+            if value is not None:
+                return value
+            if not self.redis_client.exists(lock_key):
+                # Lider önbelleğe yazmadan bitti (hata vb.), tekrar dene
+                return self.get(key)
+            time.sleep(0.2)
+        return None
+    
+    def stats(self):
+        """Önbellek isabet/ıska sayaçları"""
+        raw = self.redis_client.hgetall(self.STATS_KEY)
+        stats = {
+            (k.decode() if isinstance(k, bytes) else k): int(v)
+            for k, v in raw.items()
+        }
+        for field in ('hits', 'coalesced', 'misses', 'evictions'):
+            stats.setdefault(field, 0)
+            
+        lookups = stats['hits'] + stats['coalesced'] + stats['misses']
+        stats['hit_rate'] = round((stats['hits'] + stats['coalesced']) / lookups, 4) if lookups else 0.0
+        stats['entries'] = self.redis_client.zcard(self.LRU_KEY)
+        return stats
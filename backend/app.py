@@ -4,14 +4,29 @@ import redis
 import logging
 import uuid
 import time
-from flask import Flask, request, jsonify, send_file, g
+import hashlib
+from flask import Flask, Response, request, jsonify, send_file, g, stream_with_context
 from flask_cors import CORS
 from werkzeug.utils import secure_filename
 from config import Config
 from logging_config import setup_logging, log_execution_time, log_api_request, get_logger
 from gemini_client import GeminiClient
-from tasks import process_video_upload, finalize_video
-from utils import allowed_file, generate_video_id
+from celery_app import celery_app
+from tasks import process_video_upload, finalize_video, finalize_batch, update_video_status
+from utils import allowed_file, generate_video_id, map_proxy_cuts, validate_cuts, render_preview_segment
+import chunked_upload
+from chunked_upload import UploadError
+from media_store import save_stream_hashed, hash_file, store_blob, get_blob, link_cached_video
+from ai_cache import ResponseCache
+from segment_cache import SegmentCache
+from artifacts import ArtifactRegistry
+from admission import AdmissionController, AdmissionError
+from media_probe import probe_media
+from render_planner import plan_render
+import finalize_jobs
+import ffmpeg_governor
+from conversation_store import ConversationStore
+import preview
 
 # Loglama sistemini başlat
 setup_logging(log_level='DEBUG')
@@ -29,8 +44,9 @@ logger.debug(f"Configuration loaded: UPLOAD_FOLDER={Config.UPLOAD_FOLDER}")
 CORS(app, resources={
     r"/api/*": {
         "origins": "*",
-        "methods": ["GET", "POST", "OPTIONS"],
-        "allow_headers": ["Content-Type"]
+        "methods": ["GET", "POST", "PUT", "OPTIONS"],
+        "allow_headers": ["Content-Type", "Content-Range", "Range", "If-None-Match", "If-Range"],
+        "expose_headers": ["Content-Range", "Accept-Ranges", "ETag", "Content-Length"]
     }
 })
 logger.info("CORS configured")
@@ -46,12 +62,30 @@ except Exception as e:
 
 # Gemini client
 try:
-    gemini_client = GeminiClient()
+    gemini_client = GeminiClient(redis_client=redis_client)
     logger.info("✅ Gemini client initialized")
 except Exception as e:
     logger.error(f"❌ Gemini client initialization failed: {str(e)}", exc_info=True)
     gemini_client = None
 
+# AI yanıt önbelleği
+ai_cache = ResponseCache(redis_client) if redis_client and Config.AI_CACHE_ENABLED else None
+
+# Render edilmiş segment önbelleği (yalnızca istatistikler için)
+segment_cache = SegmentCache(redis_client) if redis_client and Config.SEGMENT_CACHE_ENABLED else None
+
+# Diskteki üretilmiş dosyaların kaydı
+artifacts = ArtifactRegistry(redis_client) if redis_client else None
+
+# Kabul kontrolü (disk, kuyruk derinliği, bekleyen render yükü)
+admission = None
+if redis_client and Config.ADMISSION_ENABLED:
+    broker_client = redis_client if Config.CELERY_BROKER_URL == Config.REDIS_URL else redis.from_url(Config.CELERY_BROKER_URL)
+    admission = AdmissionController(redis_client, broker_client)
+
+# Sohbet geçmişi deposu
+conversation_store = ConversationStore(redis_client) if redis_client else None
+
 @app.before_request
 def before_request():
     """Her request öncesi çalışır"""
@@ -94,6 +128,47 @@ def handle_error(error):
         'request_id': getattr(g, 'request_id', None)
     }), 500
 
+def _start_video_processing(video_id, video_path, original_filename, file_size,
+                            content_hash=None, blob=None):
+    """Kaydedilen video için işleme görevini başlat"""
+    if redis_client and blob and link_cached_video(redis_client, video_id, blob):
+        # Aynı içerik daha önce işlendi: ffprobe ve analiz tekrarlanmaz
+        return
+    
+    if redis_client:
+        task = process_video_upload.apply_async(
+            args=[video_id, video_path, content_hash],
+            priority=Config.TASK_PRIORITY_INTERACTIVE
+        )
+        logger.info(f"📋 Video processing task queued: {task.id}")
+    else:
+        logger.warning("⚠️ Redis not available, processing synchronously")
+        probe = probe_media(video_path)
+        duration = probe['duration'] if probe else 0
+        logger.info(f"⏱️ Video duration: {duration} seconds")
+        
+        # Video info oluştur
+        video_info = {
+            'id': video_id,
+            'path': video_path,
+            'duration': duration,
+            'status': 'ready',
+            'filename': original_filename,
+            'size': file_size
+        }
+        
+        # Dosyaya kaydet
+        info_file = os.path.join(Config.UPLOAD_FOLDER, f"{video_id}_info.json")
+        with open(info_file, 'w') as f:
+            json.dump(video_info, f)
+        logger.debug(f"📄 Video info saved to: {info_file}")
+
+def _admission_error_response(error):
+    """Reddedilen iş için Retry-After başlıklı yanıt"""
+    response = jsonify({'error': error.message, 'retry_after': error.retry_after})
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response, error.status_code
+
 @app.route('/api/upload', methods=['POST', 'OPTIONS'])
 @log_execution_time()
 def upload_video():
@@ -105,9 +180,15 @@ def upload_video():
     
     try:
         logger.info(f"📤 Upload request received", extra={'request_id': g.request_id})
-        logger.debug(f"Request files: {list(request.files.keys())}")
         logger.debug(f"Request headers: {dict(request.headers)}")
         
+        # request.files gövdenin tamamını ayrıştırıp diske yazar; disk ve
+        # kuyruk durumu ondan önce yalnızca Content-Length ile kontrol edilir
+        if admission:
+            admission.admit_upload('probe', request.content_length)
+        
+        logger.debug(f"Request files: {list(request.files.keys())}")
+        
         # Dosya kontrolü
         if 'video' not in request.files:
             logger.warning("❌ No video file in request")
@@ -138,40 +219,18 @@ def upload_video():
             os.makedirs(Config.UPLOAD_FOLDER, exist_ok=True)
             logger.info(f"📁 Created upload folder: {Config.UPLOAD_FOLDER}")
         
-        # Dosyayı kaydet
-        video_path = os.path.join(Config.UPLOAD_FOLDER, new_filename)
-        logger.debug(f"💾 Saving video to: {video_path}")
+        # Dosyayı yazarken içerik özetini hesapla, ardından özetle sakla
+        temp_path = os.path.join(Config.UPLOAD_FOLDER, f"{new_filename}.part")
+        logger.debug(f"💾 Saving video to: {temp_path}")
         
-        file.save(video_path)
-        file_size = os.path.getsize(video_path)
+        content_hash, file_size = save_stream_hashed(file.stream, temp_path)
+        video_path, blob = store_blob(redis_client, temp_path, content_hash, file_ext)
         logger.info(f"✅ Video saved successfully: {video_path} ({file_size} bytes)")
         
         # Video işleme görevini başlat
-        if redis_client:
-            task = process_video_upload.delay(video_id, video_path)
-            logger.info(f"📋 Video processing task queued: {task.id}")
-        else:
-            logger.warning("⚠️ Redis not available, processing synchronously")
-            from utils import get_video_duration
-            
-            duration = get_video_duration(video_path)
-            logger.info(f"⏱️ Video duration: {duration} seconds")
-            
-            # Video info oluştur
-            video_info = {
-                'id': video_id,
-                'path': video_path,
-                'duration': duration,
-                'status': 'ready',
-                'filename': file.filename,
-                'size': file_size
-            }
-            
-            # Dosyaya kaydet
-            info_file = os.path.join(Config.UPLOAD_FOLDER, f"{video_id}_info.json")
-            with open(info_file, 'w') as f:
-                json.dump(video_info, f)
-            logger.debug(f"📄 Video info saved to: {info_file}")
+        _start_video_processing(
+            video_id, video_path, file.filename, file_size, content_hash, blob
+        )
         
         logger.info(
             f"✅ Upload completed successfully",
@@ -183,6 +242,8 @@ def upload_video():
             'message': 'Video yüklendi, işleniyor...'
         }), 200
         
+    except AdmissionError as e:
+        return _admission_error_response(e)
     except Exception as e:
         logger.error(
             f"❌ Upload error: {str(e)}",
@@ -194,6 +255,137 @@ def upload_video():
         )
         return jsonify({'error': f'Video yüklenirken hata oluştu: {str(e)}'}), 500
 
+@app.route('/api/uploads', methods=['POST'])
+@log_execution_time()
+def create_upload_session():
+    """Parçalı yükleme oturumu oluştur"""
+    try:
+        if not redis_client:
+            return jsonify({'error': 'Parçalı yükleme için Redis gerekli'}), 503
+        
+        data = request.get_json() or {}
+        filename = data.get('filename', '')
+        size = int(data.get('size') or 0)
+        
+        logger.info(f"📤 Upload session requested: {filename} ({size} bytes)", extra={'request_id': g.request_id})
+        
+        if not filename or not allowed_file(filename):
+            logger.warning(f"❌ Invalid file format: {filename}")
+            return jsonify({'error': 'Geçersiz dosya formatı'}), 400
+        
+        if admission:
+            admission.admit_upload('probe', size)
+        
+        video_id = generate_video_id()
+        file_ext = secure_filename(filename).rsplit('.', 1)[1].lower()
+        os.makedirs(Config.UPLOAD_FOLDER, exist_ok=True)
+        video_path = os.path.join(Config.UPLOAD_FOLDER, f"{video_id}.{file_ext}")
+        
+        chunked_upload.create_session(redis_client, video_id, video_path, filename, size)
+        
+        return jsonify({
+            'upload_id': video_id,
+            'chunk_size': Config.UPLOAD_CHUNK_SIZE,
+            'received': []
+        }), 201
+        
+    except UploadError as e:
+        logger.warning(f"❌ Upload session rejected: {e.message}")
+        return jsonify({'error': e.message}), e.status_code
+    except AdmissionError as e:
+        return _admission_error_response(e)
+    except Exception as e:
+        logger.error(f"❌ Upload session error: {str(e)}", exc_info=True, extra={'request_id': g.request_id})
+        return jsonify({'error': 'Yükleme oturumu oluşturulamadı'}), 500
+
+@app.route('/api/uploads/<upload_id>', methods=['GET'])
+def get_upload_session(upload_id):
+    """Devam etmek için alınan aralıkları döndür"""
+    try:
+        session = chunked_upload.get_session(redis_client, upload_id)
+        ranges = chunked_upload.get_received_ranges(redis_client, upload_id)
+        
+        return jsonify({
+            'upload_id': upload_id,
+            'size': session['size'],
+            'received': ranges,
+            'received_bytes': chunked_upload.received_bytes(ranges),
+            'chunk_size': Config.UPLOAD_CHUNK_SIZE
+        }), 200
+        
+    except UploadError as e:
+        return jsonify({'error': e.message}), e.status_code
+    except Exception as e:
+        logger.error(f"❌ Upload session status error: {str(e)}", exc_info=True, extra={'request_id': g.request_id})
+        return jsonify({'error': 'Yükleme durumu alınamadı'}), 500
+
+@app.route('/api/uploads/<upload_id>', methods=['PUT'])
+def upload_chunk(upload_id):
+    """Bir bayt aralığını doğrudan hedef dosyaya yaz"""
+    try:
+        session = chunked_upload.get_session(redis_client, upload_id)
+        start, end = chunked_upload.parse_content_range(
+            request.headers.get('Content-Range'),
+            session['size']
+        )
+        
+        logger.debug(f"📦 Chunk received for {upload_id}: {start}-{end}")
+        ranges = chunked_upload.write_chunk(redis_client, session, start, end, request.stream)
+        
+        return jsonify({
+            'upload_id': upload_id,
+            'received': ranges,
+            'received_bytes': chunked_upload.received_bytes(ranges)
+        }), 200
+        
+    except UploadError as e:
+        logger.warning(f"❌ Chunk rejected for {upload_id}: {e.message}")
+        return jsonify({'error': e.message}), e.status_code
+    except Exception as e:
+        logger.error(f"❌ Chunk upload error for {upload_id}: {str(e)}", exc_info=True, extra={'request_id': g.request_id})
+        return jsonify({'error': 'Parça yüklenemedi'}), 500
+
+@app.route('/api/uploads/<upload_id>/commit', methods=['POST'])
+@log_execution_time()
+def commit_upload_session(upload_id):
+    """Yüklemeyi tamamla ve video işlemeyi başlat"""
+    try:
+        session = chunked_upload.commit_session(redis_client, upload_id)
+        
+        if not session.get('committed'):
+            if session.get('content_hash'):
+                # Önceki deneme blob'u kaydetti; dosya artık blob yolunda
+                content_hash = session['content_hash']
+                video_path = session['video_path']
+                blob = get_blob(redis_client, content_hash)
+            else:
+                # Parçalar sırasız gelebildiği için özet tamamlandıktan sonra hesaplanır
+                content_hash = hash_file(session['path'])
+                file_ext = session['path'].rsplit('.', 1)[1]
+                video_path, blob = store_blob(redis_client, session['path'], content_hash, file_ext)
+                chunked_upload.update_session(
+                    redis_client, upload_id, content_hash=content_hash, video_path=video_path
+                )
+                
+            _start_video_processing(
+                upload_id, video_path, session['filename'], session['size'], content_hash, blob
+            )
+            # Oturum yalnızca işleme başladıktan sonra kapanır; hata olursa commit tekrarlanabilir
+            chunked_upload.finish_session(redis_client, upload_id)
+            
+        logger.info(f"✅ Chunked upload completed: {upload_id}", extra={'video_id': upload_id})
+        return jsonify({
+            'video_id': upload_id,
+            'message': 'Video yüklendi, işleniyor...'
+        }), 200
+        
+    except UploadError as e:
+        logger.warning(f"❌ Upload commit rejected for {upload_id}: {e.message}")
+        return jsonify({'error': e.message}), e.status_code
+    except Exception as e:
+        logger.error(f"❌ Upload commit error for {upload_id}: {str(e)}", exc_info=True, extra={'video_id': upload_id, 'request_id': g.request_id})
+        return jsonify({'error': 'Yükleme tamamlanamadı'}), 500
+
 @app.route('/api/logs', methods=['GET'])
 def get_logs():
     """Log dosyalarını görüntüle"""
@@ -248,47 +440,108 @@ def chat_with_ai(video_id):
             return jsonify({'error': 'Video bulunamadı'}), 404
         
         video_info = json.loads(video_info_str)
+        artifacts.touch_video(video_info)
         video_path = video_info['path']
+        cache_key = video_info.get('content_hash') or video_id
+        
+        # Varsa küçük analiz vekilini gönder (aynı zaman ekseni)
+        proxy = video_info.get('analysis_proxy')
+        if proxy and os.path.exists(proxy['path']):
+            video_path = proxy['path']
+            cache_key = f"{cache_key}:proxy"
+        else:
+            proxy = None
+        
+        # Konuşma geçmişini al (yalnızca metin turları)
+        chat_meta = conversation_store.get_meta(video_id)
+        if chat_meta and os.path.exists(chat_meta.get('video_path') or ''):
+            # Konuşma başladığı dosyayla sürer; vekilin sonradan oluşması geçmişi silmez
+            video_path = chat_meta['video_path']
+            cache_key = chat_meta['cache_key']
+            proxy = cache_key.endswith(':proxy')
+        else:
+            # Analiz edilen dosya artık yok (ör. vekil silindi), yeni konuşma başlat
+            chat_meta = None
+        
+        if proxy:
+            # Vekil her zaman H.264/AAC MP4'tür
+            mime_type = 'video/mp4'
+        else:
+            probe_str = redis_client.get(f'video_probe:{video_id}')
+            mime_type = json.loads(probe_str)['mime_type'] if probe_str else None
         
         logger.debug(f"Video path: {video_path}")
-
-        # Konuşma geçmişini al
-        chat_history_key = f'chat_history:{video_id}'
-        chat_history_str = redis_client.get(chat_history_key)
         
-        if chat_history_str:
-            logger.debug("Continuing existing conversation")
-            # Mevcut konuşmaya devam et
-            chat_data = json.loads(chat_history_str)
-            chat_history = chat_data['contents']
-            previous_response = chat_data['last_response']
+        turns = conversation_store.get_turns(video_id) if chat_meta else []
+        usage = {}
+        
+        def ask_gemini():
+            if turns:
+                logger.debug("Continuing existing conversation")
+                # Mevcut konuşmaya devam et
+                result = gemini_client.continue_conversation(
+                    video_path,
+                    turns,
+                    user_prompt,
+                    cache_key=cache_key,
+                    mime_type=mime_type
+                )
+            else:
+                logger.debug("Starting new conversation")
+                # Yeni konuşma başlat
+                result = gemini_client.start_conversation(
+                    video_path,
+                    user_prompt,
+                    cache_key=cache_key,
+                    mime_type=mime_type
+                )
             
-            response, updated_contents, raw_response = gemini_client.continue_conversation(
-                chat_history,
-                previous_response,
-                user_prompt
-            )
+            response, _, raw_response = result
+            # Ölçümler yalnızca gerçekten yapılan çağrıya aittir, önbelleğe yazılmaz
+            usage.update(response.pop('usage', None) or {})
+            # Hata yanıtları önbelleğe alınmaz
+            return {
+                'response': response,
+                'raw_response': raw_response
+            }, raw_response is not None
+        
+        if ai_cache:
+            # Aynı video + istem + konuşma durumu için önbellekten yanıtla
+            state_hash = ConversationStore.state_hash(turns)
+            response_key = ai_cache.make_key(cache_key, gemini_client.model, user_prompt, state_hash)
+            cache_status, result = ai_cache.get_or_compute(response_key, ask_gemini)
+            logger.info(f"🗄️ AI cache {cache_status} for video_id: {video_id}", extra={'video_id': video_id})
         else:
-            logger.debug("Starting new conversation")
-            # Yeni konuşma başlat
-            response, updated_contents, raw_response = gemini_client.start_conversation(
-                video_path,
-                user_prompt
-            )
+            result, _ = ask_gemini()
         
-        # Konuşma geçmişini güncelle ve kaydet
-        if updated_contents and raw_response:
-            chat_data = {
-                'contents': updated_contents,
-                'last_response': raw_response
-            }
-            # Contents listesi JSON serialize edilemeyebilir, bu yüzden basitleştirilmiş versiyonu kaydet
-            redis_client.setex(
-                chat_history_key,
-                3600,  # 1 saat
-                json.dumps(chat_data, default=str)
+        response = result['response']
+        raw_response = result['raw_response']
+        
+        # Konuşma geçmişine yalnızca yeni turları ekle
+        if raw_response:
+            if not chat_meta:
+                conversation_store.start(video_id, video_path, cache_key, gemini_client.model)
+            model_turn = {'role': 'model', 'text': raw_response}
+            if usage:
+                model_turn.update(
+                    tokens=usage.get('response_tokens'),
+                    prompt_tokens=usage.get('prompt_tokens'),
+                    latency=usage.get('latency')
+                )
+            conversation_store.append_turns(
+                video_id,
+                {'role': 'user', 'text': user_prompt},
+                model_turn
             )
             logger.debug(f"Chat history updated for video_id: {video_id}")
+            logger.info(
+                f"📊 Chat turn {len(turns) // 2 + 1} usage for video_id {video_id}: {usage or 'cached'}",
+                extra={'video_id': video_id}
+            )
+        
+        # Vekil üzerindeki zaman damgalarını kaynak zaman eksenine taşı
+        if proxy:
+            response['cuts'] = map_proxy_cuts(response.get('cuts', []), video_info['duration'])
         
         # Video süresini ekle
         response['video_duration'] = video_info['duration']
@@ -303,6 +556,17 @@ def chat_with_ai(video_id):
             'message': 'Bir hata oluştu, lütfen tekrar deneyin.'
         }), 500
 
+def _read_video_status(video_id):
+    """Güncel durum bilgisini al (video hazırsa ama durum kaydı yoksa 'ready')"""
+    status_str = redis_client.get(f'video_status:{video_id}')
+    if status_str:
+        return json.loads(status_str)
+    
+    if redis_client.exists(f'video_info:{video_id}'):
+        return {'status': 'ready', 'message': 'Video hazır', 'seq': 0}
+    
+    return None
+
 @app.route('/api/status/<video_id>', methods=['GET'])
 @log_execution_time()
 def get_video_status(video_id):
@@ -310,33 +574,176 @@ def get_video_status(video_id):
     try:
         logger.info(f"📊 Status request received for video_id: {video_id}", extra={'video_id': video_id, 'request_id': g.request_id})
         # Durum bilgisini al
-        status_str = redis_client.get(f'video_status:{video_id}')
+        status_data = _read_video_status(video_id)
         
-        if status_str:
-            status_data = json.loads(status_str)
+        if status_data:
             logger.debug(f"Status data from Redis: {status_data}")
             logger.info(f"✅ Status for video_id {video_id}: {status_data['status']}", extra={'video_id': video_id, 'status': status_data['status']})
             return jsonify(status_data), 200
         else:
-            # Video bilgilerini kontrol et
-            video_info_str = redis_client.get(f'video_info:{video_id}')
-            if video_info_str:
-                logger.info(f"Video info found for video_id {video_id}, status ready", extra={'video_id': video_id, 'status': 'ready'})
-                return jsonify({
-                    'status': 'ready',
-                    'message': 'Video hazır'
-                }), 200
-            else:
-                logger.warning(f"❌ Video not found for video_id: {video_id}")
-                return jsonify({
-                    'status': 'not_found',
-                    'message': 'Video bulunamadı'
-                }), 404
+            logger.warning(f"❌ Video not found for video_id: {video_id}")
+            return jsonify({
+                'status': 'not_found',
+                'message': 'Video bulunamadı'
+            }), 404
                 
     except Exception as e:
         logger.error(f"❌ Status error for video_id {video_id}: {str(e)}", exc_info=True, extra={'video_id': video_id, 'request_id': g.request_id})
         return jsonify({'error': 'Durum sorgulanırken hata oluştu'}), 500
 
+def _parse_until(default='ready,completed,error,cancelled'):
+    """Akışın kapanacağı durumlar (?until=completed,error)"""
+    return set(request.args.get('until', default).split(','))
+
+@app.route('/api/status/<video_id>/stream', methods=['GET'])
+def stream_video_status(video_id):
+    """Durum değişikliklerini Server-Sent Events olarak gönder"""
+    until = _parse_until()
+    last_event_id = request.headers.get('Last-Event-ID')
+    last_seq = int(last_event_id) if last_event_id and last_event_id.isdigit() else -1
+    
+    logger.debug(f"📡 Status stream opened for video_id: {video_id}", extra={'video_id': video_id})
+    
+    def format_event(status_data):
+        return f"id: {status_data.get('seq', 0)}\nevent: status\ndata: {json.dumps(status_data)}\n\n"
+    
+    def generate():
+        nonlocal last_seq
+        pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+        # Önce abone ol, sonra güncel durumu oku: aradaki geçişler kaçmaz
+        pubsub.subscribe(f'video_status_events:{video_id}')
+        
+        try:
+            current = _read_video_status(video_id)
+            if current is None:
+                yield format_event({'status': 'not_found', 'message': 'Video bulunamadı'})
+                return
+            
+            if current.get('seq', 0) > last_seq:
+                last_seq = current.get('seq', 0)
+                yield format_event(current)
+            if current['status'] in until:
+                return
+            
+            deadline = time.time() + Config.STATUS_STREAM_MAX_SECONDS
+            while time.time() < deadline:
+                message = pubsub.get_message(timeout=Config.STATUS_STREAM_HEARTBEAT)
+                if message is None:
+                    yield ": keepalive\n\n"
+                    continue
+                
+                status_data = json.loads(message['data'])
+                if status_data.get('seq', 0) <= last_seq:
+                    continue
+                
+                last_seq = status_data['seq']
+                yield format_event(status_data)
+                if status_data['status'] in until:
+                    return
+            
+            # İstemci aynı Last-Event-ID ile yeniden bağlanır
+            yield "retry: 1000\n\n"
+            
+        finally:
+            pubsub.close()
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'  # Proxy tamponlamasını kapat
+        }
+    )
+
+@app.route('/api/status/<video_id>/wait', methods=['GET'])
+def wait_video_status(video_id):
+    """Long-poll: durum 'since' sıra numarasından yeni olana kadar bekle"""
+    try:
+        since = int(request.args.get('since', -1))
+        timeout = min(float(request.args.get('timeout', 25)), Config.STATUS_LONG_POLL_MAX_SECONDS)
+        
+        pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(f'video_status_events:{video_id}')
+        
+        try:
+            status_data = _read_video_status(video_id)
+            if status_data is None:
+                return jsonify({'status': 'not_found', 'message': 'Video bulunamadı'}), 404
+            
+            deadline = time.time() + timeout
+            while status_data.get('seq', 0) <= since and time.time() < deadline:
+                message = pubsub.get_message(timeout=max(deadline - time.time(), 0.01))
+                if message is not None:
+                    status_data = json.loads(message['data'])
+            
+            return jsonify(status_data), 200
+            
+        finally:
+            pubsub.close()
+            
+    except Exception as e:
+        logger.error(f"❌ Status wait error for video_id {video_id}: {str(e)}", exc_info=True, extra={'video_id': video_id, 'request_id': g.request_id})
+        return jsonify({'error': 'Durum sorgulanırken hata oluştu'}), 500
+
+def _estimate_finalize(video_id, valid_cuts):
+    """Render planından finalize işinin tahmini süresi ve çıktı boyutu"""
+    probe_str = redis_client.get(f'video_probe:{video_id}')
+    probe = json.loads(probe_str) if probe_str else None
+    
+    output_duration = sum(cut['end_seconds'] - cut['start_seconds'] for cut in valid_cuts)
+    plan = plan_render(
+        probe,
+        output_duration,
+        reencode=Config.FINALIZE_REENCODE and Config.FINALIZE_MODE == 'single_pass'
+    )
+    output_bytes = output_duration * ((probe or {}).get('bit_rate') or 0) / 8
+    return plan['estimated_seconds'], output_bytes
+
+def _render_priority(estimated_seconds):
+    """Kısa render'lar uzunların önüne geçsin (dakika başına bir adım)"""
+    return min(
+        Config.TASK_PRIORITY_INTERACTIVE + int(estimated_seconds // 60),
+        Config.TASK_PRIORITY_BATCH
+    )
+
+def _attach_finalize(video_id, job_hash, owner_task_id):
+    """Çalışan aynı işe ekle; sonuç bu videoya da bağlanacak"""
+    finalize_jobs.attach(redis_client, job_hash, video_id)
+    finalize_jobs.set_current(redis_client, video_id, owner_task_id, job_hash)
+    update_video_status(video_id, 'processing', 'Video işleniyor...')
+    logger.info(f"🔗 Finalize request attached to running task {owner_task_id} for video_id: {video_id}", extra={'video_id': video_id, 'task_id': owner_task_id})
+    return jsonify({
+        'video_id': video_id,
+        'task_id': owner_task_id,
+        'job_hash': job_hash,
+        'attached': True,
+        'message': 'Video işleniyor...'
+    }), 200
+
+def _cancel_finalize(video_id, current):
+    """Videoyu güncel finalize işinden ayır; işi bekleyen başka video yoksa görevi durdur
+    
+    Görev durdurulduysa True döner. Çalışan görev iptal bayrağını birkaç yüz
+    milisaniyede görür ve ffmpeg'i sonlandırır; kuyruktaki görev revoke ile
+    hiç çalışmadan düşer. Sahibi toplu finalize görevi olan işten video
+    yalnızca ayrılır: görev diğer varyantları da render ettiği için durdurulmaz.
+    """
+    job_hash, task_id = current['job_hash'], current['task_id']
+    remaining = finalize_jobs.detach(redis_client, job_hash, video_id)
+    finalize_jobs.clear_current(redis_client, video_id, task_id)
+    
+    if remaining or finalize_jobs.get_owner(redis_client, job_hash) != task_id:
+        # İş başka videolar için sürüyor ya da zaten bitti
+        return False
+        
+    if finalize_jobs.is_batch_task(redis_client, task_id):
+        return False
+        
+    finalize_jobs.request_cancel(redis_client, task_id)
+    celery_app.control.revoke(task_id)
+    return True
+
 @app.route('/api/finalize', methods=['POST'])
 @log_execution_time()
 def finalize_video_endpoint():
@@ -364,24 +771,490 @@ def finalize_video_endpoint():
             logger.warning(f"❌ Video info not found for finalize video_id: {video_id}")
             return jsonify({'error': 'Video bulunamadı'}), 404
         
+        video_info = json.loads(video_info_str)
+        artifacts.touch_video(video_info)
+        valid_cuts = validate_cuts(cuts, video_info['duration'])
+        if not valid_cuts:
+            logger.warning(f"❌ No valid cuts for finalize video_id: {video_id}")
+            return jsonify({'error': 'Geçerli kesim bulunamadı'}), 400
+        
+        # Aynı video + kesim listesi + ayarlar tek bir işe karşılık gelir
+        job_hash = finalize_jobs.make_job_hash(
+            video_info.get('content_hash') or video_id, valid_cuts
+        )
+        
+        current = finalize_jobs.get_current(redis_client, video_id)
+        if current and current['job_hash'] != job_hash:
+            # Yeni kesim listesi aynı videonun bekleyen/çalışan eski işinin yerini alır
+            if _cancel_finalize(video_id, current):
+                logger.info(f"🛑 Superseded finalize task {current['task_id']} for video_id: {video_id}", extra={'video_id': video_id, 'task_id': current['task_id']})
+        
+        result = finalize_jobs.get_result(redis_client, job_hash)
+        if result:
+            # Daha önce render edildi: yeniden işlemeden bağla
+            finalize_jobs.link_result(redis_client, video_id, job_hash, result)
+            finalize_jobs.touch_result(redis_client, job_hash)
+            artifacts.touch(result['output_path'], Config.RESULT_TTL)
+            update_video_status(video_id, 'completed', 'Video hazır!')
+            logger.info(f"✅ Finalize result reused for video_id: {video_id}, job: {job_hash}", extra={'video_id': video_id})
+            return jsonify({
+                'video_id': video_id,
+                'job_hash': job_hash,
+                'status': 'completed',
+                'message': 'Video hazır!'
+            }), 200
+        
+        owner = finalize_jobs.get_owner(redis_client, job_hash)
+        if owner:
+            return _attach_finalize(video_id, job_hash, owner)
+        
+        task_id = str(uuid.uuid4())
+        estimated_seconds, output_bytes = _estimate_finalize(video_id, valid_cuts)
+        if admission:
+            admission.admit_render(task_id, 'render', estimated_seconds, output_bytes)
+        
+        claimed, owner = finalize_jobs.claim(redis_client, job_hash, task_id, video_id)
+        if not claimed:
+            # Aynı iş bu arada başka bir istekle başlatıldı
+            if admission:
+                admission.release_render(task_id)
+            return _attach_finalize(video_id, job_hash, owner)
+        
+        # Önceki 'completed' durumu yeni işin sonucu sanılmasın
+        finalize_jobs.set_current(redis_client, video_id, task_id, job_hash)
+        update_video_status(video_id, 'queued', 'Sırada bekliyor...')
+        
         # Birleştirme görevini başlat
-        task = finalize_video.delay(video_id, cuts)
+        try:
+            task = finalize_video.apply_async(
+                args=[video_id, cuts, job_hash],
+                task_id=task_id,
+                priority=_render_priority(estimated_seconds)
+            )
+        except Exception:
+            finalize_jobs.release(redis_client, job_hash, task_id)
+            finalize_jobs.clear_current(redis_client, video_id, task_id)
+            if admission:
+                admission.release_render(task_id)
+            raise
         
         logger.info(f"✅ Finalize task queued for video_id: {video_id}, task_id: {task.id}", extra={'video_id': video_id, 'task_id': task.id})
         return jsonify({
             'video_id': video_id,
             'task_id': task.id,
+            'job_hash': job_hash,
             'message': 'Video işleniyor...'
         }), 200
         
+    except AdmissionError as e:
+        return _admission_error_response(e)
     except Exception as e:
         logger.error(f"❌ Finalize error for video_id {video_id}: {str(e)}", exc_info=True, extra={'video_id': video_id, 'request_id': g.request_id})
         return jsonify({'error': 'Video işlenirken hata oluştu'}), 500
 
+@app.route('/api/finalize/<video_id>/cancel', methods=['POST'])
+@log_execution_time()
+def cancel_finalize(video_id):
+    """Videonun bekleyen ya da çalışan finalize işini iptal et"""
+    try:
+        logger.info(f"🛑 Cancel request received for video_id: {video_id}", extra={'video_id': video_id, 'request_id': g.request_id})
+        current = finalize_jobs.get_current(redis_client, video_id)
+        if not current:
+            logger.warning(f"❌ No finalize job to cancel for video_id: {video_id}")
+            return jsonify({'error': 'İptal edilecek iş bulunamadı'}), 404
+        
+        if finalize_jobs.get_result(redis_client, current['job_hash']):
+            return jsonify({'error': 'İşlem zaten tamamlandı'}), 409
+        
+        stopped = _cancel_finalize(video_id, current)
+        update_video_status(video_id, 'cancelled', 'İşlem iptal edildi')
+        
+        logger.info(f"✅ Finalize cancelled for video_id: {video_id}, task stopped: {stopped}", extra={'video_id': video_id, 'task_id': current['task_id']})
+        return jsonify({
+            'video_id': video_id,
+            'task_id': current['task_id'],
+            'status': 'cancelled',
+            'task_stopped': stopped,
+            'message': 'İşlem iptal edildi'
+        }), 200
+        
+    except Exception as e:
+        logger.error(f"❌ Cancel error for video_id {video_id}: {str(e)}", exc_info=True, extra={'video_id': video_id, 'request_id': g.request_id})
+        return jsonify({'error': 'İşlem iptal edilirken hata oluştu'}), 500
+
+def _estimate_batch(video_id, variants):
+    """Toplu işte render edilecek varyantların tahmini süresi ve çıktı boyutu"""
+    probe_str = redis_client.get(f'video_probe:{video_id}')
+    probe = json.loads(probe_str) if probe_str else None
+    
+    copy_duration = [variant['duration'] for variant in variants if not variant['shared']]
+    shared_duration = sum(variant['duration'] for variant in variants if variant['shared'])
+    reencode = Config.FINALIZE_REENCODE and Config.FINALIZE_MODE == 'single_pass'
+    
+    estimated_seconds = sum(
+        plan_render(probe, duration, reencode=reencode)['estimated_seconds']
+        for duration in copy_duration
+    )
+    if shared_duration:
+        estimated_seconds += plan_render(probe, shared_duration, reencode=True)['estimated_seconds']
+        
+    output_duration = sum(copy_duration) + shared_duration
+    output_bytes = output_duration * ((probe or {}).get('bit_rate') or 0) / 8
+    return estimated_seconds, output_bytes
+
+def _batch_response(batch):
+    """Toplu işin varyant bazında durumu ve indirme bağlantıları"""
+    variants = []
+    for variant in batch['variants']:
+        entry = {
+            'name': variant['name'],
+            'profile': variant['profile'],
+            'cuts_count': len(variant['cuts']),
+            'job_hash': variant['job_hash'],
+            'status': variant['status'],
+            'message': variant.get('message', '')
+        }
+        if variant.get('progress'):
+            entry['progress'] = variant['progress']
+            
+        # Aynı özet başka bir istekte tamamlanmış olabilir
+        if finalize_jobs.get_result(redis_client, variant['job_hash']):
+            entry.update(status='completed', message='Video hazır!')
+            entry['download_url'] = f"/api/finalize/batch/{batch['batch_id']}/download/{variant['name']}"
+        variants.append(entry)
+        
+    statuses = {entry['status'] for entry in variants}
+    if statuses == {'completed'}:
+        status = 'completed'
+    elif 'error' in statuses and not statuses & {'queued', 'processing'}:
+        status = 'error'
+    elif 'cancelled' in statuses and not statuses & {'queued', 'processing'}:
+        status = 'cancelled'
+    else:
+        status = 'processing'
+        
+    return {
+        'batch_id': batch['batch_id'],
+        'video_id': batch['video_id'],
+        'task_id': batch.get('task_id'),
+        'status': status,
+        'variants': variants
+    }
+
+@app.route('/api/finalize/batch', methods=['POST'])
+@log_execution_time()
+def finalize_batch_endpoint():
+    """Aynı video için birden fazla kesim listesi/profil varyantını tek işte oluştur"""
+    video_id = None
+    try:
+        logger.info(f"✂️ Batch finalize request received", extra={'request_id': g.request_id})
+        data = request.get_json() or {}
+        video_id = data.get('video_id')
+        requested = data.get('variants') or []
+        
+        if not video_id:
+            logger.warning("❌ Video ID not provided for batch finalize request")
+            return jsonify({'error': 'Video ID gerekli'}), 400
+        
+        video_info_str = redis_client.get(f'video_info:{video_id}')
+        if not video_info_str:
+            logger.warning(f"❌ Video info not found for batch finalize video_id: {video_id}")
+            return jsonify({'error': 'Video bulunamadı'}), 404
+        
+        video_info = json.loads(video_info_str)
+        artifacts.touch_video(video_info)
+        probe_str = redis_client.get(f'video_probe:{video_id}')
+        
+        try:
+            variants = finalize_jobs.plan_variants(
+                video_info.get('content_hash') or video_id,
+                json.loads(probe_str) if probe_str else None,
+                video_info['duration'],
+                requested
+            )
+        except ValueError as e:
+            logger.warning(f"❌ Invalid batch finalize request for video_id {video_id}: {str(e)}")
+            return jsonify({'error': str(e)}), 400
+        
+        batch_id = str(uuid.uuid4())
+        task_id = str(uuid.uuid4())
+        batch = {
+            'batch_id': batch_id,
+            'video_id': video_id,
+            'task_id': task_id,
+            'variants': variants,
+            'created_at': time.time()
+        }
+        
+        pending = []
+        for variant in variants:
+            result = finalize_jobs.get_result(redis_client, variant['job_hash'])
+            if not result:
+                pending.append(variant)
+                continue
+            # Yeniden kullanılan çıktı toplu işin ömrü boyunca silinmesin
+            finalize_jobs.touch_result(redis_client, variant['job_hash'])
+            artifacts.touch(result['output_path'], Config.RESULT_TTL)
+        if not pending:
+            # Tüm varyantlar daha önce render edildi
+            batch['task_id'] = None
+            finalize_jobs.save_batch(redis_client, batch)
+            logger.info(f"✅ Batch finalize fully reused for video_id: {video_id}, batch_id: {batch_id}", extra={'video_id': video_id})
+            return jsonify(_batch_response(batch)), 200
+        
+        estimated_seconds, output_bytes = _estimate_batch(video_id, pending)
+        if admission:
+            admission.admit_render(task_id, 'render', estimated_seconds, output_bytes)
+        finalize_jobs.save_batch(redis_client, batch)
+        
+        try:
+            finalize_batch.apply_async(
+                args=[video_id, batch_id],
+                task_id=task_id,
+                priority=_render_priority(estimated_seconds)
+            )
+        except Exception:
+            if admission:
+                admission.release_render(task_id)
+            raise
+        
+        logger.info(f"✅ Batch finalize task queued for video_id: {video_id}, batch_id: {batch_id}, variants: {len(variants)}", extra={'video_id': video_id, 'task_id': task_id})
+        return jsonify(_batch_response(batch)), 200
+        
+    except AdmissionError as e:
+        return _admission_error_response(e)
+    except Exception as e:
+        logger.error(f"❌ Batch finalize error for video_id {video_id}: {str(e)}", exc_info=True, extra={'video_id': video_id, 'request_id': g.request_id})
+        return jsonify({'error': 'Video işlenirken hata oluştu'}), 500
+
+@app.route('/api/finalize/batch/<batch_id>', methods=['GET'])
+def get_batch_status(batch_id):
+    """Toplu finalize işinin varyant bazında durumu"""
+    try:
+        batch = finalize_jobs.get_batch(redis_client, batch_id)
+        if not batch:
+            logger.warning(f"❌ Batch not found: {batch_id}")
+            return jsonify({'error': 'Toplu iş bulunamadı'}), 404
+            
+        return jsonify(_batch_response(batch)), 200
+        
+    except Exception as e:
+        logger.error(f"❌ Batch status error for batch_id {batch_id}: {str(e)}", exc_info=True, extra={'request_id': g.request_id})
+        return jsonify({'error': 'Durum sorgulanırken hata oluştu'}), 500
+
+@app.route('/api/finalize/batch/<batch_id>/download/<name>', methods=['GET'])
+@log_execution_time()
+def download_batch_variant(batch_id, name):
+    """Toplu işin tek varyantını indir (?inline=1 ile tarayıcıda izle)"""
+    try:
+        batch = finalize_jobs.get_batch(redis_client, batch_id)
+        variant = next(
+            (variant for variant in (batch or {}).get('variants', []) if variant['name'] == name),
+            None
+        )
+        if not variant:
+            logger.warning(f"❌ Batch variant not found: {batch_id}/{name}")
+            return jsonify({'error': 'Varyant bulunamadı'}), 404
+        
+        result = finalize_jobs.get_result(redis_client, variant['job_hash'])
+        if not result:
+            return jsonify({'error': 'Varyant henüz hazır değil'}), 404
+        
+        output_path = result['output_path']
+        logger.info(f"✅ Serving batch variant {name} for batch_id: {batch_id} from {output_path}", extra={'video_id': batch['video_id'], 'output_path': output_path})
+        # İndirilen çıktı ve kayıtları birlikte uzatılır
+        finalize_jobs.save_batch(redis_client, batch)
+        finalize_jobs.touch_result(redis_client, variant['job_hash'])
+        artifacts.touch(output_path, Config.RESULT_TTL)
+        
+        return _serve_video_file(
+            output_path,
+            f"edited_{batch['video_id']}_{name}.mp4",
+            as_attachment=request.args.get('inline') != '1'
+        )
+        
+    except Exception as e:
+        logger.error(f"❌ Batch download error for batch_id {batch_id}: {str(e)}", exc_info=True, extra={'request_id': g.request_id})
+        return jsonify({'error': 'Video indirilirken hata oluştu'}), 500
+
+@app.route('/api/preview', methods=['POST'])
+@log_execution_time()
+def create_preview():
+    """Kesim listesi için HLS önizleme oluştur (render yapılmaz)"""
+    video_id = None
+    try:
+        data = request.get_json() or {}
+        video_id = data.get('video_id')
+        cuts = data.get('cuts', [])
+        
+        if not video_id:
+            return jsonify({'error': 'Video ID gerekli'}), 400
+        
+        if not cuts:
+            return jsonify({'error': 'En az bir kesim gerekli'}), 400
+        
+        video_info_str = redis_client.get(f'video_info:{video_id}')
+        if not video_info_str:
+            logger.warning(f"❌ Video info not found for preview video_id: {video_id}")
+            return jsonify({'error': 'Video bulunamadı'}), 404
+        
+        video_info = json.loads(video_info_str)
+        artifacts.touch_video(video_info)
+        valid_cuts = validate_cuts(cuts, video_info['duration'])
+        if not valid_cuts:
+            return jsonify({'error': 'Geçerli kesim bulunamadı'}), 400
+        
+        # Aynı içerik ve kesim listesi aynı önizlemeyi (ve segmentleri) paylaşır
+        content_key = video_info.get('content_hash') or video_id
+        preview_id = preview.make_preview_id(content_key, valid_cuts)
+        segments = preview.plan_preview_segments(valid_cuts)
+        
+        redis_client.setex(
+            f'preview:{preview_id}',
+            Config.PREVIEW_TTL,
+            json.dumps({
+                'video_id': video_id,
+                'video_path': video_info['path'],
+                'content_key': content_key,
+                'segments': segments
+            })
+        )
+        
+        logger.info(f"🎞️ Preview created for video_id: {video_id} ({len(segments)} segments)", extra={'video_id': video_id, 'preview_id': preview_id})
+        return jsonify({
+            'preview_id': preview_id,
+            'playlist_url': f'/api/preview/{preview_id}/playlist.m3u8',
+            'duration': round(sum(segment['duration'] for segment in segments), 3),
+            'segments_count': len(segments)
+        }), 200
+        
+    except Exception as e:
+        logger.error(f"❌ Preview error for video_id {video_id}: {str(e)}", exc_info=True, extra={'video_id': video_id, 'request_id': g.request_id})
+        return jsonify({'error': 'Önizleme oluşturulurken hata oluştu'}), 500
+
+def _get_preview(preview_id):
+    preview_str = redis_client.get(f'preview:{preview_id}')
+    if not preview_str:
+        return None
+    
+    # İzlendiği sürece önizleme düşmesin
+    redis_client.expire(f'preview:{preview_id}', Config.PREVIEW_TTL)
+    return json.loads(preview_str)
+
+@app.route('/api/preview/<preview_id>/playlist.m3u8', methods=['GET'])
+def get_preview_playlist(preview_id):
+    """Önizlemenin VOD HLS oynatma listesi"""
+    try:
+        preview_info = _get_preview(preview_id)
+        if not preview_info:
+            return jsonify({'error': 'Önizleme bulunamadı'}), 404
+        
+        response = Response(
+            preview.build_playlist(preview_info['segments']),
+            mimetype='application/vnd.apple.mpegurl'
+        )
+        response.cache_control.no_cache = True
+        return response
+        
+    except Exception as e:
+        logger.error(f"❌ Preview playlist error for preview_id {preview_id}: {str(e)}", exc_info=True)
+        return jsonify({'error': 'Önizleme listesi alınamadı'}), 500
+
+@app.route('/api/preview/<preview_id>/segment/<int:index>.ts', methods=['GET'])
+def get_preview_segment(preview_id, index):
+    """Önizleme segmentini ilk istendiğinde üret, sonra önbellekten sun"""
+    try:
+        preview_info = _get_preview(preview_id)
+        if not preview_info:
+            return jsonify({'error': 'Önizleme bulunamadı'}), 404
+        
+        segments = preview_info['segments']
+        if index < 0 or index >= len(segments):
+            return jsonify({'error': 'Segment bulunamadı'}), 404
+        
+        segment = segments[index]
+        segment_path = preview.segment_cache_path(preview_info['content_key'], segment)
+        
+        if not os.path.exists(segment_path):
+            # Geçici dosyaya yaz ve atomik olarak taşı; yarım segment sunulmaz
+            temp_path = f"{segment_path}.{uuid.uuid4().hex}.tmp"
+            started = time.time()
+            
+            if not render_preview_segment(
+                preview_info['video_path'],
+                temp_path,
+                segment['start'],
+                segment['duration'],
+                segment['offset']
+            ):
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                return jsonify({'error': 'Önizleme segmenti oluşturulamadı'}), 500
+            
+            os.replace(temp_path, segment_path)
+            artifacts.register(segment_path, 'preview', Config.PREVIEW_TTL, preview_info['video_id'])
+            artifacts.touch(preview_info['video_path'], Config.BLOB_TTL)
+            logger.debug(f"Preview segment {index} of {preview_id} rendered in {time.time() - started:.2f}s")
+        else:
+            artifacts.touch(segment_path, Config.PREVIEW_TTL)
+        
+        return send_file(
+            segment_path,
+            mimetype='video/mp2t',
+            conditional=True,
+            max_age=Config.PREVIEW_TTL
+        )
+        
+    except Exception as e:
+        logger.error(f"❌ Preview segment error for preview_id {preview_id}: {str(e)}", exc_info=True)
+        return jsonify({'error': 'Önizleme segmenti alınamadı'}), 500
+
+def _file_etag(path):
+    """Dosya için güçlü ETag (çıktılar yazıldıktan sonra değişmez)"""
+    stat = os.stat(path)
+    return hashlib.sha256(
+        f"{stat.st_ino}-{stat.st_size}-{stat.st_mtime_ns}".encode()
+    ).hexdigest()[:32]
+
+def _serve_video_file(path, download_name, as_attachment=True):
+    """Videoyu Range/koşullu GET destekli olarak ya da ön proxy'ye devrederek sun"""
+    etag = _file_etag(path)
+    
+    if Config.DOWNLOAD_OFFLOAD in ('x-accel', 'x-sendfile'):
+        # Baytları Python worker'ı değil ön sunucu gönderir (Range dahil)
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+        else:
+            response = Response(mimetype='video/mp4')
+            if Config.DOWNLOAD_OFFLOAD == 'x-accel':
+                relative_path = os.path.relpath(path, Config.PROCESSED_FOLDER)
+                response.headers['X-Accel-Redirect'] = Config.X_ACCEL_REDIRECT_PREFIX + relative_path
+            else:
+                response.headers['X-Sendfile'] = path
+            disposition = 'attachment' if as_attachment else 'inline'
+            response.headers['Content-Disposition'] = f'{disposition}; filename="{download_name}"'
+            response.headers['Accept-Ranges'] = 'bytes'
+        
+        response.set_etag(etag)
+        response.cache_control.private = True
+        response.cache_control.max_age = Config.DOWNLOAD_CACHE_MAX_AGE
+        return response
+    
+    # send_file Range (206), If-Range ve If-None-Match isteklerini kendisi yanıtlar
+    return send_file(
+        path,
+        as_attachment=as_attachment,
+        download_name=download_name,
+        mimetype='video/mp4',
+        conditional=True,
+        etag=etag,
+        max_age=Config.DOWNLOAD_CACHE_MAX_AGE
+    )
+
 @app.route('/api/download/<video_id>', methods=['GET'])
 @log_execution_time()
 def download_video(video_id):
-    """İşlenmiş videoyu indir"""
+    """İşlenmiş videoyu indir (?inline=1 ile tarayıcı oynatıcısında izle)"""
     try:
         logger.info(f"⬇️ Download request received for video_id: {video_id}", extra={'video_id': video_id, 'request_id': g.request_id})
         # Sonuç bilgilerini al
@@ -399,17 +1272,52 @@ def download_video(video_id):
             return jsonify({'error': 'Video dosyası bulunamadı'}), 404
         
         logger.info(f"✅ Serving download for video_id: {video_id} from {output_path}", extra={'video_id': video_id, 'output_path': output_path})
-        return send_file(
+        # İndirilen çıktı ve sonuç kayıtları birlikte uzatılır
+        redis_client.expire(f'video_result:{video_id}', Config.RESULT_TTL)
+        if result_info.get('job_hash'):
+            finalize_jobs.touch_result(redis_client, result_info['job_hash'])
+        artifacts.touch(output_path, Config.RESULT_TTL)
+        
+        return _serve_video_file(
             output_path,
-            as_attachment=True,
-            download_name=f'edited_{video_id}.mp4',
-            mimetype='video/mp4'
+            f'edited_{video_id}.mp4',
+            as_attachment=request.args.get('inline') != '1'
         )
         
     except Exception as e:
         logger.error(f"❌ Download error for video_id {video_id}: {str(e)}", exc_info=True, extra={'video_id': video_id, 'request_id': g.request_id})
         return jsonify({'error': 'Video indirilirken hata oluştu'}), 500
 
+@app.route('/api/cache/stats', methods=['GET'])
+def get_cache_stats():
+    """AI yanıt ve segment önbelleği isabet/ıska sayaçları"""
+    try:
+        if ai_cache:
+            stats = ai_cache.stats()
+            stats['enabled'] = True
+        else:
+            stats = {'enabled': False}
+        
+        stats['segments'] = segment_cache.stats() if segment_cache else {'enabled': False}
+        if artifacts:
+            stats['artifacts'] = artifacts.stats()
+        stats['checkpoints'] = finalize_jobs.FinalizeCheckpoint.stats(redis_client)
+        return jsonify(stats), 200
+        
+    except Exception as e:
+        logger.error(f"❌ Cache stats error: {str(e)}", exc_info=True)
+        return jsonify({'error': 'Önbellek istatistikleri alınamadı'}), 500
+
+@app.route('/api/ffmpeg/stats', methods=['GET'])
+def get_ffmpeg_stats():
+    """FFmpeg yuva durumu ve öncelik sınıfı bazında kaynak kullanımı"""
+    try:
+        return jsonify(ffmpeg_governor.stats()), 200
+        
+    except Exception as e:
+        logger.error(f"❌ FFmpeg stats error: {str(e)}", exc_info=True)
+        return jsonify({'error': 'FFmpeg istatistikleri alınamadı'}), 500
+
 @app.route('/api/health', methods=['GET'])
 @log_execution_time()
 def health_check():
@@ -449,6 +1357,13 @@ def health_check():
     except Exception as e:
         logger.error(f"Disk check error: {str(e)}")
     
+    # Kabul kontrolü: bekleyen render yükü ve ret sayaçları
+    try:
+        if admission:
+            health_status['services']['admission'] = admission.stats()
+    except Exception as e:
+        logger.error(f"Admission stats error: {str(e)}")
+    
     logger.info(f"✅ Health check completed: {health_status['status']}")
     return jsonify(health_status), 200 if health_status['status'] == 'healthy' else 503
 
@@ -0,0 +1,172 @@
+import os
+import json
+import time
+import shutil
+import logging
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+class ArtifactRegistry:
+    """Diskteki üretilmiş dosyaların (yükleme, vekil, önizleme, çıktı) Redis kaydı
+    
+    Her dosya bitiş zamanına ve son erişim zamanına göre iki sıralı kümede
+    tutulur. Süpürücü yalnızca süresi dolan girdileri siler, yani maliyeti
+    klasör boyutuna değil süresi dolan dosya sayısına bağlıdır. Disk doluluğu
+    DISK_HIGH_WATERMARK'ı aşarsa en uzun süre kullanılmayan dosyalar
+    DISK_LOW_WATERMARK'a inene kadar silinir.
+    """
+    
+    EXPIRY_KEY = 'artifacts:expiry'
+    ACCESS_KEY = 'artifacts:access'
+    META_KEY = 'artifacts:meta'
+    STATS_KEY = 'artifacts:stats'
+    
+    def __init__(self, redis_client):
+        self.redis_client = redis_client
+    
+    def register(self, path, kind, ttl, video_id=None):
+        """Dosyayı kaydet ya da mevcut kaydın ömrünü uzat"""
+        now = time.time()
+        meta = {
+            'kind': kind,
+            'size': os.path.getsize(path),
+            'video_id': video_id,
+            'created_at': now
+        }
+        
+        pipe = self.redis_client.pipeline()
+        # Paylaşılan dosyanın (ör. aynı içerikli blob) ömrü kısaltılmaz
+        pipe.zadd(self.EXPIRY_KEY, {path: now + ttl}, gt=True)
+        pipe.zadd(self.ACCESS_KEY, {path: now})
+        pipe.hset(self.META_KEY, path, json.dumps(meta))
+        pipe.execute()
+        
+        self.enforce_watermark()
+    
+    def touch(self, path, ttl=None):
+        """Erişimi kaydet (LRU), ttl verilirse bitiş zamanını ileri al"""
+        now = time.time()
+        pipe = self.redis_client.pipeline()
+        pipe.zadd(self.ACCESS_KEY, {path: now}, xx=True)
+        if ttl:
+            pipe.zadd(self.EXPIRY_KEY, {path: now + ttl}, xx=True, gt=True)
+        pipe.execute()
+    
+    def touch_video(self, video_info):
+        """Videonun kaynak dosyasını ve analiz vekilini kullanımda işaretle
+        
+        Sohbet, önizleme ve finalize bu dosyaları okur; dokunulmazsa LRU
+        onları yükleme zamanına göre sıralar ve hâlâ kullanılan bir videonun
+        kaynağını silebilir.
+        """
+        paths = [video_info['path']]
+        if video_info.get('analysis_proxy'):
+            paths.append(video_info['analysis_proxy']['path'])
+        for path in paths:
+            self.touch(path, Config.BLOB_TTL)
+    
+    def forget(self, path):
+        """Dosyayı silmeden kaydı kaldır (ör. başka yere taşındığında)"""
+        pipe = self.redis_client.pipeline()
+        pipe.zrem(self.EXPIRY_KEY, path)
+        pipe.zrem(self.ACCESS_KEY, path)
+        pipe.hdel(self.META_KEY, path)
+        pipe.execute()
+    
+    def remove(self, path):
+        """Dosyayı ve kaydını sil, silinen bayt sayısını döndür"""
+        size = 0
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            # Kayıt yine de düşülür, aksi halde süpürücü aynı dosyada takılır
+            logger.error(f"Dosya silme hatası: {path} ({str(e)})")
+            size = 0
+            
+        self.forget(path)
+        return size
+    
+    def sweep(self, now=None):
+        """Süresi dolan dosyaları sil"""
+        now = now or time.time()
+        removed = 0
+        freed = 0
+        
+        while True:
+            due = self.redis_client.zrangebyscore(
+                self.EXPIRY_KEY, '-inf', now, start=0, num=Config.ARTIFACT_SWEEP_BATCH
+            )
+            if not due:
+                break
+                
+            for path in due:
+                path = path.decode() if isinstance(path, bytes) else path
+                freed += self.remove(path)
+                removed += 1
+                
+        if removed:
+            pipe = self.redis_client.pipeline()
+            pipe.hincrby(self.STATS_KEY, 'expired', removed)
+            pipe.hincrby(self.STATS_KEY, 'expired_bytes', freed)
+            pipe.execute()
+            logger.info(f"Süresi dolan {removed} dosya silindi ({freed} bayt)")
+            
+        return removed
+    
+    @staticmethod
+    def disk_usage_ratio():
+        """Kayıtlı klasörlerin bulunduğu disklerden en dolu olanının doluluk oranı"""
+        ratios = []
+        for folder in (Config.UPLOAD_FOLDER, Config.PROCESSED_FOLDER):
+            usage = shutil.disk_usage(folder)
+            ratios.append(usage.used / usage.total)
+        return max(ratios)
+    
+    def enforce_watermark(self):
+        """Disk yüksek su seviyesini aştıysa LRU sırasıyla dosya sil"""
+        if self.disk_usage_ratio() < Config.DISK_HIGH_WATERMARK:
+            return 0
+            
+        logger.warning("Disk yüksek su seviyesini aştı, eski dosyalar siliniyor")
+        # Yeni erişilen dosyalar kullanımda olabilir, dokunulmaz
+        protected_after = time.time() - Config.ARTIFACT_MIN_IDLE
+        removed = 0
+        freed = 0
+        
+        while self.disk_usage_ratio() > Config.DISK_LOW_WATERMARK:
+            oldest = self.redis_client.zrangebyscore(
+                self.ACCESS_KEY, '-inf', protected_after, start=0, num=1
+            )
+            if not oldest:
+                logger.warning("Silinebilecek dosya kalmadı, disk hâlâ dolu")
+                break
+                
+            path = oldest[0].decode() if isinstance(oldest[0], bytes) else oldest[0]
+            freed += self.remove(path)
+            removed += 1
+            
+        if removed:
+            pipe = self.redis_client.pipeline()
+            pipe.hincrby(self.STATS_KEY, 'evicted', removed)
+            pipe.hincrby(self.STATS_KEY, 'evicted_bytes', freed)
+            pipe.execute()
+            logger.info(f"Disk dolu: {removed} dosya silindi ({freed} bayt)")
+            
+        return removed
+    
+    def stats(self):
+        raw = self.redis_client.hgetall(self.STATS_KEY)
+        stats = {
+            (k.decode() if isinstance(k, bytes) else k): int(v)
+            for k, v in raw.items()
+        }
+        for field in ('expired', 'expired_bytes', 'evicted', 'evicted_bytes'):
+            stats.setdefault(field, 0)
+            
+        stats['entries'] = self.redis_client.zcard(self.EXPIRY_KEY)
+        stats['disk_usage'] = round(self.disk_usage_ratio(), 4)
+        return stats
@@ -1,4 +1,5 @@
 from celery import Celery
+from kombu import Queue
 from config import Config
 
 # Celery uygulamasını oluştur
@@ -19,9 +20,43 @@ celery_app.conf.update(
     # Uzun süren video işlemleri için timeout ayarları
     task_soft_time_limit=1800,  # 30 dakika soft limit
     task_time_limit=3600,  # 1 saat hard limit
+    # Kuyruklar: hafif işler (probe) uzun render'ların arkasında beklemez
+    task_queues=(
+        Queue('probe'),        # ffprobe + keyframe indeksi (I/O ağırlıklı, kısa)
+        Queue('analysis'),     # AI vekil videosu (CPU, orta)
+        Queue('render'),       # finalize (CPU, uzun)
+        Queue('maintenance'),  # periyodik temizlik
+    ),
+    task_default_queue='probe',
+    task_routes={
+        'tasks.process_video_upload': {'queue': 'probe'},
+        'tasks.generate_analysis_proxy': {'queue': 'analysis'},
+        'tasks.finalize_video': {'queue': 'render'},
+        'tasks.finalize_batch': {'queue': 'render'},
+        'tasks.warm_segment_cache': {'queue': 'render'},
+        'tasks.sweep_artifacts': {'queue': 'maintenance'},
+    },
+    # Redis'te öncelik: her kuyruk 'kuyruk', 'kuyruk:1' ... 'kuyruk:9' listelerine bölünür
+    broker_transport_options={
+        'priority_steps': list(range(10)),
+        'sep': ':',
+        'queue_order_strategy': 'priority',
+    },
+    task_default_priority=Config.TASK_PRIORITY_DEFAULT,
+    # Uzun görevlerde bir worker'ın başka işleri rezerve edip bekletmemesi için;
+    # hafif kuyruk worker'ları --prefetch-multiplier ile artırır
+    worker_prefetch_multiplier=1,
     # Retry ayarları
     task_acks_late=True,
     task_reject_on_worker_lost=True,
     task_default_retry_delay=60,  # 60 saniye
     task_max_retries=3,
+    # Periyodik görevler (ayrı celery beat süreci gerekir)
+    beat_schedule={
+        'sweep-artifacts': {
+            'task': 'tasks.sweep_artifacts',
+            'schedule': Config.ARTIFACT_SWEEP_INTERVAL,
+            'options': {'queue': 'maintenance'},
+        },
+    },
 )
\ No newline at end of file
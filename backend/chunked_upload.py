@@ -0,0 +1,162 @@
+import re
+import json
+import time
+import logging
+from config import Config
+from artifacts import ArtifactRegistry
+
+logger = logging.getLogger(__name__)
+
+CONTENT_RANGE_PATTERN = re.compile(r'^bytes (\d+)-(\d+)/(\d+)$')
+
+class UploadError(Exception):
+    """Parçalı yükleme hatası (HTTP durum koduyla)"""
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+def _session_key(upload_id):
+    return f'upload_session:{upload_id}'
+
+def _ranges_key(upload_id):
+    return f'upload_ranges:{upload_id}'
+
+def create_session(redis_client, upload_id, video_path, filename, size):
+    """Yeni yükleme oturumu oluştur ve hedef dosyayı önceden ayır"""
+    if size <= 0:
+        raise UploadError('Dosya boyutu geçersiz')
+        
+    if size > Config.MAX_CONTENT_LENGTH:
+        raise UploadError('Dosya boyutu sınırı aşıldı', 413)
+        
+    # Parçalar doğrudan nihai konuma yazılır, dosyayı tam boyuta ayır
+    with open(video_path, 'wb') as f:
+        f.truncate(size)
+        
+    session = {
+        'upload_id': upload_id,
+        'path': video_path,
+        'filename': filename,
+        'size': size,
+        'created_at': time.time()
+    }
+    
+    redis_client.setex(
+        _session_key(upload_id),
+        Config.UPLOAD_SESSION_TTL,
+        json.dumps(session)
+    )
+    # Tamamlanmayan oturumun dosyası oturumla birlikte silinir
+    ArtifactRegistry(redis_client).register(
+        video_path, 'upload_session', Config.UPLOAD_SESSION_TTL, upload_id
+    )
+    logger.info(f"Yükleme oturumu oluşturuldu: {upload_id} ({size} bytes)")
+    
+    return session
+
+def get_session(redis_client, upload_id):
+    """Yükleme oturumunu al"""
+    session_str = redis_client.get(_session_key(upload_id))
+    if not session_str:
+        raise UploadError('Yükleme oturumu bulunamadı', 404)
+    return json.loads(session_str)
+
+def parse_content_range(header, size):
+    """'bytes start-end/total' başlığını doğrula ve (start, end) döndür"""
+    match = CONTENT_RANGE_PATTERN.match(header or '')
+    if not match:
+        raise UploadError('Geçersiz Content-Range başlığı')
+        
+    start, end, total = map(int, match.groups())
+    if total != size or start > end or end >= size:
+        raise UploadError('Content-Range oturumla uyuşmuyor', 416)
+        
+    return start, end
+
+def write_chunk(redis_client, session, start, end, stream):
+    """Parçayı akıştan okuyup dosyadaki yerine yaz ve aralığı kaydet"""
+    if session.get('committed'):
+        raise UploadError('Yükleme zaten tamamlandı', 409)
+        
+    expected = end - start + 1
+    written = 0
+    
+    with open(session['path'], 'r+b') as f:
+        f.seek(start)
+        while written < expected:
+            data = stream.read(min(Config.UPLOAD_READ_SIZE, expected - written))
+            if not data:
+                break
+            f.write(data)
+            written += len(data)
+            
+    if written != expected:
+        # Eksik parça kaydedilmez, istemci aynı aralığı tekrar gönderir
+        raise UploadError(f'Eksik parça: {written}/{expected} bytes')
+        
+    upload_id = session['upload_id']
+    pipe = redis_client.pipeline()
+    pipe.zadd(_ranges_key(upload_id), {f'{start}-{end}': start})
+    pipe.expire(_ranges_key(upload_id), Config.UPLOAD_SESSION_TTL)
+    pipe.expire(_session_key(upload_id), Config.UPLOAD_SESSION_TTL)
+    pipe.execute()
+    ArtifactRegistry(redis_client).touch(session['path'], Config.UPLOAD_SESSION_TTL)
+    
+    return get_received_ranges(redis_client, upload_id)
+
+def get_received_ranges(redis_client, upload_id):
+    """Alınan aralıkları birleştirilmiş [start, end] listesi olarak döndür"""
+    merged = []
+    
+    for member in redis_client.zrange(_ranges_key(upload_id), 0, -1):
+        if isinstance(member, bytes):
+            member = member.decode()
+        start, end = map(int, member.split('-'))
+        
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+            
+    return merged
+
+def received_bytes(ranges):
+    """Birleştirilmiş aralıklardaki toplam bayt sayısı"""
+    return sum(end - start + 1 for start, end in ranges)
+
+def update_session(redis_client, upload_id, **fields):
+    """Oturum kaydına alan ekle (commit adımlarının ilerlemesi)"""
+    session = get_session(redis_client, upload_id)
+    session.update(fields)
+    redis_client.setex(
+        _session_key(upload_id),
+        Config.UPLOAD_SESSION_TTL,
+        json.dumps(session)
+    )
+    return session
+
+def commit_session(redis_client, upload_id):
+    """Tüm baytlar alındıysa oturum bilgisini döndür
+    
+    Oturum burada silinmez; blob kaydedilip işleme başlayınca
+    finish_session çağrılır. Böylece yarıda kalan commit aynı oturumla
+    tekrar denenebilir, tamamlanmış oturumun commit'i aynı sonucu döndürür.
+    """
+    session = get_session(redis_client, upload_id)
+    if session.get('committed'):
+        return session
+        
+    ranges = get_received_ranges(redis_client, upload_id)
+    if ranges != [[0, session['size'] - 1]]:
+        raise UploadError('Yükleme tamamlanmadı', 409)
+        
+    return session
+
+def finish_session(redis_client, upload_id):
+    """Commit'i tamamlandı olarak işaretle; parça aralıkları artık gerekmez"""
+    session = update_session(redis_client, upload_id, committed=True)
+    redis_client.delete(_ranges_key(upload_id))
+    logger.info(f"Yükleme oturumu tamamlandı: {upload_id}")
+    
+    return session
@@ -14,15 +14,156 @@ class Config:
     PROCESSED_FOLDER = os.path.abspath(os.environ.get('PROCESSED_FOLDER') or 'backend/processed')
     MAX_CONTENT_LENGTH = 500 * 1024 * 1024  # 500MB maksimum dosya boyutu
     
+    # Parçalı (devam ettirilebilir) yükleme ayarları
+    UPLOAD_CHUNK_SIZE = int(os.environ.get('UPLOAD_CHUNK_SIZE') or 8 * 1024 * 1024)  # İstemciye önerilen parça boyutu
+    UPLOAD_READ_SIZE = 1024 * 1024  # Akıştan okuma tampon boyutu
+    UPLOAD_SESSION_TTL = 24 * 3600  # Yarım kalan oturumlar 24 saat saklanır
+    
+    # İçerik adresli depolama: aynı dosyanın analiz sonuçları bu süre saklanır
+    BLOB_TTL = 24 * 3600
+    # Finalize çıktısı ve sonuç kaydı birlikte düşer
+    RESULT_TTL = 3600  # 1 saat
+    # Aynı finalize işinin tekrarları çalışan göreve eklenir; sahiplik en fazla
+    # görev zaman sınırı kadar tutulur
+    FINALIZE_JOB_TTL = 3600
+    # Yarım kalan finalize işinin tamamlanan segmentleri yeniden teslimde
+    # kullanılmak üzere saklanır (broker visibility_timeout'undan uzun olmalı)
+    FINALIZE_CHECKPOINT_TTL = int(os.environ.get('FINALIZE_CHECKPOINT_TTL') or 4 * 3600)
+    
+    # Dosya kaydı ve süpürücü
+    ARTIFACT_SWEEP_INTERVAL = int(os.environ.get('ARTIFACT_SWEEP_INTERVAL') or 300)  # saniye
+    ARTIFACT_SWEEP_BATCH = 500
+    # Disk doluluğu bu oranı aşınca en eski kullanılan dosyalar DISK_LOW_WATERMARK'a kadar silinir
+    DISK_HIGH_WATERMARK = float(os.environ.get('DISK_HIGH_WATERMARK') or 0.90)
+    DISK_LOW_WATERMARK = float(os.environ.get('DISK_LOW_WATERMARK') or 0.80)
+    ARTIFACT_MIN_IDLE = 600  # Son 10 dakikada erişilen dosyalar disk dolu olsa da silinmez
+    
     # Redis ayarları
     REDIS_URL = os.environ.get('REDIS_URL') or 'redis://localhost:6379/0'
     
     # Celery ayarları
     CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL') or 'redis://localhost:6379/0'
     CELERY_RESULT_BACKEND = os.environ.get('CELERY_RESULT_BACKEND') or 'redis://localhost:6379/0'
+    # Görev öncelikleri (Redis broker'da 0 en yüksek öncelik)
+    TASK_PRIORITY_INTERACTIVE = 0
+    TASK_PRIORITY_DEFAULT = 5
+    TASK_PRIORITY_BATCH = 9
     
     # Gemini API ayarları
     GEMINI_API_KEY = os.environ.get('GEMINI_API_KEY')
+    # Yerel sahte sunucuyla test için değiştirilebilir
+    GEMINI_API_BASE_URL = os.environ.get('GEMINI_API_BASE_URL') or 'https://generativelanguage.googleapis.com'
+    # 'upload': video dosya deposuna bir kez yüklenir, 'inline': her istekte baytlar gönderilir
+    GEMINI_VIDEO_MODE = os.environ.get('GEMINI_VIDEO_MODE') or 'upload'
+    GEMINI_UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024  # 256KB'ın katı olmalı
+    GEMINI_HTTP_TIMEOUT = 120
+    GEMINI_FILE_ACTIVE_TIMEOUT = 300  # Video işlenip ACTIVE olana kadar beklenecek süre
+    GEMINI_FILE_EXPIRY_MARGIN = 600  # Sağlayıcı dosyayı silmeden bu kadar önce önbellekten düşer
+    GEMINI_FILE_DEFAULT_TTL = 48 * 3600
+    GEMINI_FILE_POLL_INTERVAL = 2  # İşlenen dosyanın durumunu sorgulama aralığı (saniye)
+    GEMINI_UPLOAD_RETRIES = 3  # Kesilen yükleme kaldığı yerden en fazla bu kadar devam ettirilir
+    # Dosya deposuna yükleme başarısız olursa bundan küçük videolar istekle birlikte gönderilir
+    GEMINI_INLINE_MAX_BYTES = 20 * 1024 * 1024
+    
+    # İndirme teslimi
+    # 'direct': Flask send_file (Range + koşullu GET), 'x-accel': nginx X-Accel-Redirect,
+    # 'x-sendfile': Apache/lighttpd X-Sendfile
+    DOWNLOAD_OFFLOAD = os.environ.get('DOWNLOAD_OFFLOAD') or 'direct'
+    # nginx'te PROCESSED_FOLDER'a bağlanan 'internal' location öneki
+    X_ACCEL_REDIRECT_PREFIX = os.environ.get('X_ACCEL_REDIRECT_PREFIX') or '/protected/processed/'
+    DOWNLOAD_CACHE_MAX_AGE = 3600
+    
+    # Durum akışı (SSE / long-poll)
+    STATUS_STREAM_HEARTBEAT = 15  # Bağlantıyı canlı tutmak için yorum satırı aralığı
+    STATUS_STREAM_MAX_SECONDS = 600  # İstemci bu süreden sonra yeniden bağlanır
+    STATUS_LONG_POLL_MAX_SECONDS = 30
+    
+    # Sohbet geçmişi (yalnızca metin turları saklanır)
+    CHAT_HISTORY_TTL = 3600  # 1 saat
+    # Devam turlarında gönderilecek geçmişin tahmini token bütçesi
+    CHAT_HISTORY_TOKEN_BUDGET = int(os.environ.get('CHAT_HISTORY_TOKEN_BUDGET') or 8000)
+    CHAT_SUMMARY_MAX_CHARS = 2000
+    
+    # AI yanıt önbelleği
+    AI_CACHE_ENABLED = os.environ.get('AI_CACHE_ENABLED', 'true').lower() == 'true'
+    AI_CACHE_TTL = int(os.environ.get('AI_CACHE_TTL') or 24 * 3600)
+    AI_CACHE_MAX_ENTRIES = int(os.environ.get('AI_CACHE_MAX_ENTRIES') or 5000)
+    AI_CACHE_LOCK_TIMEOUT = 180  # Eşzamanlı aynı istekler en fazla bu kadar bekler
+    
+    # Finalize ayarları
+    # 'single_pass': tüm kesim listesi tek ffmpeg çağrısında işlenir
+    # 'segments': her kesim ayrı ffmpeg çağrısıyla kesilip birleştirilir
+    # 'smart': keyframe indeksiyle iç GOP'lar kopyalanır, yalnızca sınırlar kodlanır
+    FINALIZE_MODE = os.environ.get('FINALIZE_MODE') or 'single_pass'
+    # Tek geçişte yeniden kodlama (kare hassasiyetli kesim, daha yavaş)
+    FINALIZE_REENCODE = os.environ.get('FINALIZE_REENCODE', 'false').lower() == 'true'
+    # Uzun tek geçiş çıktıları bu kadar saniyelik kesim gruplarına bölünür; her
+    # grup ayrı render edilip checkpoint'e yazılır ve birleştirilir (0 = bölme)
+    FINALIZE_CHUNK_SECONDS = float(os.environ.get('FINALIZE_CHUNK_SECONDS') or 600)
+    # Paralel segment kesimi için havuz boyutu (0 = CPU ve disk limitine göre otomatik)
+    SEGMENT_WORKERS = int(os.environ.get('SEGMENT_WORKERS') or 0)
+    # Diskin aynı anda kaldırabileceği ffmpeg kopyalama işi sayısı
+    DISK_PARALLELISM = int(os.environ.get('DISK_PARALLELISM') or 4)
+    # FFmpeg ilerlemesinin video_status'a yazılma sıklığı (saniye)
+    PROGRESS_UPDATE_INTERVAL = float(os.environ.get('PROGRESS_UPDATE_INTERVAL') or 1.0)
+    FFMPEG_STDERR_TAIL_LINES = 200  # Hata logu için saklanan son stderr satırları
+    # Çalışan finalize işinin iptal bayrağını yoklama sıklığı (saniye)
+    CANCEL_POLL_INTERVAL = float(os.environ.get('CANCEL_POLL_INTERVAL') or 0.5)
+    
+    # FFmpeg kaynak yöneticisi: host genelinde eşzamanlı ffmpeg sınırı (FFMPEG_LOCK_DIR'ı
+    # paylaşan tüm süreçler için), iş başına iş parçacığı ve öncelik sınıfları
+    FFMPEG_SLOTS = int(os.environ.get('FFMPEG_SLOTS') or 0)  # 0 = CPU sayısının yarısı (en az 2)
+    FFMPEG_INTERACTIVE_SLOTS = int(os.environ.get('FFMPEG_INTERACTIVE_SLOTS') or 1)  # yalnızca önizleme/analiz
+    FFMPEG_THREADS_PER_JOB = int(os.environ.get('FFMPEG_THREADS_PER_JOB') or 0)  # 0 = CPU sayısı / yuva
+    FFMPEG_LOCK_DIR = os.environ.get('FFMPEG_LOCK_DIR') or '/tmp/ffmpeg_slots'
+    FFMPEG_SLOT_WARN_AFTER = 600  # saniye; bu kadar beklenirse uyarı loglanır (yuvasız çalışılmaz)
+    FFMPEG_SLOT_POLL_INTERVAL = 0.2  # saniye
+    FFMPEG_BATCH_NICE = int(os.environ.get('FFMPEG_BATCH_NICE') or 10)
+    FFMPEG_BATCH_IONICE_LEVEL = 7  # best-effort sınıfında en düşük
+    FFMPEG_RECENT_LIMIT = 200  # Saklanan son çağrı kaydı
+    
+    # AI analizi için vekil video (düşük çözünürlük ve fps, mono ses)
+    ANALYSIS_PROXY_ENABLED = os.environ.get('ANALYSIS_PROXY_ENABLED', 'true').lower() == 'true'
+    ANALYSIS_PROXY_HEIGHT = int(os.environ.get('ANALYSIS_PROXY_HEIGHT') or 360)
+    ANALYSIS_PROXY_FPS = float(os.environ.get('ANALYSIS_PROXY_FPS') or 1)
+    
+    # Render planlayıcı: yeniden kodlamada bu hıza (x gerçek zaman) ulaşan en kaliteli preset seçilir
+    RENDER_TARGET_SPEED = float(os.environ.get('RENDER_TARGET_SPEED') or 2.0)
+    RENDER_THREADS = int(os.environ.get('RENDER_THREADS') or 0)  # 0 = ffmpeg iş parçacığı bütçesi
+    RENDER_DISK_THROUGHPUT = 100 * 1024 * 1024  # Kopyalama tahmini için bayt/saniye
+    
+    # Kabul kontrolü (yükleme ve finalize)
+    ADMISSION_ENABLED = os.environ.get('ADMISSION_ENABLED', 'true').lower() == 'true'
+    # İş kabul edildikten sonra diskte kalması gereken en az boş alan
+    ADMISSION_MIN_FREE_BYTES = int(os.environ.get('ADMISSION_MIN_FREE_BYTES') or 2 * 1024 * 1024 * 1024)  # 2GB
+    ADMISSION_MAX_QUEUE_DEPTH = int(os.environ.get('ADMISSION_MAX_QUEUE_DEPTH') or 50)
+    # Bekleyen render işlerinin tahmini toplam süresi sınırı (saniye)
+    ADMISSION_MAX_BACKLOG_SECONDS = int(os.environ.get('ADMISSION_MAX_BACKLOG_SECONDS') or 1800)
+    ADMISSION_RETRY_AFTER = 30
+    ADMISSION_DISK_RETRY_AFTER = 120
+    ADMISSION_JOB_STALE_SECONDS = 3600  # Celery task_time_limit ile aynı
+    
+    # Render edilmiş segment önbelleği (yeniden finalize'da yalnızca değişen kesimler işlenir)
+    SEGMENT_CACHE_ENABLED = os.environ.get('SEGMENT_CACHE_ENABLED', 'true').lower() == 'true'
+    SEGMENT_CACHE_FOLDER = os.path.abspath(os.environ.get('SEGMENT_CACHE_FOLDER') or 'backend/segment_cache')
+    SEGMENT_CACHE_MAX_BYTES = int(os.environ.get('SEGMENT_CACHE_MAX_BYTES') or 10 * 1024 * 1024 * 1024)  # 10GB
+    # Segment yolu için önbellekte bulunması gereken çıktı süresi oranı
+    SEGMENT_CACHE_MIN_HIT_RATIO = float(os.environ.get('SEGMENT_CACHE_MIN_HIT_RATIO') or 0.5)
+    
+    # Kesim listesi önizlemesi (HLS, segmentler istendiğinde üretilir)
+    PREVIEW_SEGMENT_SECONDS = float(os.environ.get('PREVIEW_SEGMENT_SECONDS') or 4)
+    PREVIEW_HEIGHT = int(os.environ.get('PREVIEW_HEIGHT') or 480)
+    PREVIEW_TTL = 3600  # 1 saat
+    
+    # Toplu finalize çıktı profilleri: hedef yükseklik ve isteğe bağlı en-boy
+    # kırpması (None: kaynak çözünürlük)
+    OUTPUT_PROFILES = {
+        'source': None,
+        '720p': {'height': 720},
+        '480p': {'height': 480},
+        'vertical': {'height': 1280, 'aspect': '9:16'}
+    }
+    BATCH_MAX_VARIANTS = int(os.environ.get('BATCH_MAX_VARIANTS') or 6)
     
     # İzin verilen video formatları
     ALLOWED_EXTENSIONS = {'mp4', 'avi', 'mov', 'mkv', 'webm'}
@@ -38,6 +179,7 @@ class Config:
         # Upload, processed ve log klasörlerini oluştur
         os.makedirs(Config.UPLOAD_FOLDER, exist_ok=True)
         os.makedirs(Config.PROCESSED_FOLDER, exist_ok=True)
+        os.makedirs(Config.SEGMENT_CACHE_FOLDER, exist_ok=True)
         os.makedirs(Config.LOG_FOLDER, exist_ok=True)
         
         # Logging ayarları
@@ -0,0 +1,72 @@
+import json
+import time
+import hashlib
+from config import Config
+
+class ConversationStore:
+    """Sohbet geçmişini metin turları olarak Redis'te tutar
+    
+    Video baytları veya SDK nesneleri saklanmaz; yalnızca analiz edilen
+    videoya bir referans (yol + önbellek anahtarı) ve her turun metni
+    tutulur. Turlar listeye eklenir, her turda tüm geçmiş yeniden yazılmaz.
+    Sağlayıcı isteği gerektiğinde bu turlardan yeniden oluşturulur.
+    """
+    
+    def __init__(self, redis_client):
+        self.redis_client = redis_client
+    
+    def _meta_key(self, video_id):
+        return f'chat:{video_id}:meta'
+    
+    def _turns_key(self, video_id):
+        return f'chat:{video_id}:turns'
+    
+    def get_meta(self, video_id):
+        """Konuşmanın video referansını al (yoksa None)"""
+        meta = self.redis_client.hgetall(self._meta_key(video_id))
+        if not meta:
+            return None
+            
+        return {
+            (k.decode() if isinstance(k, bytes) else k): (v.decode() if isinstance(v, bytes) else v)
+            for k, v in meta.items()
+        }
+    
+    def start(self, video_id, video_path, cache_key, model):
+        """Yeni konuşma başlat, varsa eskisini sil"""
+        pipe = self.redis_client.pipeline()
+        pipe.delete(self._meta_key(video_id), self._turns_key(video_id))
+        pipe.hset(self._meta_key(video_id), mapping={
+            'video_path': video_path,
+            'cache_key': cache_key,
+            'model': model,
+            'created_at': time.time()
+        })
+        pipe.expire(self._meta_key(video_id), Config.CHAT_HISTORY_TTL)
+        pipe.execute()
+    
+    def append_turns(self, video_id, *turns):
+        """Turları listenin sonuna ekle ve ömrü uzat
+        
+        Her tur: {'role': 'user' | 'model', 'text': str, ...ek alanlar}
+        """
+        pipe = self.redis_client.pipeline()
+        pipe.rpush(self._turns_key(video_id), *[
+            json.dumps(dict(turn, ts=turn.get('ts', time.time())))
+            for turn in turns
+        ])
+        pipe.expire(self._turns_key(video_id), Config.CHAT_HISTORY_TTL)
+        pipe.expire(self._meta_key(video_id), Config.CHAT_HISTORY_TTL)
+        pipe.execute()
+    
+    def get_turns(self, video_id):
+        """Tüm turları sırasıyla al"""
+        return [json.loads(turn) for turn in self.redis_client.lrange(self._turns_key(video_id), 0, -1)]
+    
+    @staticmethod
+    def state_hash(turns):
+        """Konuşma durumunun özeti (yanıt önbelleği anahtarı için)"""
+        hasher = hashlib.sha256()
+        for turn in turns:
+            hasher.update(f"{turn['role']}:{turn['text']}\n".encode())
+        return hasher.hexdigest()
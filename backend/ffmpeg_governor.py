@@ -0,0 +1,272 @@
+import os
+import json
+import time
+import fcntl
+import shutil
+import logging
+import threading
+import contextvars
+import subprocess
+from contextlib import contextmanager, nullcontext
+import redis
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Tüm ffmpeg/ffprobe çağrıları bu modülden geçer:
+# - Host genelinde yuva sınırı: FFMPEG_LOCK_DIR'daki dosyalara fcntl kilidi.
+#   Kilit süreç ölünce çekirdek tarafından bırakılır, bu yüzden worker
+#   çökmesi yuva sızdırmaz. Aynı dizini paylaşan tüm süreçler (ve
+#   konteynerler) aynı sınırı görür.
+# - İş başına iş parçacığı bütçesi: CPU sayısı / yuva sayısı.
+# - Öncelik sınıfı: 'interactive' (önizleme, probe, analiz) normal
+#   öncelikte ve kendine ayrılmış yuvalarla; 'batch' (finalize) nice ve
+#   ionice ile düşük öncelikte çalışır.
+# - Kaynak kullanımı: os.wait4 ile CPU süresi, en yüksek RSS ve disk
+#   okuma/yazma Redis'e yazılır (GET /api/ffmpeg/stats).
+
+INTERACTIVE = 'interactive'
+BATCH = 'batch'
+
+STATS_KEY = 'ffmpeg_governor:stats'
+RECENT_KEY = 'ffmpeg_governor:recent'
+
+_priority = contextvars.ContextVar('ffmpeg_priority', default=INTERACTIVE)
+_NICE = shutil.which('nice')
+_IONICE = shutil.which('ionice')
+_redis_client = None
+
+def _redis():
+    global _redis_client
+    if _redis_client is None:
+        _redis_client = redis.from_url(Config.REDIS_URL)
+    return _redis_client
+
+def set_priority(priority):
+    """Bu bağlamdaki ffmpeg çağrılarının öncelik sınıfını ayarla (reset_priority için token döner)"""
+    return _priority.set(priority)
+
+def reset_priority(token):
+    _priority.reset(token)
+
+def current_priority():
+    return _priority.get()
+
+def slot_count():
+    return Config.FFMPEG_SLOTS or max(2, (os.cpu_count() or 2) // 2)
+
+def thread_budget():
+    """Tek bir ffmpeg işinin kullanabileceği iş parçacığı sayısı"""
+    return Config.FFMPEG_THREADS_PER_JOB or max(1, (os.cpu_count() or 1) // slot_count())
+
+def _slot_indexes(priority):
+    """Sınıfın kullanabileceği yuvalar; ayrılmış yuvalar yalnızca etkileşimli işlere açık"""
+    total = slot_count()
+    reserved = min(Config.FFMPEG_INTERACTIVE_SLOTS, total - 1)
+    return range(total) if priority == INTERACTIVE else range(reserved, total)
+
+def _try_lock(index):
+    path = os.path.join(Config.FFMPEG_LOCK_DIR, f'slot_{index}.lock')
+    handle = open(path, 'a')
+    try:
+        fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return handle
+    except BlockingIOError:
+        handle.close()
+        return None
+
+def _acquire(priority, cancel_event=None):
+    """Boş bir yuva kilitle; yuva boşalana kadar bekler, iptal edilirse False döner
+    
+    Yuva dışında hiçbir zaman çalışılmaz; uzun beklemeler yalnızca loglanır
+    ve sayılır, host genelindeki sınır yük altında da korunur.
+    """
+    os.makedirs(Config.FFMPEG_LOCK_DIR, exist_ok=True)
+    warn_at = time.monotonic() + Config.FFMPEG_SLOT_WARN_AFTER
+    
+    while True:
+        for index in _slot_indexes(priority):
+            handle = _try_lock(index)
+            if handle:
+                return handle
+                
+        if warn_at is not None and time.monotonic() >= warn_at:
+            warn_at = None
+            logger.warning(f"FFmpeg yuvası {Config.FFMPEG_SLOT_WARN_AFTER}s içinde boşalmadı, beklemeye devam ediliyor")
+            try:
+                _redis().hincrby(STATS_KEY, f'ffmpeg:{priority}:long_slot_waits', 1)
+            except Exception as e:
+                logger.warning(f"FFmpeg istatistiği yazılamadı: {str(e)}")
+                
+        if cancel_event is not None:
+            if cancel_event.wait(Config.FFMPEG_SLOT_POLL_INTERVAL):
+                return False
+        else:
+            time.sleep(Config.FFMPEG_SLOT_POLL_INTERVAL)
+
+@contextmanager
+def slot(priority=None, cancel_event=None):
+    """Host genelindeki ffmpeg yuvalarından birini tut
+    
+    Bekleme süresini (saniye) verir; yuva beklenirken iptal edilirse None.
+    """
+    priority = priority or current_priority()
+    started = time.monotonic()
+    handle = _acquire(priority, cancel_event)
+    
+    try:
+        yield None if handle is False else time.monotonic() - started
+    finally:
+        if handle:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+            handle.close()
+
+def prepare(cmd, priority=None):
+    """Komuta iş parçacığı bütçesini ve öncelik sınıfının nice/ionice önekini ekle"""
+    priority = priority or current_priority()
+    cmd = list(cmd)
+    
+    if os.path.basename(cmd[0]) == 'ffmpeg':
+        budget = str(thread_budget())
+        first_input = cmd.index('-i') if '-i' in cmd else len(cmd)
+        # Kodlayıcı iş parçacıkları çıktı seçeneği olarak komutu kuranca verilir;
+        # burada çözücü ve filtre grafiği sınırlanır
+        extra = ['-filter_threads', budget, '-filter_complex_threads', budget]
+        if '-threads' not in cmd[:first_input]:
+            extra += ['-threads', budget]
+        cmd = [cmd[0]] + extra + cmd[1:]
+        
+    if priority == BATCH:
+        prefix = []
+        if _IONICE:
+            # -t: izin yoksa (ör. kısıtlı konteyner) ionice sessizce atlanır
+            prefix += [_IONICE, '-t', '-c', '2', '-n', str(Config.FFMPEG_BATCH_IONICE_LEVEL)]
+        if _NICE:
+            prefix += [_NICE, '-n', str(Config.FFMPEG_BATCH_NICE)]
+        cmd = prefix + cmd
+        
+    return cmd
+
+def wait(process):
+    """Süreci bekle, (returncode, kaynak kullanımı) döndür
+    
+    Popen.wait yerine os.wait4 kullanılır; süreç başka yerde toplanmışsa
+    kullanım bilgisi None olur.
+    """
+    try:
+        _, status, rusage = os.wait4(process.pid, 0)
+    except ChildProcessError:
+        return process.wait(), None
+        
+    process.returncode = os.waitstatus_to_exitcode(status)
+    return process.returncode, {
+        'cpu_seconds': round(rusage.ru_utime + rusage.ru_stime, 3),
+        'max_rss_kb': rusage.ru_maxrss,
+        # Blok sayıları 512 baytlıktır; sayfa önbelleğinden okunanlar dahil değildir
+        'read_bytes': rusage.ru_inblock * 512,
+        'write_bytes': rusage.ru_oublock * 512
+    }
+
+def record(cmd, priority, returncode, usage, wall_seconds, wait_seconds):
+    """Çağrının kaynak kullanımını Redis istatistiklerine ekle (hata yutulur)"""
+    tool = os.path.basename(cmd[0])
+    prefix = f'{tool}:{priority}'
+    entry = dict(
+        usage or {},
+        tool=tool,
+        priority=priority,
+        returncode=returncode,
+        wall_seconds=round(wall_seconds, 3),
+        wait_seconds=round(wait_seconds, 3),
+        finished_at=time.time()
+    )
+    
+    try:
+        pipe = _redis().pipeline()
+        pipe.hincrby(STATS_KEY, f'{prefix}:runs', 1)
+        if returncode != 0:
+            pipe.hincrby(STATS_KEY, f'{prefix}:failures', 1)
+        pipe.hincrbyfloat(STATS_KEY, f'{prefix}:wall_seconds', wall_seconds)
+        pipe.hincrbyfloat(STATS_KEY, f'{prefix}:wait_seconds', wait_seconds)
+        if usage:
+            pipe.hincrbyfloat(STATS_KEY, f'{prefix}:cpu_seconds', usage['cpu_seconds'])
+            pipe.hincrby(STATS_KEY, f'{prefix}:read_bytes', usage['read_bytes'])
+            pipe.hincrby(STATS_KEY, f'{prefix}:write_bytes', usage['write_bytes'])
+        pipe.lpush(RECENT_KEY, json.dumps(entry))
+        pipe.ltrim(RECENT_KEY, 0, Config.FFMPEG_RECENT_LIMIT - 1)
+        pipe.execute()
+    except Exception as e:
+        logger.warning(f"FFmpeg kaynak kullanımı kaydedilemedi: {str(e)}")
+
+def run_capture(cmd, use_slot=False):
+    """subprocess.run(cmd, capture_output=True, text=True) yerine yönetilen çağrı
+    
+    ffprobe gibi çıktısı okunan kısa komutlar içindir. Metadata sorguları
+    yuva beklemez; use_slot=True tüm dosyayı tarayan komutlar içindir.
+    """
+    priority = current_priority()
+    
+    with slot(priority) if use_slot else nullcontext(0.0) as waited:
+        started = time.monotonic()
+        process = subprocess.Popen(
+            prepare(cmd, priority),
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True
+        )
+        
+        # İki boru ayrı okunur, aksi halde dolan stderr süreci kilitler
+        stderr_parts = []
+        stderr_thread = threading.Thread(
+            target=lambda: stderr_parts.append(process.stderr.read()), daemon=True
+        )
+        stderr_thread.start()
+        stdout = process.stdout.read()
+        stderr_thread.join()
+        
+        returncode, usage = wait(process)
+        record(cmd, priority, returncode, usage, time.monotonic() - started, waited or 0.0)
+        
+    return subprocess.CompletedProcess(cmd, returncode, stdout, ''.join(stderr_parts))
+
+def slots_in_use():
+    """Şu an tutulan yuva sayısı (kilit denenerek ölçülür)"""
+    os.makedirs(Config.FFMPEG_LOCK_DIR, exist_ok=True)
+    in_use = 0
+    for index in range(slot_count()):
+        handle = _try_lock(index)
+        if handle:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+            handle.close()
+        else:
+            in_use += 1
+    return in_use
+
+def stats():
+    """Sınıf bazında toplamlar, yuva durumu ve son çağrılar"""
+    client = _redis()
+    classes = {}
+    for field, value in client.hgetall(STATS_KEY).items():
+        field = field.decode() if isinstance(field, bytes) else field
+        tool, priority, name = field.split(':')
+        value = float(value)
+        classes.setdefault(f'{tool}:{priority}', {})[name] = int(value) if value.is_integer() else round(value, 3)
+        
+    for totals in classes.values():
+        wall = totals.get('wall_seconds') or 0
+        runs = totals.get('runs') or 0
+        # Ortalama kullanılan çekirdek sayısı ve yuva bekleme süresi
+        totals['avg_cores'] = round(totals.get('cpu_seconds', 0) / wall, 2) if wall else 0
+        totals['avg_wait_seconds'] = round(totals.get('wait_seconds', 0) / runs, 3) if runs else 0
+        
+    recent = [json.loads(entry) for entry in client.lrange(RECENT_KEY, 0, -1)]
+    return {
+        'slots': slot_count(),
+        'interactive_slots': min(Config.FFMPEG_INTERACTIVE_SLOTS, slot_count() - 1),
+        'slots_in_use': slots_in_use(),
+        'threads_per_job': thread_budget(),
+        'classes': classes,
+        'peak_rss_kb': max((entry.get('max_rss_kb', 0) for entry in recent), default=0),
+        'recent': recent[:20]
+    }
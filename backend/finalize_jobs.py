@@ -0,0 +1,391 @@
+import os
+import re
+import json
+import hashlib
+import logging
+import threading
+from config import Config
+from render_planner import plan_render
+from utils import validate_cuts
+
+logger = logging.getLogger(__name__)
+
+def _job_key(job_hash):
+    return f'finalize_job:{job_hash}'
+
+def _videos_key(job_hash):
+    return f'finalize_job_videos:{job_hash}'
+
+def _result_key(job_hash):
+    return f'finalize_result:{job_hash}'
+
+def _checkpoint_key(job_hash):
+    return f'finalize_checkpoint:{job_hash}'
+
+def _cancel_key(task_id):
+    return f'finalize_cancel:{task_id}'
+
+def _current_key(video_id):
+    return f'finalize_current:{video_id}'
+
+def _batch_key(batch_id):
+    return f'finalize_batch:{batch_id}'
+
+def _batch_task_key(task_id):
+    return f'finalize_batch_task:{task_id}'
+
+def render_settings():
+    """Çıktıyı etkileyen render ayarları (iş özetine dahil edilir)"""
+    return {
+        'mode': Config.FINALIZE_MODE,
+        'reencode': Config.FINALIZE_REENCODE,
+        'target_speed': Config.RENDER_TARGET_SPEED,
+        'threads': Config.RENDER_THREADS
+    }
+
+def make_job_hash(content_key, valid_cuts, profile=None):
+    """(video içeriği, normalize kesim listesi, render ayarları) özeti
+    
+    profile: toplu finalize'da yeniden kodlanan çıktı profili; None, tekli
+    finalize ile aynı çıktıyı (ve aynı özeti) verir.
+    """
+    cuts = [[round(cut['start_seconds'], 3), round(cut['end_seconds'], 3)] for cut in valid_cuts]
+    parts = [content_key, cuts, render_settings()]
+    if profile:
+        parts.append(dict(Config.OUTPUT_PROFILES[profile] or {}, name=profile))
+    raw = json.dumps(parts, sort_keys=True)
+    return hashlib.sha256(raw.encode()).hexdigest()[:32]
+
+def output_path_for(job_hash):
+    return os.path.join(Config.PROCESSED_FOLDER, f'final_{job_hash}.mp4')
+
+def temp_output_path_for(job_hash):
+    # Uzantı korunur ki ffmpeg kapsayıcıyı tanısın; aynı işi yalnızca
+    # sahibi yazdığı için sabit ad güvenlidir (yeniden teslimde üzerine yazılır)
+    return os.path.join(Config.PROCESSED_FOLDER, f'final_{job_hash}.tmp.mp4')
+
+def get_result(redis_client, job_hash):
+    """Tamamlanmış işin sonucunu döndür (çıktı dosyası yoksa None)"""
+    result_str = redis_client.get(_result_key(job_hash))
+    if not result_str:
+        return None
+        
+    result = json.loads(result_str)
+    if not os.path.exists(result['output_path']):
+        redis_client.delete(_result_key(job_hash))
+        return None
+    return result
+
+def save_result(redis_client, job_hash, result):
+    redis_client.setex(
+        _result_key(job_hash),
+        Config.RESULT_TTL,
+        json.dumps(result)
+    )
+
+def get_owner(redis_client, job_hash):
+    """İşi çalıştıran görevin kimliği (çalışmıyorsa None)"""
+    owner = redis_client.get(_job_key(job_hash))
+    return owner.decode() if isinstance(owner, bytes) else owner
+
+def claim(redis_client, job_hash, task_id, video_id=None):
+    """İşi bu görev adına sahiplen
+    
+    (True, task_id) sahiplenildiyse ya da zaten bu görevindeyse (yeniden
+    teslim); (False, sahip_task_id) aynı iş başka bir görevde çalışıyorsa.
+    video_id verilirse video sonucu bekleyenlere eklenir (toplu işlerde
+    sonuç videonun indirme kaydına bağlanmaz).
+    """
+    if video_id:
+        attach(redis_client, job_hash, video_id)
+    
+    if redis_client.set(_job_key(job_hash), task_id, nx=True, ex=Config.FINALIZE_JOB_TTL):
+        return True, task_id
+        
+    owner = get_owner(redis_client, job_hash)
+    if owner is None:
+        # Sahip tam bu arada bitirdi, tekrar dene
+        return claim(redis_client, job_hash, task_id, video_id)
+    return owner == task_id, owner
+
+def attach(redis_client, job_hash, video_id):
+    """Videoyu işin sonucunu bekleyenlere ekle"""
+    pipe = redis_client.pipeline()
+    pipe.sadd(_videos_key(job_hash), video_id)
+    pipe.expire(_videos_key(job_hash), Config.FINALIZE_JOB_TTL)
+    pipe.execute()
+
+def release(redis_client, job_hash, task_id):
+    """İş bittiğinde sahipliği bırak, sonucu bekleyen videoları döndür
+
+    Sonuç release'den önce kaydedilir; bu sayede sonradan gelen istekler ya
+    bekleyenler listesindedir ya da kayıtlı sonucu bulur.
+    """
+    if get_owner(redis_client, job_hash) != task_id:
+        return []
+    
+    pipe = redis_client.pipeline()
+    pipe.smembers(_videos_key(job_hash))
+    pipe.delete(_job_key(job_hash), _videos_key(job_hash))
+    video_ids, _ = pipe.execute()
+    return [
+        video_id.decode() if isinstance(video_id, bytes) else video_id
+        for video_id in video_ids
+    ]
+
+def link_result(redis_client, video_id, job_hash, result):
+    """Videonun indirme kaydını tamamlanmış iş çıktısına bağla"""
+    redis_client.setex(
+        f'video_result:{video_id}',
+        Config.RESULT_TTL,
+        json.dumps(dict(result, video_id=video_id, job_hash=job_hash))
+    )
+
+def touch_result(redis_client, job_hash):
+    """İndirilen sonucun kaydını çıktı dosyasıyla birlikte uzat"""
+    redis_client.expire(_result_key(job_hash), Config.RESULT_TTL)
+
+def mark_batch_task(redis_client, task_id):
+    """Görevi toplu finalize görevi olarak işaretle (varyant işlerinin sahibi)"""
+    redis_client.setex(_batch_task_key(task_id), Config.FINALIZE_JOB_TTL, 1)
+
+def is_batch_task(redis_client, task_id):
+    return bool(redis_client.exists(_batch_task_key(task_id)))
+
+def clear_batch_task(redis_client, task_id):
+    redis_client.delete(_batch_task_key(task_id))
+
+def is_attached(redis_client, job_hash, video_id):
+    return bool(redis_client.sismember(_videos_key(job_hash), video_id))
+
+def detach(redis_client, job_hash, video_id):
+    """Videoyu işin sonucunu bekleyenlerden çıkar, kalan bekleyen sayısını döndür"""
+    pipe = redis_client.pipeline()
+    pipe.srem(_videos_key(job_hash), video_id)
+    pipe.scard(_videos_key(job_hash))
+    _, remaining = pipe.execute()
+    return remaining
+
+class FinalizeCancelled(Exception):
+    """Finalize işi kullanıcı isteğiyle ya da yeni bir işle iptal edildi"""
+
+def request_cancel(redis_client, task_id):
+    """Görevin iptal bayrağını ayarla (çalışan görev CancelWatcher ile görür)"""
+    redis_client.setex(_cancel_key(task_id), Config.FINALIZE_JOB_TTL, 1)
+
+def is_cancelled(redis_client, task_id):
+    return bool(redis_client.exists(_cancel_key(task_id)))
+
+def clear_cancel(redis_client, task_id):
+    redis_client.delete(_cancel_key(task_id))
+
+def get_current(redis_client, video_id):
+    """Videonun en son istenen finalize işi ({'task_id', 'job_hash'} ya da None)"""
+    current_str = redis_client.get(_current_key(video_id))
+    return json.loads(current_str) if current_str else None
+
+def set_current(redis_client, video_id, task_id, job_hash):
+    redis_client.setex(
+        _current_key(video_id),
+        Config.FINALIZE_JOB_TTL,
+        json.dumps({'task_id': task_id, 'job_hash': job_hash})
+    )
+
+def clear_current(redis_client, video_id, task_id=None):
+    """Güncel iş kaydını sil (task_id verilirse yalnızca hâlâ o görevse)"""
+    current = get_current(redis_client, video_id)
+    if current and (task_id is None or current['task_id'] == task_id):
+        redis_client.delete(_current_key(video_id))
+
+class CancelWatcher:
+    """Görevin iptal bayrağını arka planda yoklar ve cancel_event'i tetikler
+    
+    run_ffmpeg cancel_event ayarlandığında çalışan ffmpeg sürecini
+    sonlandırır; böylece iptal, render'ın ortasında da birkaç yüz
+    milisaniyede etkili olur.
+    
+    with CancelWatcher(redis_client, task_id) as cancel_event:
+        ...
+    """
+    def __init__(self, redis_client, task_id, interval=None):
+        self.redis_client = redis_client
+        self.task_id = task_id
+        self.interval = interval or Config.CANCEL_POLL_INTERVAL
+        self.cancel_event = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+    
+    def _watch(self):
+        while not self._stop.wait(self.interval):
+            try:
+                if is_cancelled(self.redis_client, self.task_id):
+                    logger.info(f"İptal isteği alındı: {self.task_id}")
+                    self.cancel_event.set()
+                    return
+            except Exception as e:
+                logger.warning(f"İptal bayrağı okunamadı: {str(e)}")
+    
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._watch, daemon=True)
+        self._thread.start()
+        return self.cancel_event
+    
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+        return False
+
+class FinalizeCheckpoint:
+    """Finalize işinin tamamlanan aşama ve segmentlerinin Redis kaydı
+    
+    Her parça (ör. 'segment:3', 'chunk:1', 'render', 'output') yazıldığı anda yolu,
+    boyutu ve değişiklik zamanıyla kaydedilir; kayıt dosyayı yeniden
+    okumaz. Worker kaybında görev yeniden teslim edildiğinde doğrulanan
+    parçalar tekrar üretilmez, iş ilk eksik parçadan devam eder. Kaydı
+    olmayan dosya yarım sayılır ve yeniden üretilir.
+    """
+    
+    STATS_KEY = 'finalize_checkpoint:stats'
+    
+    def __init__(self, redis_client, job_hash):
+        self.redis_client = redis_client
+        self.key = _checkpoint_key(job_hash)
+    
+    def record(self, name, path, **extra):
+        """Tamamlanan parçayı kaydet"""
+        stat = os.stat(path)
+        entry = dict(extra, path=path, size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+        pipe = self.redis_client.pipeline()
+        pipe.hset(self.key, name, json.dumps(entry))
+        pipe.expire(self.key, Config.FINALIZE_CHECKPOINT_TTL)
+        pipe.execute()
+        return entry
+    
+    def verified(self, name):
+        """Kayıtlı parça diskte değişmeden duruyorsa kaydını döndür
+        
+        Yalnızca boyut ve değişiklik zamanı karşılaştırılır, dosya okunmaz.
+        Kayıt ancak parça tamamen yazıldıktan sonra yapıldığından yarım
+        dosyanın kaydı olmaz; sonradan kesilen ya da üzerine yazılan dosya
+        boyut/zaman farkından yakalanır. İçerik özeti bilerek tutulmaz:
+        her parçayı bir kez daha okumak, yeniden üretmenin maliyetine yaklaşır.
+        """
+        entry_str = self.redis_client.hget(self.key, name)
+        if not entry_str:
+            return None
+            
+        entry = json.loads(entry_str)
+        path = entry['path']
+        stat = os.stat(path) if os.path.exists(path) else None
+        if not stat or stat.st_size != entry['size'] or stat.st_mtime_ns != entry['mtime_ns']:
+            logger.warning(f"Checkpoint parçası doğrulanamadı, yeniden üretilecek: {name}")
+            self.redis_client.hdel(self.key, name)
+            self.redis_client.hincrby(self.STATS_KEY, 'invalid', 1)
+            return None
+            
+        self.redis_client.hincrby(self.STATS_KEY, 'reused', 1)
+        return entry
+    
+    def has_segments(self):
+        """Önceki deneme segment yolunda ilerlemiş mi"""
+        return any(
+            (name.decode() if isinstance(name, bytes) else name).startswith('segment:')
+            for name in self.redis_client.hkeys(self.key)
+        )
+    
+    def exists(self):
+        return bool(self.redis_client.exists(self.key))
+    
+    def clear(self):
+        self.redis_client.delete(self.key)
+    
+    @classmethod
+    def stats(cls, redis_client):
+        raw = redis_client.hgetall(cls.STATS_KEY)
+        stats = {
+            (k.decode() if isinstance(k, bytes) else k): int(v)
+            for k, v in raw.items()
+        }
+        for field in ('reused', 'invalid'):
+            stats.setdefault(field, 0)
+        return stats
+
+def get_batch(redis_client, batch_id):
+    batch_str = redis_client.get(_batch_key(batch_id))
+    return json.loads(batch_str) if batch_str else None
+
+def save_batch(redis_client, batch):
+    redis_client.setex(
+        _batch_key(batch['batch_id']),
+        Config.RESULT_TTL,
+        json.dumps(batch)
+    )
+
+def update_batch_variant(redis_client, batch_id, name, **fields):
+    """Toplu işteki tek varyantın durumunu güncelle"""
+    batch = get_batch(redis_client, batch_id)
+    if not batch:
+        return None
+        
+    for variant in batch['variants']:
+        if variant['name'] == name:
+            variant.update(fields)
+    save_batch(redis_client, batch)
+    return batch
+
+def plan_variants(content_key, probe, video_duration, requested):
+    """Toplu finalize isteğindeki varyantları doğrula ve render yolunu seç
+    
+    Kaynak çözünürlükte kopyalanabilen varyantlar tekli finalize ile aynı
+    işe (aynı özete) karşılık gelir ve çözme yapılmadan üretilir. Yeniden
+    kodlanması gerekenler (profil ya da codec nedeniyle) 'shared' olarak
+    işaretlenir ve ortak çözme geçişinde render edilir. Geçersiz istekte ve
+    aynı çıktıyı (aynı özeti) üreten iki varyantta ValueError fırlatır.
+    """
+    if not requested:
+        raise ValueError('En az bir varyant gerekli')
+    if len(requested) > Config.BATCH_MAX_VARIANTS:
+        raise ValueError(f'En fazla {Config.BATCH_MAX_VARIANTS} varyant istenebilir')
+        
+    variants = []
+    names = set()
+    # Aynı özet aynı geçici/nihai dosyaya yazılır; tekrarı render edilemez
+    job_hashes = {}
+    reencode = Config.FINALIZE_REENCODE and Config.FINALIZE_MODE == 'single_pass'
+    
+    for i, item in enumerate(requested):
+        name = str(item.get('name') or f'variant_{i + 1}')
+        profile = item.get('profile') or 'source'
+        
+        if not re.fullmatch(r'[\w-]{1,64}', name):
+            raise ValueError(f'Geçersiz varyant adı: {name}')
+        if name in names:
+            raise ValueError(f'Varyant adı tekrarlanıyor: {name}')
+        if profile not in Config.OUTPUT_PROFILES:
+            raise ValueError(f'Bilinmeyen çıktı profili: {profile}')
+        names.add(name)
+        
+        valid_cuts = validate_cuts(item.get('cuts') or [], video_duration)
+        if not valid_cuts:
+            raise ValueError(f'Geçerli kesim bulunamadı: {name}')
+            
+        output_duration = sum(cut['end_seconds'] - cut['start_seconds'] for cut in valid_cuts)
+        plan = plan_render(probe, output_duration, reencode=reencode)
+        shared = profile != 'source' or plan['strategy'] == 'transcode'
+        job_hash = make_job_hash(content_key, valid_cuts, profile if shared else None)
+        if job_hash in job_hashes:
+            raise ValueError(f'Varyant tekrarlanıyor: {name} ile {job_hashes[job_hash]} aynı çıktıyı üretir')
+        job_hashes[job_hash] = name
+        
+        variants.append({
+            'name': name,
+            'profile': profile,
+            'cuts': valid_cuts,
+            'duration': output_duration,
+            'shared': shared,
+            'job_hash': job_hash,
+            'status': 'queued',
+            'message': 'Sırada bekliyor...'
+        })
+        
+    return variants
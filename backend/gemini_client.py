@@ -1,24 +1,91 @@
 import os
 import base64
 import json
+import time
 import logging
+import mimetypes
 from google import genai
 from google.genai import types
 from config import Config
 from logging_config import LoggerMixin, log_execution_time
+from gemini_files import GeminiFileStore, GeminiFileError
 
 logger = logging.getLogger(__name__)
 
 class GeminiClient(LoggerMixin):
-    def __init__(self):
+    def __init__(self, redis_client=None):
         self.log_info("Initializing Gemini client...")
-        self.client = genai.Client(api_key=Config.GEMINI_API_KEY)
+        self.client = genai.Client(
+            api_key=Config.GEMINI_API_KEY,
+            http_options={'base_url': Config.GEMINI_API_BASE_URL}
+        )
+        self.file_store = GeminiFileStore(Config.GEMINI_API_KEY, redis_client)
         self.model = "gemini-2.5-flash"
         self.system_prompt = """Sen, 'Klip Asistanı' adında uzman bir video editörüsün..."""
         self.log_info(f"✅ Gemini client initialized with model: {self.model}")
     
+    def _get_video_part(self, video_path, cache_key, mime_type):
+        """Video içeriğini isteğe eklenecek Part olarak hazırla"""
+        if not mime_type:
+            # Probe sonucu yoksa uzantıdan tahmin et
+            mime_type = mimetypes.guess_type(video_path)[0] or 'video/mp4'
+        
+        if Config.GEMINI_VIDEO_MODE == 'upload':
+            # Video bir kez yüklenir, sonraki istekler yalnızca URI gönderir
+            try:
+                file_info = self.file_store.get_or_upload(video_path, cache_key, mime_type)
+                return types.Part.from_uri(
+                    file_uri=file_info['uri'],
+                    mime_type=file_info['mime_type']
+                )
+            except (GeminiFileError, OSError) as e:
+                # Küçük videolar istekle birlikte gönderilebilir; büyükleri belleğe alınmaz
+                if os.path.getsize(video_path) > Config.GEMINI_INLINE_MAX_BYTES:
+                    raise
+                self.log_warning(f"⚠️ Gemini file upload failed, falling back to inline video: {str(e)}")
+        
+        self.log_debug("Reading video file for inline request...")
+        with open(video_path, "rb") as video_file:
+            video_bytes = video_file.read()
+        
+        return types.Part.from_bytes(mime_type=mime_type, data=video_bytes)
+    
+    def _generate(self, contents):
+        """İsteği gönder, yanıtı parse et ve tur ölçümlerini ekle"""
+        self.log_info("📤 Sending request to Gemini API...")
+        started_at = time.time()
+        
+        # API'ye isteği gönder ve yanıtı al
+        response = self.client.models.generate_content(
+            model=self.model,
+            contents=contents,
+            config=types.GenerateContentConfig(system_instruction=self.system_prompt)
+        )
+        latency = time.time() - started_at
+        
+        self.log_info("📥 Received response from Gemini API")
+        self.log_debug(f"Raw response: {response.text[:200]}...")
+        
+        # Yanıtı parse et ve doğrula
+        parsed_response = self._parse_response(response.text)
+        
+        # Tur başına token ve gecikme ölçümleri
+        usage = getattr(response, 'usage_metadata', None)
+        parsed_response['usage'] = {
+            'latency': round(latency, 3),
+            'prompt_tokens': getattr(usage, 'prompt_token_count', None),
+            'response_tokens': getattr(usage, 'candidates_token_count', None),
+            'total_tokens': getattr(usage, 'total_token_count', None)
+        }
+        logging.getLogger('performance').info(
+            f"gemini.generate_content {parsed_response['usage']}",
+            extra={'duration': latency}
+        )
+        
+        return parsed_response, response.text
+    
     @log_execution_time()
-    def start_conversation(self, video_path, user_prompt):
+    def start_conversation(self, video_path, user_prompt, cache_key=None, mime_type=None):
         """Yeni bir konuşma başlat"""
         self.log_info(f"Starting new conversation for video: {video_path}")
         self.log_debug(f"User prompt: {user_prompt}")
@@ -28,38 +95,12 @@ class GeminiClient(LoggerMixin):
             video_size = os.path.getsize(video_path)
             self.log_debug(f"Video size: {video_size} bytes")
             
-            # Videoyu oku ve base64'e çevir
-            self.log_debug("Reading video file...")
-            with open(video_path, "rb") as video_file:
-                video_bytes = video_file.read()
-            
-            self.log_debug(f"Video read successfully, encoding to base64...")
+            video_part = self._get_video_part(video_path, cache_key or video_path, mime_type)
             
             # Gemini'ye gönderilecek içeriği oluştur
-            contents = [
-                types.Part.from_text(self.system_prompt),
-                types.Content(
-                    role="user",
-                    parts=[
-                        types.Part.from_bytes(
-                            mime_type="video/mp4",
-                            data=video_bytes
-                        ),
-                        types.Part.from_text(text=user_prompt),
-                    ],
-                ),
-            ]
-            
-            self.log_info("📤 Sending request to Gemini API...")
-            
-            # API'ye isteği gönder ve yanıtı al
-            response = self.client.generate_content(model=self.model, contents=contents)
-            
-            self.log_info("📥 Received response from Gemini API")
-            self.log_debug(f"Raw response: {response.text[:200]}...")
-            
-            # Yanıtı parse et ve doğrula
-            parsed_response = self._parse_response(response.text)
+            contents = self._build_contents(video_part, [], user_prompt)
+            
+            parsed_response, raw_response = self._generate(contents)
             
             self.log_info(
                 f"✅ Conversation started successfully",
@@ -69,7 +110,7 @@ class GeminiClient(LoggerMixin):
                 }
             )
             
-            return parsed_response, contents, response.text
+            return parsed_response, contents, raw_response
             
         except Exception as e:
             self.log_error(f"❌ Gemini API error: {str(e)}", exc_info=True)
@@ -78,6 +119,97 @@ class GeminiClient(LoggerMixin):
                 "message": "Üzgünüm, video analizinde bir hata oluştu. Lütfen tekrar deneyin."
             }, None, None
     
+    @log_execution_time()
+    def continue_conversation(self, video_path, turns, user_prompt, cache_key=None, mime_type=None):
+        """Mevcut konuşmaya devam et
+        
+        turns: ConversationStore metin turları. Video yeniden gönderilmez,
+        önbellekteki dosya tanıtıcısı kullanılır; geçmiş token bütçesine sığacak
+        şekilde kırpılır, eski turlar kısa bir özete indirgenir.
+        """
+        self.log_info(f"Continuing conversation for video: {video_path} ({len(turns)} turns)")
+        self.log_debug(f"User prompt: {user_prompt}")
+        
+        try:
+            video_part = self._get_video_part(video_path, cache_key or video_path, mime_type)
+            
+            contents = self._build_contents(video_part, turns, user_prompt)
+            
+            parsed_response, raw_response = self._generate(contents)
+            
+            self.log_info(
+                f"✅ Conversation continued successfully",
+                extra={'cuts_count': len(parsed_response.get('cuts', []))}
+            )
+            
+            return parsed_response, contents, raw_response
+            
+        except Exception as e:
+            self.log_error(f"❌ Gemini API error: {str(e)}", exc_info=True)
+            return {
+                "cuts": [],
+                "message": "Üzgünüm, yanıt alınırken bir hata oluştu. Lütfen tekrar deneyin."
+            }, None, None
+    
+    @staticmethod
+    def _estimate_tokens(turn):
+        """Turun token sayısını tahmin et (ölçülmüşse onu kullan)"""
+        return turn.get('tokens') or len(turn['text']) // 4 + 1
+    
+    def _build_contents(self, video_part, turns, user_prompt):
+        """Metin turlarından sağlayıcı isteğini oluştur
+        
+        İlk kullanıcı turu videoyla birlikte her zaman korunur. Sonraki
+        (kullanıcı, model) çiftlerinden en yenileri CHAT_HISTORY_TOKEN_BUDGET'a
+        sığdığı kadar eklenir; sığmayanların model mesajları özetlenir.
+        """
+        first_parts = [video_part]
+        pairs = [turns[i:i + 2] for i in range(0, len(turns) - 1, 2)]
+        
+        if not pairs:
+            first_parts.append(types.Part.from_text(text=user_prompt))
+            return [types.Content(role="user", parts=first_parts)]
+        
+        first_pair, later_pairs = pairs[0], pairs[1:]
+        
+        budget = Config.CHAT_HISTORY_TOKEN_BUDGET - sum(
+            self._estimate_tokens(turn) for turn in first_pair
+        )
+        kept = []
+        for pair in reversed(later_pairs):
+            cost = sum(self._estimate_tokens(turn) for turn in pair)
+            if cost > budget:
+                break
+            kept.insert(0, pair)
+            budget -= cost
+        dropped = later_pairs[:len(later_pairs) - len(kept)]
+        
+        first_parts.append(types.Part.from_text(text=first_pair[0]['text']))
+        if dropped:
+            self.log_debug(f"Summarizing {len(dropped)} older turns to fit token budget")
+            first_parts.append(types.Part.from_text(text=self._summarize_pairs(dropped)))
+        
+        contents = [
+            types.Content(role="user", parts=first_parts),
+            types.Content(role="model", parts=[types.Part.from_text(text=first_pair[1]['text'])])
+        ]
+        for user_turn, model_turn in kept:
+            contents.append(types.Content(role="user", parts=[types.Part.from_text(text=user_turn['text'])]))
+            contents.append(types.Content(role="model", parts=[types.Part.from_text(text=model_turn['text'])]))
+        
+        contents.append(types.Content(role="user", parts=[types.Part.from_text(text=user_prompt)]))
+        return contents
+    
+    def _summarize_pairs(self, pairs):
+        """Bütçeye sığmayan turları kısa bir metin özetine indirge"""
+        lines = []
+        for user_turn, model_turn in pairs:
+            message = self._parse_response(model_turn['text']).get('message', '')
+            lines.append(f"- Kullanıcı: {user_turn['text'][:200]} / Asistan: {message[:300]}")
+        
+        summary = "Önceki konuşmanın özeti:\n" + "\n".join(lines)
+        return summary[:Config.CHAT_SUMMARY_MAX_CHARS]
+    
     def _parse_response(self, response_text):
         """Gemini yanıtını parse et ve doğrula"""
         self.log_debug("Parsing Gemini response...")
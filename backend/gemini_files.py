@@ -0,0 +1,212 @@
+import os
+import json
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime, timezone
+from config import Config
+from logging_config import LoggerMixin
+
+class GeminiFileError(Exception):
+    """Gemini dosya deposu hatası"""
+    pass
+
+class GeminiFileStore(LoggerMixin):
+    """Videoyu Gemini dosya deposuna bir kez yükleyip tanıtıcısını önbellekler
+    
+    Yükleme, Gemini'nin devam ettirilebilir yükleme protokolüyle diskteki
+    dosyadan parça parça yapılır; bellekte en fazla bir parça tutulur.
+    Bağlantı koparsa sağlayıcının aldığı bayt sayısı sorgulanıp kalan kısım
+    gönderilir. GEMINI_API_BASE_URL yerel bir sahte sunucuya yönlendirilerek
+    test edilebilir (bkz. tests/gemini_stub.py).
+    """
+    
+    def __init__(self, api_key, redis_client=None, base_url=None):
+        self.api_key = api_key
+        self.redis_client = redis_client
+        self.base_url = (base_url or Config.GEMINI_API_BASE_URL).rstrip('/')
+    
+    def get_or_upload(self, video_path, cache_key, mime_type):
+        """Önbellekteki dosya tanıtıcısını döndür, yoksa videoyu yükle"""
+        cached = self._get_cached(cache_key)
+        if cached:
+            self.log_debug(f"Gemini file cache hit: {cache_key} -> {cached['name']}")
+            return cached
+            
+        lock_key = f'gemini_file_lock:{cache_key}'
+        has_lock = self._acquire_lock(lock_key)
+        deadline = time.time() + Config.GEMINI_FILE_ACTIVE_TIMEOUT
+        
+        try:
+            while not has_lock and self.redis_client and time.time() < deadline:
+                # Aynı video başka bir süreçte yükleniyor, sonucunu bekle;
+                # lider sonuç yazmadan biterse yüklemeyi bu süreç üstlenir
+                cached = self._wait_for_cached(cache_key, lock_key, deadline)
+                if cached:
+                    return cached
+                has_lock = self._acquire_lock(lock_key)
+                
+            file_info = self._upload(video_path, mime_type)
+            file_info = self._wait_until_active(file_info)
+            self._set_cached(cache_key, file_info)
+            return file_info
+            
+        finally:
+            if has_lock:
+                self.redis_client.delete(lock_key)
+    
+    def _get_cached(self, cache_key):
+        if not self.redis_client:
+            return None
+            
+        cached_str = self.redis_client.get(f'gemini_file:{cache_key}')
+        return json.loads(cached_str) if cached_str else None
+    
+    def _set_cached(self, cache_key, file_info):
+        if not self.redis_client:
+            return
+            
+        # Sağlayıcı dosyayı silmeden önce önbellekten düşsün
+        ttl = int(file_info['expires_at'] - time.time() - Config.GEMINI_FILE_EXPIRY_MARGIN)
+        if ttl > 0:
+            self.redis_client.setex(
+                f'gemini_file:{cache_key}',
+                ttl,
+                json.dumps(file_info)
+            )
+    
+    def _acquire_lock(self, lock_key):
+        if not self.redis_client:
+            return False
+        return bool(self.redis_client.set(
+            lock_key, '1', nx=True, ex=Config.GEMINI_FILE_ACTIVE_TIMEOUT
+        ))
+    
+    def _wait_for_cached(self, cache_key, lock_key, deadline):
+        while time.time() < deadline:
+            cached = self._get_cached(cache_key)
+            if cached:
+                return cached
+            if not self.redis_client.exists(lock_key):
+                # Lider önbelleğe yazmadan bitti (yükleme hatası vb.)
+                return self._get_cached(cache_key)
+            time.sleep(Config.GEMINI_FILE_POLL_INTERVAL)
+        return None
+    
+    def _request(self, url, data=None, headers=None, method='GET'):
+        request_headers = {'x-goog-api-key': self.api_key}
+        request_headers.update(headers or {})
+        
+        request = urllib.request.Request(url, data=data, headers=request_headers, method=method)
+        with urllib.request.urlopen(request, timeout=Config.GEMINI_HTTP_TIMEOUT) as response:
+            return response.headers, response.read()
+    
+    def _upload(self, video_path, mime_type):
+        """Videoyu devam ettirilebilir yükleme protokolüyle parça parça gönder"""
+        size = os.path.getsize(video_path)
+        self.log_info(f"📤 Uploading video to Gemini file store: {video_path} ({size} bytes)")
+        
+        headers, _ = self._request(
+            f'{self.base_url}/upload/v1beta/files',
+            data=json.dumps({'file': {'display_name': os.path.basename(video_path)}}).encode(),
+            headers={
+                'X-Goog-Upload-Protocol': 'resumable',
+                'X-Goog-Upload-Command': 'start',
+                'X-Goog-Upload-Header-Content-Length': str(size),
+                'X-Goog-Upload-Header-Content-Type': mime_type,
+                'Content-Type': 'application/json'
+            },
+            method='POST'
+        )
+        
+        upload_url = headers.get('X-Goog-Upload-URL')
+        if not upload_url:
+            raise GeminiFileError('Upload URL not returned')
+            
+        offset = 0
+        body = b''
+        retries = 0
+        with open(video_path, 'rb') as f:
+            while offset < size:
+                f.seek(offset)
+                chunk = f.read(Config.GEMINI_UPLOAD_CHUNK_SIZE)
+                is_last = offset + len(chunk) >= size
+                try:
+                    _, body = self._request(
+                        upload_url,
+                        data=chunk,
+                        headers={
+                            'X-Goog-Upload-Command': 'upload, finalize' if is_last else 'upload',
+                            'X-Goog-Upload-Offset': str(offset)
+                        },
+                        method='POST'
+                    )
+                    offset += len(chunk)
+                    
+                except OSError as e:
+                    # 4xx kalıcı hatadır; bağlantı hatası ve 5xx'te kalınan yerden devam et
+                    if isinstance(e, urllib.error.HTTPError) and e.code < 500:
+                        raise GeminiFileError(f'Upload rejected at offset {offset}: {e}')
+                    retries += 1
+                    if retries > Config.GEMINI_UPLOAD_RETRIES:
+                        raise GeminiFileError(f'Upload failed at offset {offset}: {e}')
+                        
+                    status, offset, body = self._query_upload(upload_url)
+                    if status == 'final':
+                        # Son parça ulaşmış, yalnızca yanıt kaybolmuş
+                        break
+                    self.log_warning(f"⚠️ Gemini upload interrupted, resuming at offset {offset}: {e}")
+                
+        file_data = json.loads(body).get('file')
+        if not file_data:
+            raise GeminiFileError('Upload finalize response has no file')
+            
+        return self._to_file_info(file_data, mime_type)
+    
+    def _query_upload(self, upload_url):
+        """Yarıda kalan yüklemenin durumunu ve sağlayıcının aldığı bayt sayısını sor"""
+        headers, body = self._request(
+            upload_url,
+            data=b'',
+            headers={'X-Goog-Upload-Command': 'query'},
+            method='POST'
+        )
+        received = int(headers.get('X-Goog-Upload-Size-Received') or 0)
+        return headers.get('X-Goog-Upload-Status'), received, body
+    
+    def _wait_until_active(self, file_info):
+        """Sağlayıcı videoyu işleyene kadar bekle"""
+        deadline = time.time() + Config.GEMINI_FILE_ACTIVE_TIMEOUT
+        
+        while file_info['state'] == 'PROCESSING':
+            if time.time() > deadline:
+                raise GeminiFileError(f"File not active in time: {file_info['name']}")
+            time.sleep(Config.GEMINI_FILE_POLL_INTERVAL)
+            _, body = self._request(f"{self.base_url}/v1beta/{file_info['name']}")
+            file_info = self._to_file_info(json.loads(body), file_info['mime_type'])
+            
+        if file_info['state'] != 'ACTIVE':
+            raise GeminiFileError(f"File processing failed: {file_info['name']} ({file_info['state']})")
+            
+        self.log_info(f"✅ Gemini file ready: {file_info['name']}")
+        return file_info
+    
+    def _to_file_info(self, file_data, mime_type):
+        return {
+            'name': file_data['name'],
+            'uri': file_data['uri'],
+            'mime_type': file_data.get('mimeType', mime_type),
+            'state': file_data.get('state', 'ACTIVE'),
+            'expires_at': self._parse_expiry(file_data.get('expirationTime'))
+        }
+    
+    @staticmethod
+    def _parse_expiry(value):
+        """RFC 3339 bitiş zamanını epoch saniyesine çevir"""
+        try:
+            # strptime nanosaniyeyi desteklemez, kesirli kısım ayrıca eklenir
+            date_part, _, fraction = value.rstrip('Z').partition('.')
+            parsed = datetime.strptime(date_part, '%Y-%m-%dT%H:%M:%S')
+            return parsed.replace(tzinfo=timezone.utc).timestamp() + float(f'0.{fraction or 0}')
+        except Exception:
+            return time.time() + Config.GEMINI_FILE_DEFAULT_TTL
@@ -216,7 +216,9 @@ def log_api_request(request, response=None, duration=None):
     if request.method in ['POST', 'PUT', 'PATCH']:
         if request.is_json:
             log_data['body'] = request.get_json()
-        elif request.form:
+        elif 'form' in request.__dict__ and request.form:
+            # Yalnızca zaten ayrıştırılmış form loglanır; reddedilen
+            # yüklemenin gövdesi burada okunmaz
             log_data['form'] = dict(request.form)
             
     if response:
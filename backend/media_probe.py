@@ -0,0 +1,145 @@
+import json
+import logging
+import ffmpeg_governor
+
+logger = logging.getLogger(__name__)
+
+# Gemini'nin kabul ettiği video MIME türleri
+_MIME_BY_FORMAT = {
+    'avi': 'video/avi',
+    'flv': 'video/x-flv',
+    'mpeg': 'video/mpeg',
+    'mpegts': 'video/mpeg',
+    'asf': 'video/wmv',
+}
+
+def _parse_rate(value):
+    """'30000/1001' biçimindeki kare hızını sayıya çevir"""
+    try:
+        num, _, den = (value or '').partition('/')
+        num, den = float(num), float(den or 1)
+        return round(num / den, 3) if num and den else None
+    except ValueError:
+        return None
+
+def _to_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+def _rotation(stream):
+    """Görüntü döndürme açısı (etiket ya da display matrix yan verisinden)"""
+    rotate = _to_int(stream.get('tags', {}).get('rotate'))
+    if rotate is not None:
+        return rotate % 360
+        
+    for side_data in stream.get('side_data_list', []):
+        if 'rotation' in side_data:
+            return int(-float(side_data['rotation'])) % 360
+    return 0
+
+def _mime_type(format_name, major_brand, video_codec, audio_codec):
+    names = format_name.split(',')
+    
+    if 'matroska' in names:
+        # webm yalnızca VP8/VP9/AV1 + Opus/Vorbis içerebilir
+        if video_codec in ('vp8', 'vp9', 'av1') and audio_codec in (None, 'opus', 'vorbis'):
+            return 'video/webm'
+        return 'video/x-matroska'
+        
+    if 'mov' in names:
+        return 'video/mov' if (major_brand or '').strip() == 'qt' else 'video/mp4'
+        
+    for name in names:
+        if name in _MIME_BY_FORMAT:
+            return _MIME_BY_FORMAT[name]
+    return 'video/mp4'
+
+def probe_media(video_path):
+    """Tek bir ffprobe çağrısıyla kapsayıcı ve akış bilgilerini çıkar
+    
+    Redis'te saklanacak kadar küçük bir sözlük döner; hata durumunda None.
+    keyframe_interval keyframe indeksinden sonradan eklenir
+    (bkz. keyframe_interval).
+    """
+    try:
+        cmd = [
+            'ffprobe',
+            '-v', 'error',
+            '-print_format', 'json',
+            '-show_format',
+            '-show_streams',
+            video_path
+        ]
+        result = ffmpeg_governor.run_capture(cmd)
+        
+        if result.returncode != 0:
+            logger.error(f"ffprobe hatası: {result.stderr}")
+            return None
+            
+        data = json.loads(result.stdout)
+        fmt = data.get('format', {})
+        streams = data.get('streams', [])
+        
+        video_stream = next((s for s in streams if s.get('codec_type') == 'video'
+                             and not s.get('disposition', {}).get('attached_pic')), None)
+        audio_stream = next((s for s in streams if s.get('codec_type') == 'audio'), None)
+        
+        video = None
+        if video_stream:
+            video = {
+                'codec': video_stream.get('codec_name'),
+                'profile': video_stream.get('profile'),
+                'level': _to_int(video_stream.get('level')),
+                'refs': _to_int(video_stream.get('refs')),
+                'pix_fmt': video_stream.get('pix_fmt'),
+                'width': video_stream.get('width'),
+                'height': video_stream.get('height'),
+                'fps': _parse_rate(video_stream.get('avg_frame_rate'))
+                       or _parse_rate(video_stream.get('r_frame_rate')),
+                'bit_rate': _to_int(video_stream.get('bit_rate')),
+                'rotation': _rotation(video_stream)
+            }
+            
+        audio = None
+        if audio_stream:
+            audio = {
+                'codec': audio_stream.get('codec_name'),
+                'channels': audio_stream.get('channels'),
+                'sample_rate': _to_int(audio_stream.get('sample_rate')),
+                'bit_rate': _to_int(audio_stream.get('bit_rate'))
+            }
+            
+        format_name = fmt.get('format_name', '')
+        
+        return {
+            'container': format_name,
+            'mime_type': _mime_type(
+                format_name,
+                fmt.get('tags', {}).get('major_brand'),
+                video['codec'] if video else None,
+                audio['codec'] if audio else None
+            ),
+            'duration': float(fmt.get('duration') or 0),
+            'size': _to_int(fmt.get('size')),
+            'bit_rate': _to_int(fmt.get('bit_rate')),
+            'video': video,
+            'audio': audio,
+            'streams': [
+                {'index': s.get('index'), 'type': s.get('codec_type'), 'codec': s.get('codec_name')}
+                for s in streams
+            ],
+            'keyframe_interval': None
+        }
+        
+    except Exception as e:
+        logger.error(f"Medya analizi hatası: {str(e)}")
+        return None
+
+def keyframe_interval(keyframe_times):
+    """Keyframe'ler arası ortanca süre (saniye)"""
+    gaps = sorted(b - a for a, b in zip(keyframe_times, keyframe_times[1:]) if b > a)
+    if not gaps:
+        return None
+    return round(gaps[len(gaps) // 2], 3)
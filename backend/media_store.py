@@ -0,0 +1,145 @@
+import os
+import json
+import hashlib
+import logging
+from config import Config
+from artifacts import ArtifactRegistry
+
+logger = logging.getLogger(__name__)
+
+def _blob_key(content_hash):
+    return f'media_blob:{content_hash}'
+
+def save_stream_hashed(stream, dest_path):
+    """Akışı diske yazarken SHA-256 özetini hesapla, (hash, boyut) döndür"""
+    hasher = hashlib.sha256()
+    size = 0
+    
+    with open(dest_path, 'wb') as f:
+        while True:
+            data = stream.read(Config.UPLOAD_READ_SIZE)
+            if not data:
+                break
+            hasher.update(data)
+            f.write(data)
+            size += len(data)
+            
+    return hasher.hexdigest(), size
+
+def hash_file(path):
+    """Diskteki dosyanın SHA-256 özetini hesapla"""
+    hasher = hashlib.sha256()
+    
+    with open(path, 'rb') as f:
+        while True:
+            data = f.read(Config.UPLOAD_READ_SIZE)
+            if not data:
+                break
+            hasher.update(data)
+            
+    return hasher.hexdigest()
+
+def get_blob(redis_client, content_hash):
+    """İçerik özetine kayıtlı blob bilgilerini al"""
+    blob_str = redis_client.get(_blob_key(content_hash))
+    if not blob_str:
+        return None
+        
+    blob = json.loads(blob_str)
+    if not os.path.exists(blob['path']):
+        return None
+        
+    return blob
+
+def _save_blob(redis_client, content_hash, blob):
+    redis_client.setex(
+        _blob_key(content_hash),
+        Config.BLOB_TTL,
+        json.dumps(blob)
+    )
+
+def store_blob(redis_client, temp_path, content_hash, ext):
+    """Yüklenen dosyayı içerik özetiyle sakla, aynı içerik varsa onu kullan
+    
+    (blob_path, blob) döner; blob önceki yüklemeden kalan önbellek alanlarını
+    (süre, keyframe indeksi vb.) içerebilir.
+    """
+    blob = get_blob(redis_client, content_hash) if redis_client else None
+    blob_path = blob['path'] if blob else os.path.join(
+        Config.UPLOAD_FOLDER, f"{content_hash}.{ext}"
+    )
+    
+    if os.path.exists(blob_path):
+        # Aynı içerik zaten var: yeni kopyayı at, mevcut dosyanın ömrünü uzat
+        os.remove(temp_path)
+        os.utime(blob_path)
+        logger.info(f"Aynı içerik bulundu, mevcut blob kullanılıyor: {content_hash}")
+    else:
+        os.replace(temp_path, blob_path)
+        logger.info(f"Yeni blob kaydedildi: {blob_path}")
+        
+    blob = blob or {'path': blob_path, 'content_hash': content_hash}
+    
+    if redis_client:
+        _save_blob(redis_client, content_hash, blob)
+        # Dosya blob kaydıyla aynı süre yaşar; geçici yol artık yok
+        registry = ArtifactRegistry(redis_client)
+        registry.forget(temp_path)
+        registry.register(blob_path, 'upload', Config.BLOB_TTL)
+        
+    return blob_path, blob
+
+def update_blob(redis_client, content_hash, **fields):
+    """Blob önbelleğine analiz sonuçlarını (süre, indeks vb.) ekle"""
+    blob = get_blob(redis_client, content_hash)
+    if not blob:
+        return
+        
+    blob.update(fields)
+    _save_blob(redis_client, content_hash, blob)
+
+def link_cached_video(redis_client, video_id, blob):
+    """Önceden işlenmiş blob için video bilgilerini yeniden hesaplamadan oluştur
+    
+    Blob önbelleği yoksa False döner ve normal işleme yapılmalıdır.
+    """
+    if 'duration' not in blob:
+        return False
+        
+    video_info = {
+        'id': video_id,
+        'path': blob['path'],
+        'duration': blob['duration'],
+        'content_hash': blob['content_hash'],
+        'analysis_proxy': blob.get('analysis_proxy'),
+        'status': 'ready'
+    }
+    
+    proxy = video_info['analysis_proxy']
+    if proxy and not os.path.exists(proxy['path']):
+        video_info['analysis_proxy'] = None
+    elif proxy:
+        ArtifactRegistry(redis_client).touch(proxy['path'], Config.BLOB_TTL)
+    
+    redis_client.setex(
+        f'video_info:{video_id}',
+        3600,  # 1 saat
+        json.dumps(video_info)
+    )
+    
+    if blob.get('probe'):
+        redis_client.setex(
+            f'video_probe:{video_id}',
+            3600,  # 1 saat
+            json.dumps(blob['probe'])
+        )
+    
+    if blob.get('keyframe_index'):
+        redis_client.setex(
+            f'video_keyframes:{video_id}',
+            3600,  # 1 saat
+            json.dumps(blob['keyframe_index'])
+        )
+        
+    logger.info(f"Video önbellekten hazırlandı: {video_id} -> {blob['content_hash']}")
+    return True
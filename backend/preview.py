@@ -0,0 +1,60 @@
+import os
+import math
+import json
+import hashlib
+from config import Config
+
+def make_preview_id(content_key, valid_cuts):
+    """Kesim listesi önizlemesi için kararlı kimlik"""
+    ranges = [[round(cut['start_seconds'], 3), round(cut['end_seconds'], 3)] for cut in valid_cuts]
+    return hashlib.sha256(json.dumps([content_key, ranges]).encode()).hexdigest()[:32]
+
+def plan_preview_segments(valid_cuts):
+    """Her kesimi PREVIEW_SEGMENT_SECONDS uzunluğunda HLS segmentlerine böl
+    
+    offset: segmentin önizleme zaman eksenindeki başlangıcı (kesimler art arda).
+    """
+    segments = []
+    offset = 0.0
+    
+    for cut in valid_cuts:
+        start = cut['start_seconds']
+        end = cut['end_seconds']
+        
+        while end - start > 0.001:
+            duration = min(Config.PREVIEW_SEGMENT_SECONDS, end - start)
+            segments.append({
+                'start': round(start, 3),
+                'duration': round(duration, 3),
+                'offset': round(offset, 3)
+            })
+            start += duration
+            offset += duration
+            
+    return segments
+
+def build_playlist(segments):
+    """Segment listesinden VOD HLS oynatma listesi oluştur"""
+    target_duration = math.ceil(max(segment['duration'] for segment in segments))
+    lines = [
+        '#EXTM3U',
+        '#EXT-X-VERSION:3',
+        '#EXT-X-PLAYLIST-TYPE:VOD',
+        f'#EXT-X-TARGETDURATION:{target_duration}',
+        '#EXT-X-MEDIA-SEQUENCE:0'
+    ]
+    
+    for i, segment in enumerate(segments):
+        lines.append(f"#EXTINF:{segment['duration']:.3f},")
+        lines.append(f'segment/{i}.ts')
+        
+    lines.append('#EXT-X-ENDLIST')
+    return '\n'.join(lines) + '\n'
+
+def segment_cache_path(content_key, segment):
+    """Aynı kaynak aralığı ve konum için üretilmiş segmentin önbellek yolu"""
+    key = hashlib.sha256(json.dumps([
+        content_key, segment['start'], segment['duration'], segment['offset'],
+        Config.PREVIEW_HEIGHT
+    ]).encode()).hexdigest()[:32]
+    return os.path.join(Config.PROCESSED_FOLDER, f'preview_{key}.ts')
@@ -0,0 +1,119 @@
+import logging
+from config import Config
+import ffmpeg_governor
+
+logger = logging.getLogger(__name__)
+
+# MP4 kapsayıcısına kopyalanabilen codec'ler
+MP4_VIDEO_CODECS = {'h264', 'hevc', 'mpeg4', 'av1'}
+MP4_AUDIO_CODECS = {'aac', 'mp3', 'ac3', 'eac3', 'alac'}
+
+# libx264 için iş parçacığı başına yaklaşık işlem hızı (megapiksel/saniye),
+# hızlıdan yavaşa. Kaba bir tahmindir; yalnızca preset seçimi için kullanılır.
+X264_PRESET_THROUGHPUT = [
+    ('ultrafast', 60.0),
+    ('superfast', 40.0),
+    ('veryfast', 25.0),
+    ('faster', 15.0),
+    ('fast', 10.0),
+    ('medium', 7.0)
+]
+
+# Yeniden kodlanan sesin gerçek zamana göre hızı
+AAC_ENCODE_SPEED = 100.0
+
+def _is_mp4_container(container):
+    return bool({'mp4', 'mov'} & set((container or '').split(',')))
+
+def get_render_threads():
+    return Config.RENDER_THREADS or ffmpeg_governor.thread_budget()
+
+def _choose_preset(video, threads):
+    """Hedef hıza (RENDER_TARGET_SPEED x gerçek zaman) ulaşan en kaliteli preset"""
+    width = video.get('width') or 1920
+    height = video.get('height') or 1080
+    fps = video.get('fps') or 30
+    megapixels_per_second = width * height * fps / 1e6
+    
+    # Hedefe hiçbiri ulaşmazsa en hızlısı kullanılır
+    chosen = None
+    for preset, throughput in X264_PRESET_THROUGHPUT:
+        speed = throughput * threads / megapixels_per_second
+        if chosen and speed < Config.RENDER_TARGET_SPEED:
+            break
+        chosen, chosen_speed = preset, speed
+        
+    return chosen, chosen_speed
+
+def plan_render(probe, output_duration, reencode=False):
+    """Probe verisinden işin en ucuz geçerli yolunu seç
+    
+    strategy:
+      'copy'      kaynak zaten MP4 uyumlu, akışlar olduğu gibi kopyalanır
+      'remux'     codec'ler MP4'e kopyalanabilir, yalnızca kapsayıcı (ve
+                  gerekirse ses) değişir
+      'transcode' video MP4'e kopyalanamaz ya da kare hassasiyeti istendi
+    segmentable: segment kesme/birleştirme (-c copy) ve segment önbelleği
+    bu plan için geçerli mi.
+    estimated_seconds: render süresi tahmini.
+    """
+    video = (probe or {}).get('video') or {}
+    audio = (probe or {}).get('audio')
+    video_codec = video.get('codec')
+    audio_codec = audio['codec'] if audio else None
+    threads = get_render_threads()
+    
+    if not probe:
+        # Bilgi yoksa eski davranış: kopyalama denenir
+        reason = 'probe yok'
+        strategy = 'copy'
+    elif reencode:
+        reason = 'kare hassasiyetli kesim istendi'
+        strategy = 'transcode'
+    elif video_codec not in MP4_VIDEO_CODECS:
+        reason = f'{video_codec} MP4 içine kopyalanamaz'
+        strategy = 'transcode'
+    elif _is_mp4_container(probe['container']) and audio_codec in MP4_AUDIO_CODECS | {None}:
+        reason = 'kaynak MP4 uyumlu'
+        strategy = 'copy'
+    else:
+        reason = f"{probe['container']} kapsayıcısı MP4'e aktarılacak"
+        strategy = 'remux'
+        
+    plan = {
+        'strategy': strategy,
+        'reason': reason,
+        'video_codec': 'copy',
+        'audio_codec': 'copy',
+        'preset': None,
+        'threads': None,
+        'segmentable': strategy == 'copy' or (
+            strategy == 'remux' and audio_codec in MP4_AUDIO_CODECS | {None}
+        )
+    }
+    
+    if strategy == 'transcode':
+        preset, speed = _choose_preset(video, threads)
+        plan.update(
+            video_codec='libx264',
+            audio_codec='aac',
+            preset=preset,
+            threads=threads,
+            estimated_seconds=round(output_duration / speed, 1)
+        )
+    else:
+        if audio_codec not in MP4_AUDIO_CODECS | {None}:
+            plan['audio_codec'] = 'aac'
+            
+        # Kopyalama disk hızıyla sınırlıdır
+        bit_rate = (probe or {}).get('bit_rate') or 0
+        estimated = output_duration * bit_rate / 8 / Config.RENDER_DISK_THROUGHPUT
+        if plan['audio_codec'] == 'aac':
+            estimated += output_duration / AAC_ENCODE_SPEED
+        plan['estimated_seconds'] = round(estimated, 1)
+        
+    logger.info(
+        f"Render planı: {plan['strategy']} ({plan['reason']}), "
+        f"tahmini süre {plan['estimated_seconds']}s"
+    )
+    return plan
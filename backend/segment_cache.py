@@ -0,0 +1,160 @@
+import os
+import json
+import time
+import uuid
+import hashlib
+import logging
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+def _link(src, dest):
+    """src'yi dest adına sabit bağla (hard link), dest varsa değiştir"""
+    staged = f'{dest}.{uuid.uuid4().hex}.tmp'
+    os.link(src, staged)
+    os.replace(staged, dest)
+
+class SegmentCache:
+    """Render edilmiş kesim segmentleri için disk bütçeli LRU önbellek
+    
+    Anahtar: (kaynak içerik özeti, başlangıç, bitiş, render ayarları).
+    Dosyalar SEGMENT_CACHE_FOLDER'da tutulur; erişim zamanları ve boyutlar
+    Redis'te izlenir. Toplam boyut SEGMENT_CACHE_MAX_BYTES'ı aşınca en uzun
+    süre kullanılmayan segmentler silinir.
+    """
+    
+    LRU_KEY = 'segment_cache:lru'
+    SIZES_KEY = 'segment_cache:sizes'
+    TOTAL_KEY = 'segment_cache:total_bytes'
+    STATS_KEY = 'segment_cache:stats'
+    
+    def __init__(self, redis_client):
+        self.redis_client = redis_client
+    
+    @staticmethod
+    def make_key(content_key, start_seconds, end_seconds, settings):
+        raw = json.dumps([content_key, round(start_seconds, 3), round(end_seconds, 3), settings])
+        return hashlib.sha256(raw.encode()).hexdigest()
+    
+    @staticmethod
+    def path_for(key):
+        return os.path.join(Config.SEGMENT_CACHE_FOLDER, f'{key}.mp4')
+    
+    def get(self, key):
+        """Önbellekteki segmentin yolunu döndür (yoksa None)"""
+        path = self.path_for(key)
+        if not os.path.exists(path):
+            self._forget(key)
+            self.redis_client.hincrby(self.STATS_KEY, 'misses', 1)
+            return None
+            
+        pipe = self.redis_client.pipeline()
+        pipe.zadd(self.LRU_KEY, {key: time.time()})
+        pipe.hincrby(self.STATS_KEY, 'hits', 1)
+        # Yeniden render edilmeyen baytlar
+        pipe.hincrby(self.STATS_KEY, 'bytes_saved', os.path.getsize(path))
+        pipe.execute()
+        return path
+    
+    def contains(self, key):
+        """İstatistiklere dokunmadan segmentin varlığını kontrol et"""
+        return os.path.exists(self.path_for(key))
+    
+    def put(self, key, temp_path, link=False):
+        """Render edilen segmenti önbelleğe taşı, yeni yolunu döndür
+        
+        link=True ise dosya taşınmaz, önbelleğe sabit bağlanır; çağıran kendi
+        kopyasını birleştirme bitene kadar kullanır. Tahliye burada yapılmaz;
+        iş bitince evict() çağrılır.
+        """
+        path = self.path_for(key)
+        if link:
+            _link(temp_path, path)
+        else:
+            os.replace(temp_path, path)
+        size = os.path.getsize(path)
+        
+        previous = self.redis_client.hget(self.SIZES_KEY, key)
+        pipe = self.redis_client.pipeline()
+        pipe.zadd(self.LRU_KEY, {key: time.time()})
+        pipe.hset(self.SIZES_KEY, key, size)
+        pipe.incrby(self.TOTAL_KEY, size - int(previous or 0))
+        pipe.execute()
+        return path
+    
+    def checkout(self, key, dest_path):
+        """Önbellekteki segmenti işin kendi yoluna sabit bağla (yoksa None)
+        
+        Birleştirme bu bağlantıyı okur; başka bir işin evict() çağrısı
+        önbellekteki adı silse bile veri iş bitene kadar yerinde kalır.
+        """
+        path = self.get(key)
+        if not path:
+            return None
+            
+        try:
+            _link(path, dest_path)
+        except FileNotFoundError:
+            # get() ile bağlama arasında tahliye edildi
+            return None
+        return dest_path
+    
+    def _forget(self, key):
+        """Dosyası kaybolmuş girdiyi Redis'ten düş"""
+        size = self.redis_client.hget(self.SIZES_KEY, key)
+        if size is None:
+            return
+            
+        pipe = self.redis_client.pipeline()
+        pipe.zrem(self.LRU_KEY, key)
+        pipe.hdel(self.SIZES_KEY, key)
+        pipe.incrby(self.TOTAL_KEY, -int(size))
+        pipe.execute()
+    
+    def evict(self):
+        """Disk bütçesi aşıldıysa en eski erişilen segmentleri sil"""
+        evicted = 0
+        freed = 0
+        
+        while int(self.redis_client.get(self.TOTAL_KEY) or 0) > Config.SEGMENT_CACHE_MAX_BYTES:
+            oldest = self.redis_client.zpopmin(self.LRU_KEY, 1)
+            if not oldest:
+                break
+                
+            key = oldest[0][0]
+            key = key.decode() if isinstance(key, bytes) else key
+            size = int(self.redis_client.hget(self.SIZES_KEY, key) or 0)
+            
+            pipe = self.redis_client.pipeline()
+            pipe.hdel(self.SIZES_KEY, key)
+            pipe.incrby(self.TOTAL_KEY, -size)
+            pipe.execute()
+            
+            try:
+                os.remove(self.path_for(key))
+            except FileNotFoundError:
+                pass
+                
+            evicted += 1
+            freed += size
+            
+        if evicted:
+            self.redis_client.hincrby(self.STATS_KEY, 'evictions', evicted)
+            logger.info(f"Segment önbelleğinden {evicted} dosya silindi ({freed} bayt)")
+    
+    def stats(self):
+        """Segment önbelleği isabet/ıska ve kazanılan bayt sayaçları"""
+        raw = self.redis_client.hgetall(self.STATS_KEY)
+        stats = {
+            (k.decode() if isinstance(k, bytes) else k): int(v)
+            for k, v in raw.items()
+        }
+        for field in ('hits', 'misses', 'bytes_saved', 'evictions'):
+            stats.setdefault(field, 0)
+            
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+        stats['entries'] = self.redis_client.zcard(self.LRU_KEY)
+        stats['total_bytes'] = int(self.redis_client.get(self.TOTAL_KEY) or 0)
+        stats['max_bytes'] = Config.SEGMENT_CACHE_MAX_BYTES
+        return stats
@@ -1,17 +1,55 @@
 import os
 import json
+import time
 import redis
 import logging
+from functools import partial
 from celery import Task
+from celery.signals import task_revoked
 from celery_app import celery_app
 from config import Config
+from media_store import update_blob
+from segment_cache import SegmentCache
+from artifacts import ArtifactRegistry
+from admission import AdmissionController
+import finalize_jobs
+import ffmpeg_governor
+from media_probe import probe_media, keyframe_interval
+from render_planner import plan_render
 from utils import (
-    get_video_duration, cut_video_segment, 
-    merge_video_segments, clean_temp_files, validate_cuts
+    merge_video_segments, clean_temp_files, validate_cuts,
+    render_cuts_single_pass, cut_video_segments_parallel,
+    build_keyframe_index, smart_cut_segment, build_analysis_proxy,
+    render_variants_shared_pass, FFmpegProgress
 )
 
 logger = logging.getLogger(__name__)
 redis_client = redis.from_url(Config.REDIS_URL)
+segment_cache = SegmentCache(redis_client) if Config.SEGMENT_CACHE_ENABLED else None
+artifacts = ArtifactRegistry(redis_client)
+admission = AdmissionController(redis_client)
+
+def update_video_status(video_id, status, message='', **extra):
+    """Video işleme durumunu güncelle ve abonelere yayınla"""
+    status_data = {
+        'status': status,
+        'message': message,
+        # Sıra numarası: istemciler kaçırdıkları/tekrar eden olayları ayırt eder
+        'seq': redis_client.incr(f'video_status_seq:{video_id}'),
+        'updated_at': time.time()
+    }
+    status_data.update(extra)
+    status_json = json.dumps(status_data)
+    
+    pipe = redis_client.pipeline()
+    pipe.setex(
+        f'video_status:{video_id}',
+        3600,  # 1 saat
+        status_json
+    )
+    pipe.expire(f'video_status_seq:{video_id}', 3600)
+    pipe.publish(f'video_status_events:{video_id}', status_json)
+    pipe.execute()
 
 class VideoTask(Task):
     """Video işleme görevleri için temel sınıf"""
@@ -21,36 +59,72 @@ class VideoTask(Task):
         if video_id:
             self._update_status(video_id, 'error', str(exc))
     
-    def _update_status(self, video_id, status, message=''):
+    def _update_status(self, video_id, status, message='', **extra):
         """Video işleme durumunu güncelle"""
-        status_data = {
-            'status': status,
-            'message': message
-        }
-        redis_client.setex(
-            f'video_status:{video_id}',
-            3600,  # 1 saat
-            json.dumps(status_data)
-        )
+        update_video_status(video_id, status, message, **extra)
+
+def _build_analysis_proxy(video_id, video_path, content_hash=None):
+    """Vekil videoyu üret, bilgilerini döndür (hata durumunda None)"""
+    proxy_path = os.path.join(
+        Config.PROCESSED_FOLDER,
+        f"{content_hash or video_id}_proxy.mp4"
+    )
+    
+    if not build_analysis_proxy(video_path, proxy_path):
+        logger.warning(f"Vekil video oluşturulamadı, orijinal kullanılacak: {video_id}")
+        return None
+    
+    # Vekil, blob kaydında tutulduğu için onunla aynı süre yaşar
+    artifacts.register(proxy_path, 'proxy', Config.BLOB_TTL, video_id)
+    
+    return {
+        'path': proxy_path,
+        'size': os.path.getsize(proxy_path)
+    }
 
 @celery_app.task(base=VideoTask, bind=True)
-def process_video_upload(self, video_id, video_path):
+def process_video_upload(self, video_id, video_path, content_hash=None):
     """Video yükleme sonrası işlemleri yap"""
     try:
         # Durumu güncelle
         self._update_status(video_id, 'processing', 'Video analiz ediliyor...')
         
-        # Video süresini al
-        duration = get_video_duration(video_path)
+        # Kapsayıcı ve akış bilgilerini tek ffprobe çağrısıyla al
+        probe = probe_media(video_path)
         
-        if duration == 0:
+        if not probe or probe['duration'] == 0:
             raise ValueError("Video süresi alınamadı")
         
-        # Video bilgilerini Redis'e kaydet
+        if not probe['video']:
+            raise ValueError("Dosyada video akışı bulunamadı")
+        
+        duration = probe['duration']
+        
+        # Keyframe indeksini bir kez çıkar (akıllı kesim için)
+        keyframe_index = build_keyframe_index(video_path, codec=probe['video']['codec'])
+        if keyframe_index:
+            probe['keyframe_interval'] = keyframe_interval(keyframe_index['times'])
+            redis_client.setex(
+                f'video_keyframes:{video_id}',
+                3600,  # 1 saat
+                json.dumps(keyframe_index)
+            )
+        else:
+            logger.warning(f"Keyframe indeksi oluşturulamadı: {video_id}")
+        
+        redis_client.setex(
+            f'video_probe:{video_id}',
+            3600,  # 1 saat
+            json.dumps(probe)
+        )
+        
+        # Video bilgilerini Redis'e kaydet (vekil video ayrı görevde eklenir)
         video_info = {
             'id': video_id,
             'path': video_path,
             'duration': duration,
+            'content_hash': content_hash,
+            'analysis_proxy': None,
             'status': 'ready'
         }
         
@@ -60,6 +134,23 @@ def process_video_upload(self, video_id, video_path):
             json.dumps(video_info)
         )
         
+        # Aynı içerik tekrar yüklendiğinde yeniden analiz edilmesin
+        if content_hash:
+            update_blob(
+                redis_client,
+                content_hash,
+                duration=duration,
+                probe=probe,
+                keyframe_index=keyframe_index
+            )
+        
+        # Vekil video analysis kuyruğunda üretilir, video hazır olmayı beklemez
+        if Config.ANALYSIS_PROXY_ENABLED:
+            generate_analysis_proxy.apply_async(
+                args=[video_id, video_path, content_hash],
+                priority=Config.TASK_PRIORITY_INTERACTIVE
+            )
+        
         # Durumu güncelle
         self._update_status(video_id, 'ready', 'Video analiz için hazır')
         
@@ -74,12 +165,439 @@ def process_video_upload(self, video_id, video_path):
         self._update_status(video_id, 'error', str(e))
         raise
 
+@celery_app.task
+def generate_analysis_proxy(video_id, video_path, content_hash=None):
+    """AI analizi için vekil videoyu üret ve video/blob kayıtlarına ekle
+    
+    Başarısız olursa video hazır kalır, analiz orijinal dosyayla yapılır.
+    """
+    try:
+        analysis_proxy = _build_analysis_proxy(video_id, video_path, content_hash)
+        if not analysis_proxy:
+            return None
+        
+        video_info_str = redis_client.get(f'video_info:{video_id}')
+        if video_info_str:
+            video_info = json.loads(video_info_str)
+            video_info['analysis_proxy'] = analysis_proxy
+            redis_client.setex(
+                f'video_info:{video_id}',
+                3600,  # 1 saat
+                json.dumps(video_info)
+            )
+        
+        if content_hash:
+            update_blob(redis_client, content_hash, analysis_proxy=analysis_proxy)
+        
+        return analysis_proxy
+        
+    except Exception as e:
+        logger.error(f"Vekil video görevi hatası: {str(e)}")
+        return None
+
+def _get_keyframe_index(video_id, video_path):
+    """Kayıtlı keyframe indeksini al, yoksa oluştur"""
+    keyframe_index_str = redis_client.get(f'video_keyframes:{video_id}')
+    if keyframe_index_str:
+        return json.loads(keyframe_index_str)
+    
+    probe = _get_probe(video_id, video_path)
+    codec = probe['video']['codec'] if probe and probe['video'] else None
+    keyframe_index = build_keyframe_index(video_path, codec=codec)
+    if keyframe_index:
+        redis_client.setex(
+            f'video_keyframes:{video_id}',
+            3600,  # 1 saat
+            json.dumps(keyframe_index)
+        )
+    return keyframe_index
+
+def _get_probe(video_id, video_path):
+    """Kayıtlı medya bilgilerini al, yoksa yeniden çıkar"""
+    probe_str = redis_client.get(f'video_probe:{video_id}')
+    if probe_str:
+        return json.loads(probe_str)
+    
+    probe = probe_media(video_path)
+    if probe:
+        redis_client.setex(
+            f'video_probe:{video_id}',
+            3600,  # 1 saat
+            json.dumps(probe)
+        )
+    return probe
+
+def _get_smart_cutter(video_id, video_path):
+    """H.264 kaynaklar için GOP farkındalıklı kesiciyi hazırla"""
+    keyframe_index = _get_keyframe_index(video_id, video_path)
+    
+    if not keyframe_index or keyframe_index.get('codec') != 'h264':
+        logger.warning(f"Akıllı kesim kullanılamıyor, kopyalama ile kesilecek: {video_id}")
+        return None
+    
+    probe = _get_probe(video_id, video_path)
+    return partial(
+        _smart_cut,
+        keyframe_times=keyframe_index['times'],
+        source_video=probe['video'] if probe else None
+    )
+
+def _smart_cut(input_path, output_path, start_time, end_time, cancel_event=None,
+               on_progress=None, keyframe_times=None, source_video=None):
+    """Havuz imzasına uygun akıllı kesim sarmalayıcısı"""
+    return smart_cut_segment(
+        input_path, output_path, start_time, end_time,
+        keyframe_times, cancel_event, on_progress, source_video
+    )
+
+def _progress_tracker(task, video_id, message, total_seconds):
+    """FFmpeg ilerlemesini video_status'a yayınlayan izleyici"""
+    return FFmpegProgress(
+        total_seconds,
+        lambda progress: task._update_status(video_id, 'processing', message, progress=progress)
+    )
+
+def _cuts_duration(valid_cuts):
+    return sum(cut['end_seconds'] - cut['start_seconds'] for cut in valid_cuts)
+
+def _segment_cache_keys(video_info, valid_cuts, cutter):
+    """Her kesim için segment önbelleği anahtarı (önbellek kapalıysa None)"""
+    if not segment_cache:
+        return [None] * len(valid_cuts)
+    
+    content_key = video_info.get('content_hash') or video_info['id']
+    # Akıllı kesim segmentleri parametre setlerini akış içinde taşır ('avc3')
+    settings = 'smart-avc3' if cutter else 'copy'
+    return [
+        SegmentCache.make_key(content_key, cut['start_seconds'], cut['end_seconds'], settings)
+        for cut in valid_cuts
+    ]
+
+def _segment_path(work_id, index):
+    return os.path.join(Config.PROCESSED_FOLDER, f"{work_id}_segment_{index}.mp4")
+
+def _render_with_segments(task, video_id, video_path, valid_cuts, output_path, cutter=None,
+                          cache_keys=None, work_id=None, checkpoint=None, cancel_event=None):
+    """Her kesimi ayrı segment olarak kes ve birleştir
+    
+    cache_keys verilirse önbellekte bulunan segmentler yeniden kesilmez,
+    yeni kesilenler önbelleğe eklenir. Her iki durumda da birleştirme işin
+    kendi segment yollarındaki sabit bağlantıları okur; başka bir işin
+    tahliyesi bunları silemez. work_id geçici segment adlarının
+    önekidir (aynı videonun farklı işleri çakışmasın). checkpoint verilirse
+    her segment tamamlandığında kaydedilir; yeniden teslimde doğrulanan
+    segmentler tekrar kesilmez ve hata durumunda silinmez. cancel_event
+    ayarlanınca çalışan ffmpeg süreçleri durdurulur.
+    """
+    cache_keys = cache_keys or [None] * len(valid_cuts)
+    segment_paths = []
+    temp_files = []
+    jobs = []
+    pending = []
+    resumed = []
+    
+    for i, (cut, cache_key) in enumerate(zip(valid_cuts, cache_keys)):
+        segment_path = _segment_path(work_id or video_id, i)
+        segment_paths.append(segment_path)
+        temp_files.append(segment_path)
+        
+        if cache_key and segment_cache.checkout(cache_key, segment_path):
+            continue
+        
+        if checkpoint and checkpoint.verified(f'segment:{i}'):
+            resumed.append((i, cache_key))
+            continue
+        
+        jobs.append((segment_path, cut['start'], cut['end']))
+        pending.append((i, cut, cache_key))
+    
+    if resumed:
+        logger.info(f"{len(resumed)} segment checkpoint'ten devam ettirildi: {video_id}")
+    
+    if jobs:
+        logger.info(f"{len(jobs)}/{len(valid_cuts)} segment kesilecek: {video_id}")
+        
+        def on_segment_done(job_index):
+            # Segment yazılır yazılmaz kaydedilir; worker kaybında korunur
+            i = pending[job_index][0]
+            checkpoint.record(f'segment:{i}', segment_paths[i])
+            artifacts.register(segment_paths[i], 'segment', Config.FINALIZE_CHECKPOINT_TTL, video_id)
+        
+        # Segmentleri paralel kes (sıra korunur; checkpoint yoksa hata olursa hepsi temizlenir)
+        progress = _progress_tracker(
+            task, video_id, 'Video kesiliyor...', _cuts_duration([cut for _, cut, _ in pending])
+        )
+        
+        if not cut_video_segments_parallel(
+            video_path, jobs, cutter=cutter, progress=progress,
+            on_segment_done=on_segment_done if checkpoint else None,
+            keep_completed=checkpoint is not None,
+            cancel_event=cancel_event
+        ):
+            raise ValueError("Segmentler kesilemedi")
+    
+    # Yeni ve devam ettirilen segmentleri önbelleğe bağla (iş kendi kopyasını okur)
+    for i, cache_key in [(i, cache_key) for i, _, cache_key in pending] + resumed:
+        if cache_key:
+            segment_cache.put(cache_key, segment_paths[i], link=True)
+    
+    # Durumu güncelle
+    task._update_status(video_id, 'processing', 'Segmentler birleştiriliyor...')
+    
+    progress = _progress_tracker(
+        task, video_id, 'Segmentler birleştiriliyor...', _cuts_duration(valid_cuts)
+    )
+    success = merge_video_segments(
+        segment_paths, output_path, cancel_event=cancel_event, on_progress=progress.callback(),
+        video_tag='avc3' if cutter else None
+    )
+    
+    # Devam ettirilebilir işte başarısız birleştirmenin segmentleri yeniden denemeye kalır
+    if success or not checkpoint:
+        for path in temp_files:
+            artifacts.forget(path)
+        clean_temp_files([path for path in temp_files if os.path.exists(path)])
+    
+    if segment_cache:
+        segment_cache.evict()
+    
+    if not success:
+        raise ValueError("Video birleştirilemedi")
+
+def _chunk_path(job_hash, index):
+    return os.path.join(Config.PROCESSED_FOLDER, f"{job_hash}_chunk_{index}.mp4")
+
+def _chunk_cuts(valid_cuts):
+    """Kesimleri sırayla, her biri en az FINALIZE_CHUNK_SECONDS süren gruplara böl"""
+    chunks = [[]]
+    for cut in valid_cuts:
+        if (Config.FINALIZE_CHUNK_SECONDS > 0 and chunks[-1]
+                and _cuts_duration(chunks[-1]) >= Config.FINALIZE_CHUNK_SECONDS):
+            chunks.append([])
+        chunks[-1].append(cut)
+    return chunks
+
+def _render_single_pass(task, video_id, video_path, valid_cuts, output_path, plan, probe,
+                        job_hash, checkpoint, cancel_event=None):
+    """Kesim listesini tek geçişle render et, başarılıysa True döndür
+    
+    Çıktı FINALIZE_CHUNK_SECONDS'tan uzunsa kesimler ardışık gruplara
+    bölünür; her grup tek geçişle ayrı dosyaya render edilip checkpoint'e
+    yazılır ve gruplar akış kopyalamayla birleştirilir. Yeniden teslimde
+    doğrulanan gruplar tekrar render edilmez.
+    """
+    render = partial(
+        render_cuts_single_pass,
+        video_path,
+        reencode=plan['strategy'] == 'transcode',
+        cancel_event=cancel_event,
+        with_audio=probe['audio'] is not None if probe else None,
+        audio_codec=plan['audio_codec'],
+        preset=plan['preset'] or 'veryfast',
+        threads=plan['threads'] or 0
+    )
+    chunks = _chunk_cuts(valid_cuts)
+    
+    if len(chunks) == 1:
+        progress = _progress_tracker(
+            task, video_id, 'Video kesiliyor...', _cuts_duration(valid_cuts)
+        )
+        return render(output_path, valid_cuts, on_progress=progress.callback())
+    
+    chunk_paths = [_chunk_path(job_hash, i) for i in range(len(chunks))]
+    pending = [i for i in range(len(chunks)) if not checkpoint.verified(f'chunk:{i}')]
+    if len(pending) < len(chunks):
+        logger.info(f"{len(chunks) - len(pending)} parça checkpoint'ten devam ettirildi: {video_id}")
+    
+    progress = _progress_tracker(
+        task, video_id, 'Video kesiliyor...', _cuts_duration([cut for i in pending for cut in chunks[i]])
+    )
+    for i in pending:
+        if not render(chunk_paths[i], chunks[i], on_progress=progress.callback(i)):
+            return False
+        # Parça yazılır yazılmaz kaydedilir; worker kaybında korunur
+        checkpoint.record(f'chunk:{i}', chunk_paths[i])
+        artifacts.register(chunk_paths[i], 'segment', Config.FINALIZE_CHECKPOINT_TTL, video_id)
+    
+    task._update_status(video_id, 'processing', 'Parçalar birleştiriliyor...')
+    success = merge_video_segments(chunk_paths, output_path, cancel_event=cancel_event)
+    
+    # Başarısız birleştirmenin parçaları yeniden denemeye kalır
+    if success:
+        for path in chunk_paths:
+            artifacts.remove(path)
+    return success
+
+def _check_cancelled(cancel_event):
+    """İptal istendiyse bir sonraki aşamaya geçmeden dur"""
+    if cancel_event is not None and cancel_event.is_set():
+        raise finalize_jobs.FinalizeCancelled("İşlem iptal edildi")
+
+def _discard_job_outputs(job_hash, cuts_count):
+    """İptal edilen işin yarım çıktılarını, segment ve parçalarını, checkpoint kaydını sil"""
+    paths = [finalize_jobs.temp_output_path_for(job_hash)]
+    paths += [_segment_path(job_hash, i) for i in range(cuts_count)]
+    # Parça sayısı kesim sayısını geçemez
+    paths += [_chunk_path(job_hash, i) for i in range(cuts_count)]
+    for path in paths:
+        artifacts.remove(path)
+    finalize_jobs.FinalizeCheckpoint(redis_client, job_hash).clear()
+
+def _render_job(task, video_id, video_info, probe, valid_cuts, job_hash, cancel_event=None):
+    """Kesim listesini geçici dosyaya render et, atomik olarak yerine taşı ve sonucu kaydet
+    
+    Aşamalar (segmentler ya da tek geçiş parçaları, birleştirilmiş geçici
+    çıktı, nihai çıktı) FinalizeCheckpoint'e yazılır. Worker kaybından sonra yeniden teslim
+    edilen görev doğrulanan aşamaları atlayıp ilk eksik parçadan devam eder.
+    cancel_event ayarlanırsa çalışan ffmpeg durdurulur ve FinalizeCancelled
+    fırlatılır.
+    """
+    video_path = video_info['path']
+    output_path = finalize_jobs.temp_output_path_for(job_hash)
+    final_path = finalize_jobs.output_path_for(job_hash)
+    checkpoint = finalize_jobs.FinalizeCheckpoint(redis_client, job_hash)
+    resuming = checkpoint.exists()
+    
+    # Nihai çıktı taşınmış ama sonuç kaydedilmeden worker kaybolmuş
+    done = checkpoint.verified('output') if resuming else None
+    if done:
+        logger.info(f"Finalize çıktısı checkpoint'ten alındı: {job_hash}")
+        result = {
+            'output_path': final_path,
+            'cuts_count': len(valid_cuts),
+            'plan': done['plan'],
+            'status': 'completed'
+        }
+        artifacts.register(final_path, 'final', Config.RESULT_TTL, video_id)
+        finalize_jobs.save_result(redis_client, job_hash, result)
+        checkpoint.clear()
+        return result
+    
+    # İşin yolunu baştan seç: kopyalama, kapsayıcı değişimi ya da yeniden kodlama
+    plan = plan_render(
+        probe,
+        _cuts_duration(valid_cuts),
+        reencode=Config.FINALIZE_REENCODE and Config.FINALIZE_MODE == 'single_pass'
+    )
+    task._update_status(video_id, 'processing', 'Video kesiliyor...', plan=plan)
+    
+    rendered = checkpoint.verified('render') if resuming else None
+    success = rendered is not None
+    if success:
+        logger.info(f"Render edilmiş geçici çıktı checkpoint'ten alındı: {job_hash}")
+    
+    cutter = None
+    if Config.FINALIZE_MODE == 'smart' and plan['segmentable']:
+        cutter = _get_smart_cutter(video_id, video_path)
+    
+    cache_keys = _segment_cache_keys(video_info, valid_cuts, cutter)
+    use_segments = plan['segmentable'] and Config.FINALIZE_MODE != 'single_pass'
+    
+    if plan['segmentable'] and not use_segments and resuming:
+        # Önceki deneme segment yolundaydı: tamamlanan segmentlerden devam et
+        use_segments = checkpoint.has_segments()
+        
+    warm_cache = False
+    if segment_cache and plan['segmentable'] and not use_segments:
+        # Segment yolu yalnızca çıktının yeterli kısmı önbellekteyse tek
+        # geçişten hızlıdır; aksi halde tek geçiş yapılır ve yeniden
+        # finalize'da önbellek arka planda doldurulur
+        cached_seconds = _cuts_duration([
+            cut for cut, key in zip(valid_cuts, cache_keys) if segment_cache.contains(key)
+        ])
+        use_segments = (
+            cached_seconds > 0
+            and cached_seconds >= _cuts_duration(valid_cuts) * Config.SEGMENT_CACHE_MIN_HIT_RATIO
+        )
+        if use_segments:
+            logger.info(f"Segment önbelleği kullanılacak: {video_id}")
+        else:
+            warm_cache = bool(cached_seconds) or bool(redis_client.exists(f'video_result:{video_id}'))
+    
+    if not success and not use_segments:
+        # Tüm kesim listesini tek geçişte işle (uzun çıktılar checkpoint'li parçalarla)
+        success = _render_single_pass(
+            task, video_id, video_path, valid_cuts, output_path, plan, probe,
+            job_hash, checkpoint, cancel_event=cancel_event
+        )
+        
+        if not success:
+            _check_cancelled(cancel_event)
+            if not plan['segmentable']:
+                # Kopyalamaya dayalı segment yolu bu kaynakta da başarısız olur
+                raise ValueError("Video işlenemedi")
+            logger.warning(f"Tek geçiş render başarısız, segment moduna geçiliyor: {video_id}")
+        else:
+            checkpoint.record('render', output_path)
+            if warm_cache:
+                warm_segment_cache.apply_async(
+                    args=[video_id, valid_cuts], priority=Config.TASK_PRIORITY_BATCH
+                )
+    
+    if not success:
+        # Segment yolu (ya da tek geçişin yedeği): her kesimi ayrı kes ve birleştir
+        _render_with_segments(
+            task, video_id, video_path, valid_cuts, output_path, cutter, cache_keys,
+            work_id=job_hash, checkpoint=checkpoint, cancel_event=cancel_event
+        )
+        checkpoint.record('render', output_path)
+    
+    # Yarım çıktı hiçbir zaman nihai adla görünmez
+    os.replace(output_path, final_path)
+    checkpoint.record('output', final_path, plan=plan)
+    artifacts.register(final_path, 'final', Config.RESULT_TTL, video_id)
+    
+    result = {
+        'output_path': final_path,
+        'cuts_count': len(valid_cuts),
+        'plan': plan,
+        'status': 'completed'
+    }
+    finalize_jobs.save_result(redis_client, job_hash, result)
+    checkpoint.clear()
+    return result
+
+class _AttachedVideoStatus:
+    """Finalize durum güncellemelerini yalnızca işe hâlâ bağlı videoya yayınlar
+    
+    İptal edilen ya da yeni bir işle değiştirilen video işten ayrılır; iş
+    başka videolar için sürse de eski ilerleme yeni durumun üzerine yazılmaz.
+    """
+    def __init__(self, job_hash):
+        self.job_hash = job_hash
+    
+    def _update_status(self, video_id, status, message='', **extra):
+        if finalize_jobs.is_attached(redis_client, self.job_hash, video_id):
+            update_video_status(video_id, status, message, **extra)
+
+def _cancel_waiting(job_hash, task_id):
+    """İptal edilen işi bırak ve ona bağlı kalan videoları 'cancelled' yap"""
+    waiting = finalize_jobs.release(redis_client, job_hash, task_id)
+    for waiting_id in waiting:
+        finalize_jobs.clear_current(redis_client, waiting_id, task_id)
+        update_video_status(waiting_id, 'cancelled', 'İşlem iptal edildi')
+    finalize_jobs.clear_cancel(redis_client, task_id)
+
 @celery_app.task(base=VideoTask, bind=True)
-def finalize_video(self, video_id, cuts):
-    """Kesim listesine göre nihai videoyu oluştur"""
+def finalize_video(self, video_id, cuts, job_hash=None):
+    """Kesim listesine göre nihai videoyu oluştur
+    
+    İş (video içeriği, normalize kesim listesi, render ayarları) özetiyle
+    tanımlanır. Aynı özet için yalnızca bir görev render eder; diğerleri
+    çalışan işe eklenir, tamamlanmış sonuç varsa hemen döner. İptal
+    bayrağı ayarlanırsa çalışan ffmpeg durdurulur, yarım çıktılar silinir
+    ve görev 'cancelled' ile biter.
+    """
+    task_id = self.request.id
+    owns_job = False
+    valid_cuts = []
+    # Render'lar önizleme ve analizin gerisinde düşük öncelikle çalışır
+    priority_token = ffmpeg_governor.set_priority(ffmpeg_governor.BATCH)
+    
     try:
-        # Durumu güncelle
-        self._update_status(video_id, 'processing', 'Video kesiliyor...')
+        if finalize_jobs.is_cancelled(redis_client, task_id):
+            # Kuyrukta beklerken iptal edildi (revoke'u kaçıran worker için)
+            raise finalize_jobs.FinalizeCancelled("İşlem iptal edildi")
         
         # Video bilgilerini al
         video_info_str = redis_client.get(f'video_info:{video_id}')
@@ -87,8 +605,10 @@ def finalize_video(self, video_id, cuts):
             raise ValueError("Video bilgileri bulunamadı")
         
         video_info = json.loads(video_info_str)
-        video_path = video_info['path']
+        # Kuyrukta beklerken kaynak LRU ile silinmesin
+        artifacts.touch_video(video_info)
         video_duration = video_info['duration']
+        probe = _get_probe(video_id, video_info['path'])
         
         # Kesimleri doğrula
         valid_cuts = validate_cuts(cuts, video_duration)
@@ -96,91 +616,336 @@ def finalize_video(self, video_id, cuts):
         if not valid_cuts:
             raise ValueError("Geçerli kesim bulunamadı")
         
-        # Her kesim için segment oluştur
-        segment_paths = []
-        temp_files = []
+        job_hash = job_hash or finalize_jobs.make_job_hash(
+            video_info.get('content_hash') or video_id, valid_cuts
+        )
         
-        for i, cut in enumerate(valid_cuts):
-            segment_path = os.path.join(
-                Config.PROCESSED_FOLDER,
-                f"{video_id}_segment_{i}.mp4"
-            )
-            
-            success = cut_video_segment(
-                video_path,
-                segment_path,
-                cut['start'],
-                cut['end']
-            )
-            
-            if success:
-                segment_paths.append(segment_path)
-                temp_files.append(segment_path)
-            else:
-                # Hata durumunda temizlik yap
-                clean_temp_files(temp_files)
-                raise ValueError(f"Segment {i} kesilemedi")
+        owns_job, owner = finalize_jobs.claim(redis_client, job_hash, task_id, video_id)
+        if not owns_job:
+            # Aynı iş başka bir görevde çalışıyor, sonuç bu videoya da bağlanacak
+            logger.info(f"Finalize işi zaten çalışıyor ({owner}), ona eklendi: {video_id}")
+            return {'video_id': video_id, 'job_hash': job_hash, 'status': 'attached'}
         
+        status = _AttachedVideoStatus(job_hash)
         # Durumu güncelle
-        self._update_status(video_id, 'processing', 'Segmentler birleştiriliyor...')
+        status._update_status(video_id, 'processing', 'Video kesiliyor...')
         
-        # Segmentleri birleştir
-        output_path = os.path.join(
-            Config.PROCESSED_FOLDER,
-            f"{video_id}_final.mp4"
-        )
+        result = finalize_jobs.get_result(redis_client, job_hash)
+        if result:
+            logger.info(f"Finalize sonucu önbellekten: {job_hash}")
+            finalize_jobs.touch_result(redis_client, job_hash)
+            artifacts.touch(result['output_path'], Config.RESULT_TTL)
+        else:
+            with finalize_jobs.CancelWatcher(redis_client, task_id) as cancel_event:
+                result = _render_job(
+                    status, video_id, video_info, probe, valid_cuts, job_hash, cancel_event
+                )
         
-        success = merge_video_segments(segment_paths, output_path)
+        # Sonucu bekleyen tüm videolara bağla ve durumlarını güncelle
+        waiting = finalize_jobs.release(redis_client, job_hash, task_id)
+        for waiting_id in waiting:
+            finalize_jobs.link_result(redis_client, waiting_id, job_hash, result)
+            finalize_jobs.clear_current(redis_client, waiting_id, task_id)
+            update_video_status(waiting_id, 'completed', 'Video hazır!')
         
-        # Geçici segmentleri temizle
-        clean_temp_files(temp_files)
+        return dict(result, video_id=video_id, job_hash=job_hash)
         
-        if not success:
-            raise ValueError("Video birleştirilemedi")
+    except Exception as e:
+        if isinstance(e, finalize_jobs.FinalizeCancelled) or finalize_jobs.is_cancelled(redis_client, task_id):
+            logger.info(f"Finalize iptal edildi: {video_id} ({task_id})")
+            if owns_job:
+                # Sahiplik bırakılmadan silinir: aynı işi yeniden başlatan görevle çakışmaz
+                _discard_job_outputs(job_hash, len(valid_cuts))
+            if job_hash:
+                # Başlamadan iptal edilen görevin sahipliği endpoint'te alınmıştı
+                _cancel_waiting(job_hash, task_id)
+            else:
+                finalize_jobs.clear_cancel(redis_client, task_id)
+            return {'video_id': video_id, 'job_hash': job_hash, 'status': 'cancelled'}
+            
+        logger.error(f"Video birleştirme hatası: {str(e)}")
+        waiting = finalize_jobs.release(redis_client, job_hash, task_id) if owns_job else [video_id]
+        for waiting_id in waiting:
+            update_video_status(waiting_id, 'error', str(e))
+        raise
         
-        # Sonuç bilgilerini Redis'e kaydet
-        result_info = {
-            'video_id': video_id,
-            'output_path': output_path,
-            'cuts_count': len(valid_cuts),
-            'status': 'completed'
+    finally:
+        # Kabul kontrolündeki tahmini iş yükünden düş
+        admission.release_render(task_id)
+        ffmpeg_governor.reset_priority(priority_token)
+
+@task_revoked.connect
+def _on_finalize_revoked(sender=None, request=None, **kwargs):
+    """Revoke edilen finalize görevinin kayıtlarını bırak
+    
+    Kuyrukta iptal edilen tekli görev endpoint'te alınmış sahipliği, toplu
+    görev (terminate ile durdurulduysa) sahiplendiği tüm varyant işlerini
+    bırakır; aksi halde yeni istekler TTL dolana kadar ölü işe eklenir.
+    """
+    name = getattr(sender, 'name', None)
+    if request is None or name not in (finalize_video.name, finalize_batch.name):
+        return
+        
+    try:
+        args = list(request.args or [])
+        kwargs = request.kwargs or {}
+        if name == finalize_batch.name:
+            batch_id = args[1] if len(args) > 1 else kwargs.get('batch_id')
+            _cancel_batch(batch_id, request.id)
+        else:
+            job_hash = args[2] if len(args) > 2 else kwargs.get('job_hash')
+            if job_hash:
+                _cancel_waiting(job_hash, request.id)
+        admission.release_render(request.id)
+        
+    except Exception as e:
+        logger.error(f"İptal edilen görev temizlenemedi ({request.id}): {str(e)}")
+
+class _BatchVariantStatus:
+    """Render yardımcılarının durum güncellemelerini toplu işin varyant kaydına yazar
+    
+    _render_job ve ilerleme izleyicisi yalnızca _update_status kullanır;
+    toplu işte güncellemeler videonun tekli finalize durumunu değiştirmez.
+    """
+    def __init__(self, batch_id, names):
+        self.batch_id = batch_id
+        self.names = names
+    
+    def _update_status(self, video_id, status, message='', **extra):
+        for name in self.names:
+            finalize_jobs.update_batch_variant(
+                redis_client, self.batch_id, name, status=status, message=message, **extra
+            )
+
+def _render_shared_variants(batch_id, video_id, video_info, probe, variants):
+    """Yeniden kodlanan varyantları tek çözme geçişinde render et"""
+    reporter = _BatchVariantStatus(batch_id, [variant['name'] for variant in variants])
+    
+    # Tüm çıktılar tek süreçte kodlanır: preset toplam çıktı süresine göre seçilir
+    plan = plan_render(probe, sum(variant['duration'] for variant in variants), reencode=True)
+    reporter._update_status(video_id, 'processing', 'Varyantlar render ediliyor...', plan=plan)
+    
+    outputs = [
+        {
+            'output_path': finalize_jobs.temp_output_path_for(variant['job_hash']),
+            'cuts': variant['cuts'],
+            'profile': Config.OUTPUT_PROFILES[variant['profile']]
         }
+        for variant in variants
+    ]
+    progress = _progress_tracker(
+        reporter, video_id, 'Varyantlar render ediliyor...',
+        max(variant['duration'] for variant in variants)
+    )
+    success = render_variants_shared_pass(
+        video_info['path'],
+        outputs,
+        with_audio=probe['audio'] is not None if probe else None,
+        on_progress=progress.callback(),
+        preset=plan['preset'] or 'veryfast',
+        threads=plan['threads'] or 0
+    )
+    
+    if not success:
+        clean_temp_files([output['output_path'] for output in outputs])
+        raise ValueError("Varyantlar işlenemedi")
         
-        redis_client.setex(
-            f'video_result:{video_id}',
-            3600,  # 1 saat
-            json.dumps(result_info)
+    results = {}
+    for variant, output in zip(variants, outputs):
+        final_path = finalize_jobs.output_path_for(variant['job_hash'])
+        os.replace(output['output_path'], final_path)
+        artifacts.register(final_path, 'final', Config.RESULT_TTL, video_id)
+        results[variant['name']] = {
+            'output_path': final_path,
+            'cuts_count': len(variant['cuts']),
+            'plan': plan,
+            'profile': variant['profile'],
+            'status': 'completed'
+        }
+    return results
+
+def _release_variant(task_id, variant, result, error=None):
+    """Varyant işini bırak; aynı işe eklenmiş tekli finalize isteklerini tamamla"""
+    waiting = finalize_jobs.release(redis_client, variant['job_hash'], task_id)
+    for waiting_id in waiting:
+        if result:
+            finalize_jobs.link_result(redis_client, waiting_id, variant['job_hash'], result)
+            update_video_status(waiting_id, 'completed', 'Video hazır!')
+        else:
+            update_video_status(waiting_id, 'error', error or 'Video işlenemedi')
+
+def _cancel_batch(batch_id, task_id):
+    """Toplu görevin sahiplendiği varyant işlerini bırak, bitmemiş varyantları iptal et"""
+    batch = finalize_jobs.get_batch(redis_client, batch_id) if batch_id else None
+    for variant in (batch or {}).get('variants', []):
+        if finalize_jobs.get_owner(redis_client, variant['job_hash']) == task_id:
+            _discard_job_outputs(variant['job_hash'], len(variant['cuts']))
+            _cancel_waiting(variant['job_hash'], task_id)
+        if variant['status'] in ('queued', 'processing') and not variant.get('owner'):
+            finalize_jobs.update_batch_variant(
+                redis_client, batch_id, variant['name'],
+                status='cancelled', message='İşlem iptal edildi'
+            )
+    finalize_jobs.clear_batch_task(redis_client, task_id)
+    finalize_jobs.clear_cancel(redis_client, task_id)
+
+@celery_app.task(bind=True)
+def finalize_batch(self, video_id, batch_id):
+    """Aynı videonun birden fazla kesim listesi/profil varyantını tek işte oluştur
+    
+    Kaynak çözünürlükte kopyalanabilen varyantlar tekli finalize yoluyla
+    (çözme yapılmadan) üretilir ve onun sonuçlarını paylaşır. Yeniden
+    kodlanması gerekenler tek ffmpeg çağrısında bir kez çözülür ve split ile
+    her varyantın kodlayıcısına dağıtılır. Tamamlanmış ya da başka görevde
+    çalışan varyantlar yeniden render edilmez.
+    """
+    task_id = self.request.id
+    owned = []
+    priority_token = ffmpeg_governor.set_priority(ffmpeg_governor.BATCH)
+    # Tekli finalize iptali bu görevin sahip olduğu işi durdurmasın
+    finalize_jobs.mark_batch_task(redis_client, task_id)
+    
+    def set_variant(name, status, message='', **fields):
+        finalize_jobs.update_batch_variant(
+            redis_client, batch_id, name, status=status, message=message, **fields
         )
+    
+    try:
+        batch = finalize_jobs.get_batch(redis_client, batch_id)
+        if not batch:
+            raise ValueError("Toplu iş bulunamadı")
+            
+        video_info_str = redis_client.get(f'video_info:{video_id}')
+        if not video_info_str:
+            raise ValueError("Video bilgileri bulunamadı")
         
-        # Durumu güncelle
-        self._update_status(video_id, 'completed', 'Video hazır!')
+        video_info = json.loads(video_info_str)
+        artifacts.touch_video(video_info)
+        probe = _get_probe(video_id, video_info['path'])
         
-        return result_info
+        for variant in batch['variants']:
+            if finalize_jobs.get_result(redis_client, variant['job_hash']):
+                set_variant(variant['name'], 'completed', 'Video hazır!')
+                continue
+                
+            owns_job, owner = finalize_jobs.claim(redis_client, variant['job_hash'], task_id)
+            if not owns_job:
+                # Sonuç diğer görev bitince özet üzerinden bulunur
+                logger.info(f"Varyant başka görevde çalışıyor ({owner}): {variant['name']}")
+                set_variant(variant['name'], 'processing', 'Video işleniyor...', owner=owner)
+                continue
+            owned.append(variant)
+        
+        # Kopyalanabilen varyantlar: çözme yok, tekli finalize ile aynı yol
+        for variant in [variant for variant in owned if not variant['shared']]:
+            result, error = None, None
+            try:
+                result = _render_job(
+                    _BatchVariantStatus(batch_id, [variant['name']]),
+                    video_id, video_info, probe, variant['cuts'], variant['job_hash']
+                )
+                set_variant(variant['name'], 'completed', 'Video hazır!', progress=None)
+            except Exception as e:
+                error = str(e)
+                logger.error(f"Varyant render hatası ({variant['name']}): {error}")
+                set_variant(variant['name'], 'error', error)
+            _release_variant(task_id, variant, result, error)
+            owned.remove(variant)
+        
+        shared = [variant for variant in owned if variant['shared']]
+        if shared:
+            try:
+                results = _render_shared_variants(batch_id, video_id, video_info, probe, shared)
+            except Exception as e:
+                for variant in shared:
+                    set_variant(variant['name'], 'error', str(e))
+                raise
+                
+            for variant in shared:
+                result = results[variant['name']]
+                finalize_jobs.save_result(redis_client, variant['job_hash'], result)
+                set_variant(variant['name'], 'completed', 'Video hazır!', progress=None)
+                _release_variant(task_id, variant, result)
+                owned.remove(variant)
+        
+        logger.info(f"Toplu finalize tamamlandı: {batch_id}")
+        return {'video_id': video_id, 'batch_id': batch_id, 'status': 'completed'}
         
     except Exception as e:
-        logger.error(f"Video birleştirme hatası: {str(e)}")
-        self._update_status(video_id, 'error', str(e))
+        logger.error(f"Toplu finalize hatası: {str(e)}")
+        for variant in owned:
+            _release_variant(task_id, variant, None, str(e))
+            
+        # Başka görevde çalışanlar dışında bitmemiş varyantlar hatalı sayılır
+        batch = finalize_jobs.get_batch(redis_client, batch_id)
+        for variant in (batch or {}).get('variants', []):
+            if variant['status'] in ('queued', 'processing') and not variant.get('owner'):
+                set_variant(variant['name'], 'error', str(e))
         raise
+        
+    finally:
+        # Kabul kontrolündeki tahmini iş yükünden düş
+        admission.release_render(task_id)
+        finalize_jobs.clear_batch_task(redis_client, task_id)
+        ffmpeg_governor.reset_priority(priority_token)
+
+@celery_app.task(bind=True)
+def warm_segment_cache(self, video_id, valid_cuts):
+    """Tek geçişle render edilen kesimleri sonraki finalize için önbelleğe kes
+    
+    Yalnızca akış kopyalamayla kesilir (yeniden kodlama yok); önbellekte
+    olan kesimler atlanır. En düşük öncelikle çalışır.
+    """
+    if not segment_cache:
+        return 0
+    
+    priority_token = ffmpeg_governor.set_priority(ffmpeg_governor.BATCH)
+    try:
+        video_info_str = redis_client.get(f'video_info:{video_id}')
+        if not video_info_str:
+            return 0
+            
+        video_info = json.loads(video_info_str)
+        if not os.path.exists(video_info['path']):
+            return 0
+            
+        cache_keys = _segment_cache_keys(video_info, valid_cuts, None)
+        missing = [
+            (i, cut, key) for i, (cut, key) in enumerate(zip(valid_cuts, cache_keys))
+            if not segment_cache.contains(key)
+        ]
+        if not missing:
+            return 0
+            
+        work_id = f'warm_{self.request.id}'
+        jobs = [(_segment_path(work_id, i), cut['start'], cut['end']) for i, cut, _ in missing]
+        if not cut_video_segments_parallel(video_info['path'], jobs):
+            logger.warning(f"Segment önbelleği doldurulamadı: {video_id}")
+            return 0
+            
+        for (_, _, key), (segment_path, _, _) in zip(missing, jobs):
+            segment_cache.put(key, segment_path)
+        segment_cache.evict()
+        
+        logger.info(f"{len(missing)} segment önbelleğe eklendi: {video_id}")
+        return len(missing)
+        
+    except Exception as e:
+        logger.error(f"Segment önbelleği doldurma hatası: {str(e)}")
+        return 0
+        
+    finally:
+        ffmpeg_governor.reset_priority(priority_token)
 
 @celery_app.task
-def cleanup_old_files():
-    """Eski dosyaları temizle (günlük çalışacak)"""
+def sweep_artifacts():
+    """Süresi dolan dosyaları sil, disk doluysa LRU ile yer aç (beat ile periyodik)"""
     try:
-        import time
-        current_time = time.time()
+        expired = artifacts.sweep()
+        evicted = artifacts.enforce_watermark()
+        if segment_cache:
+            segment_cache.evict()
+        return {'expired': expired, 'evicted': evicted}
         
-        # Upload ve processed klasörlerini temizle
-        for folder in [Config.UPLOAD_FOLDER, Config.PROCESSED_FOLDER]:
-            for filename in os.listdir(folder):
-                file_path = os.path.join(folder, filename)
-                
-                # 24 saatten eski dosyaları sil
-                if os.path.getmtime(file_path) < current_time - 86400:
-                    try:
-                        os.remove(file_path)
-                        logger.info(f"Eski dosya silindi: {file_path}")
-                    except Exception as e:
-                        logger.error(f"Dosya silme hatası: {str(e)}")
-                        
     except Exception as e:
-        logger.error(f"Temizlik hatası: {str(e)}")
\ No newline at end of file
+        logger.error(f"Temizlik hatası: {str(e)}")
@@ -0,0 +1,44 @@
+import os
+import sys
+import fakeredis
+import pytest
+
+# Backend modülleri düz içe aktarılır (from config import Config)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+from utils import validate_cuts
+
+@pytest.fixture(autouse=True)
+def storage(tmp_path, monkeypatch):
+    """Yükleme, çıktı ve segment klasörlerini test başına geçici dizine al"""
+    for name in ('UPLOAD_FOLDER', 'PROCESSED_FOLDER', 'SEGMENT_CACHE_FOLDER'):
+        folder = tmp_path / name.lower()
+        folder.mkdir()
+        monkeypatch.setattr(Config, name, str(folder))
+    return tmp_path
+
+@pytest.fixture
+def redis_client():
+    return fakeredis.FakeRedis()
+
+@pytest.fixture
+def api(redis_client, monkeypatch):
+    """Sahte Redis'e bağlı Flask uygulama modülü (istemci: api.app.test_client())"""
+    import app as api
+    from artifacts import ArtifactRegistry
+    
+    monkeypatch.setattr(api, 'redis_client', redis_client)
+    monkeypatch.setattr(api, 'artifacts', ArtifactRegistry(redis_client))
+    for name in ('admission', 'ai_cache', 'segment_cache', 'conversation_store'):
+        monkeypatch.setattr(api, name, None)
+    return api
+
+@pytest.fixture
+def make_cuts():
+    """(başlangıç, bitiş) saniye çiftlerinden doğrulanmış kesim listesi"""
+    def build(*ranges, duration=1000):
+        return validate_cuts(
+            [{'start': str(start), 'end': str(end)} for start, end in ranges], duration
+        )
+    return build
@@ -0,0 +1,134 @@
+"""Gemini dosya deposunun yerel taklidi (devam ettirilebilir yükleme protokolü)
+
+GeminiFileStore(base_url=stub.base_url) ile kullanılır. Yalnızca dosya
+deposunun uç noktalarını uygular: yükleme başlatma, parça gönderme,
+durum sorgulama ve dosya durumunu okuma.
+"""
+import json
+import uuid
+import threading
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class GeminiStub:
+    def __init__(self, processing_polls=0, expires_in=48 * 3600, fail_start=False):
+        self.processing_polls = processing_polls
+        self.expires_in = expires_in
+        self.fail_start = fail_start
+        # Bir sonraki parçanın yalnızca bu kadar baytını al ve 503 dön
+        self.drop_next_chunk_after = None
+        self.sessions = {}
+        self.files = {}
+        self.requests = []
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self.base_url = f'http://127.0.0.1:{self.server.server_port}'
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+    
+    def __enter__(self):
+        self._thread.start()
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+        return False
+    
+    def commands(self):
+        return [command for _, command in self.requests]
+    
+    def _file_resource(self, name):
+        file = self.files[name]
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=self.expires_in)
+        return {
+            'name': name,
+            'uri': f'{self.base_url}/v1beta/{name}',
+            'mimeType': file['mime_type'],
+            'state': 'PROCESSING' if file['polls_left'] > 0 else 'ACTIVE',
+            'expirationTime': expires_at.strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+        }
+    
+    def _handler(self):
+        stub = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+            
+            def _send(self, status, body=None, headers=None):
+                data = json.dumps(body).encode() if body is not None else b''
+                self.send_response(status)
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+            
+            def _body(self):
+                return self.rfile.read(int(self.headers.get('Content-Length') or 0))
+            
+            def do_POST(self):
+                command = self.headers.get('X-Goog-Upload-Command')
+                stub.requests.append((self.path, command))
+                if not self.headers.get('x-goog-api-key'):
+                    return self._send(401, {'error': 'missing key'})
+                    
+                if self.path == '/upload/v1beta/files':
+                    self._body()
+                    if stub.fail_start:
+                        return self._send(500, {'error': 'unavailable'})
+                    session_id = uuid.uuid4().hex
+                    stub.sessions[session_id] = {
+                        'data': bytearray(),
+                        'size': int(self.headers['X-Goog-Upload-Header-Content-Length']),
+                        'mime_type': self.headers['X-Goog-Upload-Header-Content-Type'],
+                        'file': None
+                    }
+                    return self._send(200, {}, {
+                        'X-Goog-Upload-URL': f'{stub.base_url}/upload/session/{session_id}'
+                    })
+                    
+                session = stub.sessions.get(self.path.rsplit('/', 1)[-1])
+                if session is None:
+                    return self._send(404, {'error': 'unknown session'})
+                chunk = self._body()
+                
+                if command == 'query':
+                    status = 'final' if session['file'] else 'active'
+                    body = {'file': stub._file_resource(session['file'])} if session['file'] else {}
+                    return self._send(200, body, {
+                        'X-Goog-Upload-Status': status,
+                        'X-Goog-Upload-Size-Received': str(len(session['data']))
+                    })
+                    
+                if int(self.headers['X-Goog-Upload-Offset']) != len(session['data']):
+                    return self._send(400, {'error': 'offset mismatch'})
+                    
+                if stub.drop_next_chunk_after is not None:
+                    # Bağlantı parçanın ortasında kopmuş gibi davran
+                    session['data'] += chunk[:stub.drop_next_chunk_after]
+                    stub.drop_next_chunk_after = None
+                    return self._send(503, {'error': 'connection reset'})
+                    
+                session['data'] += chunk
+                if command == 'upload, finalize':
+                    if len(session['data']) != session['size']:
+                        return self._send(400, {'error': 'size mismatch'})
+                    name = f'files/{uuid.uuid4().hex[:12]}'
+                    stub.files[name] = {
+                        'data': bytes(session['data']),
+                        'mime_type': session['mime_type'],
+                        'polls_left': stub.processing_polls
+                    }
+                    session['file'] = name
+                    return self._send(200, {'file': stub._file_resource(name)})
+                return self._send(200, {})
+            
+            def do_GET(self):
+                stub.requests.append((self.path, None))
+                name = self.path[len('/v1beta/'):]
+                if name not in stub.files:
+                    return self._send(404, {'error': 'not found'})
+                stub.files[name]['polls_left'] -= 1
+                return self._send(200, stub._file_resource(name))
+                
+        return Handler
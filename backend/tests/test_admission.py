@@ -0,0 +1,99 @@
+import io
+import json
+import time
+import pytest
+from config import Config
+from admission import AdmissionController, AdmissionError
+
+@pytest.fixture
+def admission(redis_client, monkeypatch):
+    monkeypatch.setattr(AdmissionController, 'free_bytes', staticmethod(lambda: 100 * 1024 ** 3))
+    return AdmissionController(redis_client)
+
+def test_render_is_admitted_and_released(admission, redis_client):
+    admission.admit_render('job-1', 'render', 120, 0)
+    assert admission.render_backlog() == 120
+    
+    admission.release_render('job-1')
+    assert admission.render_backlog() == 0
+    assert admission.stats()['admitted_render'] == 1
+
+def test_backlog_limit_rejects_with_retry_after(admission, monkeypatch):
+    monkeypatch.setattr(Config, 'ADMISSION_MAX_BACKLOG_SECONDS', 300)
+    admission.admit_render('job-1', 'render', 250, 0)
+    
+    with pytest.raises(AdmissionError) as error:
+        admission.admit_render('job-2', 'render', 100, 0)
+    assert error.value.status_code == 429
+    # Sınırı aşan iş yükü kadar beklenir
+    assert error.value.retry_after == 50
+    assert admission.stats()['rejected_backlog'] == 1
+
+def test_single_large_job_is_admitted_when_idle(admission, monkeypatch):
+    monkeypatch.setattr(Config, 'ADMISSION_MAX_BACKLOG_SECONDS', 300)
+    admission.admit_render('job-1', 'render', 5000, 0)
+
+def test_stale_jobs_are_ignored(admission, redis_client):
+    redis_client.hset(AdmissionController.JOBS_KEY, 'lost', json.dumps({
+        'cost': 10000,
+        'admitted_at': time.time() - Config.ADMISSION_JOB_STALE_SECONDS - 1
+    }))
+    assert admission.render_backlog() == 0
+    assert not redis_client.hexists(AdmissionController.JOBS_KEY, 'lost')
+
+def test_queue_depth_counts_priority_lists(admission, redis_client, monkeypatch):
+    monkeypatch.setattr(Config, 'ADMISSION_MAX_QUEUE_DEPTH', 3)
+    redis_client.rpush('render', 'a')
+    redis_client.rpush('render:3', 'b', 'c')
+    assert admission.queue_depth('render') == 3
+    
+    with pytest.raises(AdmissionError) as error:
+        admission.admit_upload('render', 0)
+    assert error.value.status_code == 429
+
+def test_full_disk_is_rejected_with_503(redis_client, monkeypatch):
+    monkeypatch.setattr(AdmissionController, 'free_bytes', staticmethod(lambda: 0))
+    monkeypatch.setattr('artifacts.ArtifactRegistry.enforce_watermark', lambda self: 0)
+    
+    with pytest.raises(AdmissionError) as error:
+        AdmissionController(redis_client).admit_upload('probe', 1024)
+    assert error.value.status_code == 503
+    assert error.value.retry_after == Config.ADMISSION_DISK_RETRY_AFTER
+
+class _TrackedBody(io.BytesIO):
+    """Okunan bayt sayısını kaydeden istek gövdesi"""
+    def __init__(self, data):
+        super().__init__(data)
+        self.bytes_read = 0
+    
+    def read(self, size=-1):
+        data = super().read(size)
+        self.bytes_read += len(data)
+        return data
+    
+    def readline(self, size=-1):
+        data = super().readline(size)
+        self.bytes_read += len(data)
+        return data
+    
+    def readinto(self, buffer):
+        count = super().readinto(buffer)
+        self.bytes_read += count
+        return count
+
+def test_rejected_upload_never_reads_the_body(api, redis_client, monkeypatch):
+    monkeypatch.setattr(AdmissionController, 'free_bytes', staticmethod(lambda: 0))
+    monkeypatch.setattr('artifacts.ArtifactRegistry.enforce_watermark', lambda self: 0)
+    monkeypatch.setattr(api, 'admission', AdmissionController(redis_client))
+    body = _TrackedBody(b'--x\r\n' + b'v' * 1024)
+    
+    response = api.app.test_client().post(
+        '/api/upload',
+        input_stream=body,
+        content_type='multipart/form-data; boundary=x',
+        content_length=len(body.getvalue())
+    )
+    
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == str(Config.ADMISSION_DISK_RETRY_AFTER)
+    assert body.bytes_read == 0
@@ -0,0 +1,76 @@
+import time
+import itertools
+import threading
+from types import SimpleNamespace
+import pytest
+from config import Config
+import ai_cache
+from ai_cache import ResponseCache
+
+@pytest.fixture
+def cache(redis_client, monkeypatch):
+    # LRU sırası için her çağrıda artan saat
+    clock = itertools.count(1000)
+    monkeypatch.setattr(ai_cache, 'time', SimpleNamespace(time=lambda: next(clock), sleep=time.sleep))
+    return ResponseCache(redis_client)
+
+def test_prompt_normalization_shares_key(cache):
+    key = cache.make_key('content', 'model', 'Sessiz kısımları  çıkar.')
+    assert key == cache.make_key('content', 'model', 'sessiz kısımları çıkar')
+    assert key != cache.make_key('content', 'model', 'sessiz kısımları çıkar', 'state')
+    assert key != cache.make_key('other', 'model', 'sessiz kısımları çıkar')
+
+def test_miss_then_hit(cache):
+    calls = []
+    compute = lambda: (calls.append(1) or {'cuts': []}, True)
+    
+    assert cache.get_or_compute('k', compute) == ('miss', {'cuts': []})
+    assert cache.get_or_compute('k', compute) == ('hit', {'cuts': []})
+    assert len(calls) == 1
+    assert cache.stats()['hit_rate'] == 0.5
+
+def test_uncacheable_value_is_not_stored(cache):
+    assert cache.get_or_compute('k', lambda: ({'error': 'x'}, False))[0] == 'miss'
+    assert cache.get('k') is None
+
+def test_concurrent_requests_share_one_call(redis_client, monkeypatch):
+    cache = ResponseCache(redis_client)
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+    
+    def compute():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return {'cuts': [1]}, True
+    
+    leader = []
+    thread = threading.Thread(target=lambda: leader.append(cache.get_or_compute('k', compute)))
+    thread.start()
+    started.wait(5)
+    threading.Timer(0.2, release.set).start()
+    
+    assert cache.get_or_compute('k', compute) == ('coalesced', {'cuts': [1]})
+    thread.join()
+    assert leader == [('miss', {'cuts': [1]})]
+    assert len(calls) == 1
+
+def test_follower_computes_when_leader_fails(redis_client):
+    cache = ResponseCache(redis_client)
+    # Lider hata verip kilidi bırakmış, önbelleğe yazmamış
+    redis_client.set('ai_cache:lock:k', '1')
+    threading.Timer(0.2, redis_client.delete, ['ai_cache:lock:k']).start()
+    
+    assert cache.get_or_compute('k', lambda: ({'cuts': [2]}, True)) == ('miss', {'cuts': [2]})
+
+def test_least_recently_used_entry_is_evicted(cache, monkeypatch):
+    monkeypatch.setattr(Config, 'AI_CACHE_MAX_ENTRIES', 2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+    
+    assert cache.get('b') is None
+    assert cache.get('a') == 1 and cache.get('c') == 3
+    assert cache.stats()['evictions'] == 1
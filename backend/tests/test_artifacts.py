@@ -0,0 +1,102 @@
+import os
+import pytest
+from types import SimpleNamespace
+from config import Config
+import artifacts
+from artifacts import ArtifactRegistry
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = SimpleNamespace(now=1_000_000.0)
+    monkeypatch.setattr(artifacts, 'time', SimpleNamespace(time=lambda: clock.now))
+    return clock
+
+@pytest.fixture
+def registry(redis_client, monkeypatch):
+    # Disk doluluğu: işlenmiş klasördeki dosya başına %10
+    monkeypatch.setattr(ArtifactRegistry, 'disk_usage_ratio', staticmethod(
+        lambda: len(os.listdir(Config.PROCESSED_FOLDER)) / 10
+    ))
+    return ArtifactRegistry(redis_client)
+
+def _file(name, size=10):
+    path = os.path.join(Config.PROCESSED_FOLDER, name)
+    with open(path, 'wb') as f:
+        f.write(bytes(size))
+    return path
+
+def test_sweep_removes_only_expired_files(registry, clock):
+    old = _file('old.mp4')
+    fresh = _file('fresh.mp4')
+    registry.register(old, 'final', 60)
+    registry.register(fresh, 'final', 3600)
+    
+    assert registry.sweep(now=clock.now + 120) == 1
+    assert not os.path.exists(old)
+    assert os.path.exists(fresh)
+    assert registry.stats()['expired_bytes'] == 10
+    assert registry.stats()['entries'] == 1
+
+def test_shared_file_lifetime_is_never_shortened(registry, clock):
+    blob = _file('blob.mp4')
+    registry.register(blob, 'upload', Config.BLOB_TTL)
+    # Aynı içerik kısa ömürlü bir işle yeniden kaydedilir
+    registry.register(blob, 'upload', 60)
+    
+    assert registry.sweep(now=clock.now + 120) == 0
+    assert os.path.exists(blob)
+
+def test_touch_extends_expiry(registry, clock):
+    path = _file('final.mp4')
+    registry.register(path, 'final', 60)
+    clock.now += 50
+    registry.touch(path, 60)
+    
+    assert registry.sweep(now=clock.now + 30) == 0
+    assert registry.sweep(now=clock.now + 61) == 1
+
+def test_touch_video_marks_source_and_proxy(registry, clock):
+    source = _file('source.mp4')
+    proxy = _file('proxy.mp4')
+    for path in (source, proxy):
+        registry.register(path, 'upload', 60)
+        
+    clock.now += 50
+    registry.touch_video({'path': source, 'analysis_proxy': {'path': proxy}})
+    assert registry.sweep(now=clock.now + 30) == 0
+
+def test_watermark_evicts_least_recently_used(registry, clock, monkeypatch):
+    monkeypatch.setattr(Config, 'DISK_HIGH_WATERMARK', 0.5)
+    monkeypatch.setattr(Config, 'DISK_LOW_WATERMARK', 0.3)
+    monkeypatch.setattr(Config, 'ARTIFACT_MIN_IDLE', 100)
+    
+    paths = []
+    for i in range(4):
+        paths.append(_file(f'{i}.mp4'))
+        registry.register(paths[-1], 'final', 3600)
+        clock.now += 1000
+    registry.touch(paths[0])
+    
+    # Beşinci dosya doluluğu %50'ye çıkarır; %30'a inene kadar en eski erişilenler silinir
+    clock.now += 1000
+    registry.register(_file('4.mp4'), 'final', 3600)
+    
+    assert [os.path.exists(path) for path in paths] == [True, False, False, True]
+    assert registry.stats()['evicted'] == 2
+
+def test_recently_used_files_survive_full_disk(registry, clock, monkeypatch):
+    monkeypatch.setattr(Config, 'DISK_HIGH_WATERMARK', 0.1)
+    monkeypatch.setattr(Config, 'DISK_LOW_WATERMARK', 0.0)
+    
+    path = _file('in_use.mp4')
+    registry.register(path, 'final', 3600)
+    assert os.path.exists(path)
+    assert registry.enforce_watermark() == 0
+
+def test_remove_tolerates_missing_file(registry):
+    path = _file('gone.mp4')
+    registry.register(path, 'final', 60)
+    os.remove(path)
+    
+    assert registry.remove(path) == 0
+    assert registry.stats()['entries'] == 0
@@ -0,0 +1,117 @@
+import json
+import pytest
+from types import SimpleNamespace
+import finalize_jobs
+import tasks
+
+@pytest.fixture
+def revoked(api, redis_client, monkeypatch):
+    monkeypatch.setattr(tasks, 'redis_client', redis_client)
+    revoked = []
+    monkeypatch.setattr(api.celery_app.control, 'revoke', lambda task_id, **kwargs: revoked.append(task_id))
+    return revoked
+
+@pytest.fixture
+def queued(api, monkeypatch):
+    """finalize_video.apply_async yerine kuyruğa alınan görevleri kaydet"""
+    queued = []
+    
+    def apply_async(args, task_id, priority):
+        queued.append((args, task_id))
+        return SimpleNamespace(id=task_id)
+    monkeypatch.setattr(api.finalize_video, 'apply_async', apply_async)
+    return queued
+
+@pytest.fixture
+def video(redis_client, storage):
+    path = storage / 'source.mp4'
+    path.write_bytes(b'video')
+    redis_client.set('video_info:video-1', json.dumps({
+        'id': 'video-1', 'path': str(path), 'duration': 100, 'content_hash': 'content'
+    }))
+    return 'video-1'
+
+def _status(redis_client, video_id):
+    return json.loads(redis_client.get(f'video_status:{video_id}'))['status']
+
+def test_watcher_sets_event_when_cancel_requested(redis_client):
+    with finalize_jobs.CancelWatcher(redis_client, 'task-1', interval=0.01) as cancel_event:
+        assert not cancel_event.wait(0.05)
+        finalize_jobs.request_cancel(redis_client, 'task-1')
+        assert cancel_event.wait(1)
+
+def test_watcher_stops_without_cancelling(redis_client):
+    watcher = finalize_jobs.CancelWatcher(redis_client, 'task-1', interval=0.01)
+    with watcher as cancel_event:
+        pass
+    assert not watcher._thread.is_alive()
+    assert not cancel_event.is_set()
+
+def test_cancel_stops_job_with_no_other_waiters(api, redis_client, revoked):
+    finalize_jobs.claim(redis_client, 'job', 'task-1', 'video-1')
+    finalize_jobs.set_current(redis_client, 'video-1', 'task-1', 'job')
+    
+    assert api._cancel_finalize('video-1', finalize_jobs.get_current(redis_client, 'video-1'))
+    assert revoked == ['task-1']
+    assert finalize_jobs.is_cancelled(redis_client, 'task-1')
+    assert finalize_jobs.get_current(redis_client, 'video-1') is None
+
+def test_cancel_only_detaches_while_others_wait(api, redis_client, revoked):
+    finalize_jobs.claim(redis_client, 'job', 'task-1', 'video-1')
+    finalize_jobs.attach(redis_client, 'job', 'video-2')
+    
+    assert not api._cancel_finalize('video-1', {'task_id': 'task-1', 'job_hash': 'job'})
+    assert revoked == []
+    assert not finalize_jobs.is_cancelled(redis_client, 'task-1')
+    assert not finalize_jobs.is_attached(redis_client, 'job', 'video-1')
+    assert finalize_jobs.is_attached(redis_client, 'job', 'video-2')
+
+def test_cancel_never_stops_a_batch_task(api, redis_client, revoked):
+    finalize_jobs.claim(redis_client, 'job', 'batch-task', 'video-1')
+    finalize_jobs.mark_batch_task(redis_client, 'batch-task')
+    
+    assert not api._cancel_finalize('video-1', {'task_id': 'batch-task', 'job_hash': 'job'})
+    assert revoked == []
+
+def test_cancel_endpoint(api, redis_client, revoked):
+    client = api.app.test_client()
+    assert client.post('/api/finalize/video-1/cancel').status_code == 404
+    
+    finalize_jobs.claim(redis_client, 'job', 'task-1', 'video-1')
+    finalize_jobs.set_current(redis_client, 'video-1', 'task-1', 'job')
+    response = client.post('/api/finalize/video-1/cancel')
+    
+    assert response.status_code == 200
+    assert response.get_json()['task_stopped']
+    assert _status(redis_client, 'video-1') == 'cancelled'
+
+def test_cancel_after_completion_is_rejected(api, redis_client, revoked):
+    output_path = finalize_jobs.output_path_for('job')
+    open(output_path, 'wb').close()
+    finalize_jobs.save_result(redis_client, 'job', {'output_path': output_path})
+    finalize_jobs.set_current(redis_client, 'video-1', 'task-1', 'job')
+    
+    assert api.app.test_client().post('/api/finalize/video-1/cancel').status_code == 409
+    assert revoked == []
+
+def test_new_cut_list_supersedes_running_job(api, redis_client, revoked, queued, video):
+    client = api.app.test_client()
+    first = client.post('/api/finalize', json={'video_id': video, 'cuts': [{'start': '0', 'end': '10'}]})
+    first_task = first.get_json()['task_id']
+    
+    second = client.post('/api/finalize', json={'video_id': video, 'cuts': [{'start': '0', 'end': '20'}]})
+    second_task = second.get_json()['task_id']
+    
+    assert revoked == [first_task]
+    assert finalize_jobs.is_cancelled(redis_client, first_task)
+    assert [task_id for _, task_id in queued] == [first_task, second_task]
+    assert finalize_jobs.get_current(redis_client, video)['task_id'] == second_task
+
+def test_same_cut_list_is_not_superseded(api, redis_client, revoked, queued, video):
+    client = api.app.test_client()
+    cuts = [{'start': '0', 'end': '10'}]
+    first = client.post('/api/finalize', json={'video_id': video, 'cuts': cuts}).get_json()
+    second = client.post('/api/finalize', json={'video_id': video, 'cuts': cuts}).get_json()
+    
+    assert second['attached'] and second['task_id'] == first['task_id']
+    assert revoked == [] and len(queued) == 1
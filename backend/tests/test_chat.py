@@ -0,0 +1,69 @@
+import os
+import json
+import pytest
+from types import SimpleNamespace
+from config import Config
+from conversation_store import ConversationStore
+
+class _FakeGemini:
+    model = 'test-model'
+    
+    def __init__(self):
+        self.calls = []
+    
+    def start_conversation(self, video_path, prompt, cache_key=None, mime_type=None):
+        self.calls.append(('start', video_path, cache_key, mime_type))
+        return {'cuts': [], 'message': 'ok'}, None, 'yanıt'
+    
+    def continue_conversation(self, video_path, turns, prompt, cache_key=None, mime_type=None):
+        self.calls.append(('continue', video_path, cache_key, mime_type, len(turns)))
+        return {'cuts': [], 'message': 'ok'}, None, 'yanıt'
+
+@pytest.fixture
+def chat(api, redis_client, monkeypatch):
+    source = os.path.join(Config.UPLOAD_FOLDER, 'source.mov')
+    proxy = os.path.join(Config.PROCESSED_FOLDER, 'proxy.mp4')
+    for path in (source, proxy):
+        with open(path, 'wb') as f:
+            f.write(b'video')
+    
+    gemini = _FakeGemini()
+    monkeypatch.setattr(api, 'gemini_client', gemini)
+    monkeypatch.setattr(api, 'conversation_store', ConversationStore(redis_client))
+    redis_client.set('video_probe:video-1', json.dumps({'mime_type': 'video/quicktime'}))
+    
+    def set_info(with_proxy):
+        info = {'path': source, 'duration': 60.0, 'content_hash': 'hash'}
+        if with_proxy:
+            info['analysis_proxy'] = {'path': proxy}
+        redis_client.set('video_info:video-1', json.dumps(info))
+    
+    def send():
+        response = api.app.test_client().post('/api/chat/video-1', json={'prompt': 'kes'})
+        assert response.status_code == 200
+        return gemini.calls[-1]
+    
+    return SimpleNamespace(set_info=set_info, send=send, source=source, proxy=proxy)
+
+def test_history_survives_proxy_appearing(chat):
+    chat.set_info(with_proxy=False)
+    assert chat.send() == ('start', chat.source, 'hash', 'video/quicktime')
+    
+    # Vekil sonradan hazır oldu: konuşma kaynak dosyayla sürmeli
+    chat.set_info(with_proxy=True)
+    assert chat.send() == ('continue', chat.source, 'hash', 'video/quicktime', 2)
+
+def test_history_survives_proxy_dropping_from_info(chat):
+    chat.set_info(with_proxy=True)
+    assert chat.send() == ('start', chat.proxy, 'hash:proxy', 'video/mp4')
+    
+    chat.set_info(with_proxy=False)
+    assert chat.send() == ('continue', chat.proxy, 'hash:proxy', 'video/mp4', 2)
+
+def test_new_conversation_when_analyzed_file_is_gone(chat):
+    chat.set_info(with_proxy=True)
+    chat.send()
+    
+    os.remove(chat.proxy)
+    assert chat.send() == ('start', chat.source, 'hash', 'video/quicktime')
+    assert chat.send()[0] == 'continue'
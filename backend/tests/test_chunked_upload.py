@@ -0,0 +1,111 @@
+import io
+import pytest
+from config import Config
+from chunked_upload import (
+    create_session, get_session, write_chunk, get_received_ranges, commit_session,
+    finish_session, parse_content_range, received_bytes, UploadError
+)
+from media_store import store_blob
+
+@pytest.fixture
+def session(redis_client, tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, 'UPLOAD_READ_SIZE', 7)
+    return create_session(redis_client, 'up-1', str(tmp_path / 'up-1.mp4'), 'a.mp4', 100)
+
+def _send(redis_client, session, start, end, data=None):
+    data = data if data is not None else bytes(range(start, end + 1))
+    return write_chunk(redis_client, session, start, end, io.BytesIO(data))
+
+def test_parse_content_range():
+    assert parse_content_range('bytes 0-99/1000', 1000) == (0, 99)
+    assert parse_content_range('bytes 900-999/1000', 1000) == (900, 999)
+
+@pytest.mark.parametrize('header', [None, '', 'bytes 0-99', 'bytes=0-99/1000', 'items 0-99/1000'])
+def test_parse_content_range_rejects_malformed(header):
+    with pytest.raises(UploadError) as error:
+        parse_content_range(header, 1000)
+    assert error.value.status_code == 400
+
+@pytest.mark.parametrize('header', ['bytes 0-99/2000', 'bytes 100-99/1000', 'bytes 900-1000/1000'])
+def test_parse_content_range_rejects_mismatch(header):
+    with pytest.raises(UploadError) as error:
+        parse_content_range(header, 1000)
+    assert error.value.status_code == 416
+
+def test_received_bytes_counts_inclusive_ranges():
+    assert received_bytes([[0, 99], [200, 299]]) == 200
+    assert received_bytes([]) == 0
+
+def test_create_session_preallocates_file(session):
+    with open(session['path'], 'rb') as f:
+        assert f.read() == bytes(100)
+
+def test_create_session_rejects_oversized_upload(redis_client, tmp_path):
+    with pytest.raises(UploadError) as error:
+        create_session(redis_client, 'up-2', str(tmp_path / 'x.mp4'), 'x.mp4', Config.MAX_CONTENT_LENGTH + 1)
+    assert error.value.status_code == 413
+
+def test_chunks_are_written_in_place_and_ranges_merged(redis_client, session):
+    assert _send(redis_client, session, 50, 99) == [[50, 99]]
+    assert _send(redis_client, session, 0, 19) == [[0, 19], [50, 99]]
+    # Bitişik ve örtüşen parçalar tek aralıkta birleşir
+    assert _send(redis_client, session, 20, 29) == [[0, 29], [50, 99]]
+    assert _send(redis_client, session, 25, 55) == [[0, 99]]
+    
+    with open(session['path'], 'rb') as f:
+        assert f.read() == bytes(range(100))
+
+def test_repeated_chunk_is_idempotent(redis_client, session):
+    _send(redis_client, session, 0, 49)
+    _send(redis_client, session, 0, 49)
+    assert get_received_ranges(redis_client, 'up-1') == [[0, 49]]
+
+def test_short_chunk_is_not_recorded(redis_client, session):
+    with pytest.raises(UploadError):
+        _send(redis_client, session, 0, 49, data=bytes(30))
+    assert get_received_ranges(redis_client, 'up-1') == []
+
+def test_commit_requires_every_byte(redis_client, session):
+    _send(redis_client, session, 0, 49)
+    with pytest.raises(UploadError) as error:
+        commit_session(redis_client, 'up-1')
+    assert error.value.status_code == 409
+    
+    _send(redis_client, session, 50, 99)
+    assert commit_session(redis_client, 'up-1')['path'] == session['path']
+
+def test_unknown_session_is_404(redis_client):
+    with pytest.raises(UploadError) as error:
+        get_session(redis_client, 'missing')
+    assert error.value.status_code == 404
+
+def test_write_after_commit_is_rejected(redis_client, session):
+    _send(redis_client, session, 0, 99)
+    session = finish_session(redis_client, 'up-1')
+    
+    with pytest.raises(UploadError) as error:
+        _send(redis_client, session, 0, 9)
+    assert error.value.status_code == 409
+
+def test_failed_commit_can_be_retried(api, redis_client, session, monkeypatch):
+    _send(redis_client, session, 0, 99)
+    started = []
+    monkeypatch.setattr(api, '_start_video_processing', lambda *args: started.append(args))
+    
+    def broken_store(*args):
+        raise OSError('disk dolu')
+    monkeypatch.setattr(api, 'store_blob', broken_store)
+    client = api.app.test_client()
+    assert client.post('/api/uploads/up-1/commit').status_code == 500
+    # Oturum ve alınan aralıklar korunur
+    assert get_received_ranges(redis_client, 'up-1') == [[0, 99]]
+    
+    monkeypatch.setattr(api, 'store_blob', store_blob)
+    response = client.post('/api/uploads/up-1/commit')
+    assert response.status_code == 200
+    assert response.get_json()['video_id'] == 'up-1'
+    assert len(started) == 1
+    
+    # Yanıtı kaybeden istemcinin tekrarı işi yeniden başlatmaz
+    assert client.post('/api/uploads/up-1/commit').status_code == 200
+    assert len(started) == 1
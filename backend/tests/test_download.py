@@ -0,0 +1,69 @@
+import os
+import json
+import pytest
+from config import Config
+from artifacts import ArtifactRegistry
+
+@pytest.fixture
+def output(redis_client):
+    path = os.path.join(Config.PROCESSED_FOLDER, 'final_job.mp4')
+    with open(path, 'wb') as f:
+        f.write(bytes(range(256)) * 4)
+    redis_client.setex('video_result:video-1', 60, json.dumps({
+        'output_path': path, 'job_hash': 'job'
+    }))
+    ArtifactRegistry(redis_client).register(path, 'final', 60, 'video-1')
+    return path
+
+@pytest.fixture
+def client(api):
+    return api.app.test_client()
+
+def test_download_supports_ranges(client, output):
+    response = client.get('/api/download/video-1', headers={'Range': 'bytes=100-199'})
+    
+    assert response.status_code == 206
+    assert response.headers['Content-Range'] == 'bytes 100-199/1024'
+    assert response.data == open(output, 'rb').read()[100:200]
+    assert response.headers['Accept-Ranges'] == 'bytes'
+
+def test_download_answers_304_for_matching_etag(client, output):
+    first = client.get('/api/download/video-1')
+    assert first.status_code == 200
+    assert first.headers['Content-Disposition'].startswith('attachment')
+    
+    etag = first.headers['ETag']
+    assert client.get('/api/download/video-1', headers={'If-None-Match': etag}).status_code == 304
+
+def test_if_range_with_stale_etag_sends_whole_file(client, output):
+    response = client.get('/api/download/video-1', headers={
+        'Range': 'bytes=0-9', 'If-Range': '"stale"'
+    })
+    assert response.status_code == 200
+    assert len(response.data) == 1024
+
+def test_etag_changes_when_output_is_replaced(client, output):
+    etag = client.get('/api/download/video-1').headers['ETag']
+    with open(output, 'ab') as f:
+        f.write(b'x')
+    
+    response = client.get('/api/download/video-1', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+
+def test_inline_playback(client, output):
+    response = client.get('/api/download/video-1?inline=1')
+    assert response.headers['Content-Disposition'].startswith('inline')
+
+def test_x_accel_offload_leaves_bytes_to_proxy(client, output, monkeypatch):
+    monkeypatch.setattr(Config, 'DOWNLOAD_OFFLOAD', 'x-accel')
+    response = client.get('/api/download/video-1')
+    
+    assert response.headers['X-Accel-Redirect'] == Config.X_ACCEL_REDIRECT_PREFIX + 'final_job.mp4'
+    assert response.data == b''
+    
+    etag = response.headers['ETag']
+    assert client.get('/api/download/video-1', headers={'If-None-Match': etag}).status_code == 304
+
+def test_missing_output_is_404(client, output):
+    os.remove(output)
+    assert client.get('/api/download/video-1').status_code == 404
@@ -0,0 +1,89 @@
+import threading
+import time
+import fakeredis
+import pytest
+from config import Config
+import ffmpeg_governor
+
+@pytest.fixture(autouse=True)
+def slots(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, 'FFMPEG_LOCK_DIR', str(tmp_path / 'locks'))
+    monkeypatch.setattr(Config, 'FFMPEG_SLOTS', 2)
+    monkeypatch.setattr(Config, 'FFMPEG_INTERACTIVE_SLOTS', 1)
+    monkeypatch.setattr(Config, 'FFMPEG_THREADS_PER_JOB', 3)
+    monkeypatch.setattr(Config, 'FFMPEG_SLOT_POLL_INTERVAL', 0.01)
+    redis_client = fakeredis.FakeRedis()
+    monkeypatch.setattr(ffmpeg_governor, '_redis', lambda: redis_client)
+    return redis_client
+
+def _cancel_after(seconds):
+    cancel_event = threading.Event()
+    threading.Timer(seconds, cancel_event.set).start()
+    return cancel_event
+
+def test_prepare_limits_ffmpeg_threads():
+    cmd = ffmpeg_governor.prepare(['ffmpeg', '-i', 'in.mp4', 'out.mp4'], ffmpeg_governor.INTERACTIVE)
+    assert cmd == [
+        'ffmpeg', '-filter_threads', '3', '-filter_complex_threads', '3', '-threads', '3',
+        '-i', 'in.mp4', 'out.mp4'
+    ]
+
+def test_prepare_keeps_explicit_input_threads():
+    cmd = ffmpeg_governor.prepare(['ffmpeg', '-threads', '1', '-i', 'in.mp4', 'out.mp4'], ffmpeg_governor.INTERACTIVE)
+    assert cmd.count('-threads') == 1
+    assert cmd[cmd.index('-threads') + 1] == '1'
+
+def test_prepare_leaves_ffprobe_alone():
+    cmd = ['ffprobe', '-v', 'error', 'in.mp4']
+    assert ffmpeg_governor.prepare(cmd, ffmpeg_governor.INTERACTIVE) == cmd
+
+def test_prepare_lowers_batch_priority(monkeypatch):
+    monkeypatch.setattr(ffmpeg_governor, '_NICE', '/usr/bin/nice')
+    monkeypatch.setattr(ffmpeg_governor, '_IONICE', '/usr/bin/ionice')
+    cmd = ffmpeg_governor.prepare(['ffprobe', 'in.mp4'], ffmpeg_governor.BATCH)
+    
+    assert cmd[:5] == ['/usr/bin/ionice', '-t', '-c', '2', '-n']
+    assert cmd[6:9] == ['/usr/bin/nice', '-n', str(Config.FFMPEG_BATCH_NICE)]
+    assert cmd[-2:] == ['ffprobe', 'in.mp4']
+
+def test_batch_cannot_take_the_interactive_slot():
+    with ffmpeg_governor.slot(ffmpeg_governor.BATCH) as waited:
+        assert waited is not None
+        assert ffmpeg_governor.slots_in_use() == 1
+        
+        # Tek batch yuvası dolu: ikinci batch işi iptal edilene kadar bekler
+        with ffmpeg_governor.slot(ffmpeg_governor.BATCH, _cancel_after(0.2)) as second:
+            assert second is None
+            
+        # Ayrılmış yuva etkileşimli işe açıktır
+        with ffmpeg_governor.slot(ffmpeg_governor.INTERACTIVE) as interactive:
+            assert interactive is not None
+            assert ffmpeg_governor.slots_in_use() == 2
+            
+    assert ffmpeg_governor.slots_in_use() == 0
+
+def test_long_wait_never_runs_without_slot(slots, monkeypatch):
+    monkeypatch.setattr(Config, 'FFMPEG_SLOT_WARN_AFTER', 0)
+    
+    with ffmpeg_governor.slot(ffmpeg_governor.BATCH):
+        started = time.monotonic()
+        with ffmpeg_governor.slot(ffmpeg_governor.BATCH, _cancel_after(0.3)) as waited:
+            # Uyarı süresi geçse de yuva beklenir; yalnızca iptal bekleyişi bitirir
+            assert waited is None
+        assert time.monotonic() - started >= 0.3
+        
+    assert int(slots.hget(ffmpeg_governor.STATS_KEY, 'ffmpeg:batch:long_slot_waits')) == 1
+
+def test_waiter_gets_slot_when_released():
+    def hold():
+        with ffmpeg_governor.slot(ffmpeg_governor.BATCH):
+            time.sleep(0.2)
+    
+    thread = threading.Thread(target=hold)
+    thread.start()
+    time.sleep(0.05)
+    
+    with ffmpeg_governor.slot(ffmpeg_governor.BATCH) as waited:
+        # Tutan iş yuvayı bırakana kadar beklenir
+        assert waited >= 0.1
+    thread.join()
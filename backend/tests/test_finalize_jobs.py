@@ -0,0 +1,167 @@
+import os
+import pytest
+from config import Config
+from utils import validate_cuts
+import finalize_jobs
+
+PROBE = {
+    'container': 'mov,mp4,m4a,3gp,3g2,mj2',
+    'bit_rate': 4000000,
+    'video': {'codec': 'h264', 'width': 1920, 'height': 1080, 'fps': 30},
+    'audio': {'codec': 'aac'}
+}
+
+def test_job_hash_depends_on_content_cuts_and_profile(make_cuts):
+    cuts = make_cuts((0, 10), (20, 30))
+    job_hash = finalize_jobs.make_job_hash('content', cuts)
+    
+    assert job_hash == finalize_jobs.make_job_hash('content', make_cuts((0, 10), (20, 30)))
+    assert job_hash != finalize_jobs.make_job_hash('other', cuts)
+    assert job_hash != finalize_jobs.make_job_hash('content', make_cuts((20, 30), (0, 10)))
+    assert job_hash != finalize_jobs.make_job_hash('content', cuts, '720p')
+    # Yazım farkı (00:00:10 ile 10) aynı kesimdir
+    same = validate_cuts([{'start': '0', 'end': '00:00:10'}, {'start': '20', 'end': '30'}], 1000)
+    assert job_hash == finalize_jobs.make_job_hash('content', same)
+
+def test_job_hash_changes_with_render_settings(make_cuts, monkeypatch):
+    cuts = make_cuts((0, 10))
+    job_hash = finalize_jobs.make_job_hash('content', cuts)
+    monkeypatch.setattr(Config, 'FINALIZE_REENCODE', not Config.FINALIZE_REENCODE)
+    assert job_hash != finalize_jobs.make_job_hash('content', cuts)
+
+def test_second_task_attaches_to_running_job(redis_client):
+    assert finalize_jobs.claim(redis_client, 'job', 'task-1', 'video-1') == (True, 'task-1')
+    assert finalize_jobs.claim(redis_client, 'job', 'task-2', 'video-2') == (False, 'task-1')
+    
+    assert finalize_jobs.is_attached(redis_client, 'job', 'video-1')
+    assert finalize_jobs.is_attached(redis_client, 'job', 'video-2')
+
+def test_redelivered_task_keeps_its_claim(redis_client):
+    finalize_jobs.claim(redis_client, 'job', 'task-1', 'video-1')
+    # Worker kaybından sonra aynı görev yeniden teslim edilir
+    assert finalize_jobs.claim(redis_client, 'job', 'task-1', 'video-1') == (True, 'task-1')
+    assert redis_client.scard('finalize_job_videos:job') == 1
+
+def test_release_returns_waiters_once(redis_client):
+    finalize_jobs.claim(redis_client, 'job', 'task-1', 'video-1')
+    finalize_jobs.attach(redis_client, 'job', 'video-2')
+    
+    # Sahibi olmayan görev bırakamaz
+    assert finalize_jobs.release(redis_client, 'job', 'task-2') == []
+    assert sorted(finalize_jobs.release(redis_client, 'job', 'task-1')) == ['video-1', 'video-2']
+    assert finalize_jobs.release(redis_client, 'job', 'task-1') == []
+    assert finalize_jobs.get_owner(redis_client, 'job') is None
+    
+    # Bırakılan iş yeniden sahiplenilebilir
+    assert finalize_jobs.claim(redis_client, 'job', 'task-3')[0]
+
+def test_detach_counts_remaining_waiters(redis_client):
+    finalize_jobs.claim(redis_client, 'job', 'task-1', 'video-1')
+    finalize_jobs.attach(redis_client, 'job', 'video-2')
+    
+    assert finalize_jobs.detach(redis_client, 'job', 'video-1') == 1
+    assert finalize_jobs.detach(redis_client, 'job', 'video-1') == 1
+    assert finalize_jobs.detach(redis_client, 'job', 'video-2') == 0
+    assert not finalize_jobs.is_attached(redis_client, 'job', 'video-2')
+
+def test_result_without_output_file_is_dropped(redis_client):
+    output_path = finalize_jobs.output_path_for('job')
+    finalize_jobs.save_result(redis_client, 'job', {'output_path': output_path})
+    assert finalize_jobs.get_result(redis_client, 'job') is None
+    assert not redis_client.exists('finalize_result:job')
+    
+    open(output_path, 'wb').close()
+    finalize_jobs.save_result(redis_client, 'job', {'output_path': output_path})
+    assert finalize_jobs.get_result(redis_client, 'job') == {'output_path': output_path}
+
+def test_current_job_is_cleared_only_by_its_task(redis_client):
+    finalize_jobs.set_current(redis_client, 'video-1', 'task-2', 'job-2')
+    finalize_jobs.clear_current(redis_client, 'video-1', 'task-1')
+    assert finalize_jobs.get_current(redis_client, 'video-1') == {'task_id': 'task-2', 'job_hash': 'job-2'}
+    
+    finalize_jobs.clear_current(redis_client, 'video-1', 'task-2')
+    assert finalize_jobs.get_current(redis_client, 'video-1') is None
+
+def test_plan_variants_shares_only_reencoded_variants(monkeypatch):
+    monkeypatch.setattr(Config, 'FINALIZE_REENCODE', False)
+    variants = finalize_jobs.plan_variants('content', PROBE, 1000, [
+        {'name': 'long', 'cuts': [{'start': '0', 'end': '60'}]},
+        {'name': 'short', 'cuts': [{'start': '0', 'end': '30'}], 'profile': '720p'}
+    ])
+    long, short = variants
+    
+    assert not long['shared']
+    # Kopyalanan varyant tekli finalize ile aynı işe karşılık gelir
+    assert long['job_hash'] == finalize_jobs.make_job_hash('content', long['cuts'])
+    assert short['shared'] and short['duration'] == 30
+    assert all(variant['status'] == 'queued' for variant in variants)
+
+def test_plan_variants_rejects_duplicate_outputs():
+    with pytest.raises(ValueError, match='aynı çıktıyı'):
+        finalize_jobs.plan_variants('content', PROBE, 1000, [
+            {'name': 'a', 'cuts': [{'start': '0', 'end': '30'}], 'profile': '720p'},
+            {'name': 'b', 'cuts': [{'start': '0', 'end': '00:00:30'}], 'profile': '720p'}
+        ])
+
+@pytest.mark.parametrize('requested', [
+    [],
+    [{'name': 'bad name!', 'cuts': [{'start': '0', 'end': '10'}]}],
+    [{'name': 'a', 'cuts': [{'start': '0', 'end': '10'}], 'profile': 'nope'}],
+    [{'name': 'a', 'cuts': [{'start': '50', 'end': '10'}]}],
+    [{'name': 'a', 'cuts': [{'start': '0', 'end': '10'}]},
+     {'name': 'a', 'cuts': [{'start': '0', 'end': '20'}]}]
+])
+def test_plan_variants_rejects_invalid_requests(requested):
+    with pytest.raises(ValueError):
+        finalize_jobs.plan_variants('content', PROBE, 1000, requested)
+
+def test_plan_variants_limits_variant_count():
+    requested = [
+        {'name': f'v{i}', 'cuts': [{'start': '0', 'end': str(i + 1)}]}
+        for i in range(Config.BATCH_MAX_VARIANTS + 1)
+    ]
+    with pytest.raises(ValueError):
+        finalize_jobs.plan_variants('content', PROBE, 1000, requested)
+
+def test_batch_variant_updates_are_kept(redis_client):
+    finalize_jobs.save_batch(redis_client, {
+        'batch_id': 'batch-1',
+        'variants': [{'name': 'a', 'status': 'queued'}, {'name': 'b', 'status': 'queued'}]
+    })
+    finalize_jobs.update_batch_variant(redis_client, 'batch-1', 'b', status='completed', output_path='x.mp4')
+    
+    a, b = finalize_jobs.get_batch(redis_client, 'batch-1')['variants']
+    assert a['status'] == 'queued'
+    assert b == {'name': 'b', 'status': 'completed', 'output_path': 'x.mp4'}
+    assert finalize_jobs.update_batch_variant(redis_client, 'missing', 'a', status='x') is None
+
+def test_checkpoint_verifies_recorded_size_and_mtime(redis_client, tmp_path):
+    part = tmp_path / 'part.mp4'
+    part.write_bytes(b'part')
+    checkpoint = finalize_jobs.FinalizeCheckpoint(redis_client, 'job')
+    
+    entry = checkpoint.record('chunk:0', str(part))
+    assert 'sha256' not in entry
+    assert checkpoint.verified('chunk:0') == entry
+    
+    # Aynı boyutta yeniden yazılan dosya değişiklik zamanından yakalanır
+    stat = part.stat()
+    os.utime(part, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+    assert checkpoint.verified('chunk:0') is None
+    # Doğrulanamayan kayıt düşülür
+    assert checkpoint.verified('chunk:0') is None
+    assert finalize_jobs.FinalizeCheckpoint.stats(redis_client) == {'reused': 1, 'invalid': 1}
+
+def test_checkpoint_rejects_missing_or_truncated_part(redis_client, tmp_path):
+    part = tmp_path / 'part.mp4'
+    part.write_bytes(b'part')
+    checkpoint = finalize_jobs.FinalizeCheckpoint(redis_client, 'job')
+    
+    checkpoint.record('segment:0', str(part))
+    part.write_bytes(b'pa')
+    assert checkpoint.verified('segment:0') is None
+    
+    part.write_bytes(b'part')
+    checkpoint.record('segment:0', str(part))
+    part.unlink()
+    assert checkpoint.verified('segment:0') is None
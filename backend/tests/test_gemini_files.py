@@ -0,0 +1,130 @@
+import os
+import time
+import threading
+import fakeredis
+import pytest
+from config import Config
+from gemini_files import GeminiFileStore, GeminiFileError
+from gemini_stub import GeminiStub
+
+@pytest.fixture(autouse=True)
+def small_chunks(monkeypatch):
+    monkeypatch.setattr(Config, 'GEMINI_UPLOAD_CHUNK_SIZE', 1024)
+    monkeypatch.setattr(Config, 'GEMINI_FILE_POLL_INTERVAL', 0)
+
+@pytest.fixture
+def video(tmp_path):
+    path = tmp_path / 'video.mp4'
+    path.write_bytes(os.urandom(3000))
+    return str(path)
+
+def _uploaded(stub):
+    (file,) = stub.files.values()
+    return file['data']
+
+def test_uploads_in_chunks_and_waits_until_active(video):
+    with GeminiStub(processing_polls=2) as stub:
+        store = GeminiFileStore('test-key', base_url=stub.base_url)
+        file_info = store.get_or_upload(video, 'video-1', 'video/mp4')
+        
+        assert file_info['state'] == 'ACTIVE'
+        assert file_info['uri'].startswith(stub.base_url)
+        assert _uploaded(stub) == open(video, 'rb').read()
+        assert stub.commands().count('upload') == 2
+        assert stub.commands().count('upload, finalize') == 1
+
+def test_resumes_after_partial_chunk(video):
+    with GeminiStub() as stub:
+        stub.drop_next_chunk_after = 300
+        store = GeminiFileStore('test-key', base_url=stub.base_url)
+        store.get_or_upload(video, 'video-1', 'video/mp4')
+        
+        # Sağlayıcının aldığı 300 bayttan devam edilir, dosya eksiksiz
+        assert 'query' in stub.commands()
+        assert _uploaded(stub) == open(video, 'rb').read()
+
+def test_gives_up_after_retries(video, monkeypatch):
+    monkeypatch.setattr(Config, 'GEMINI_UPLOAD_RETRIES', 0)
+    with GeminiStub() as stub:
+        stub.drop_next_chunk_after = 0
+        store = GeminiFileStore('test-key', base_url=stub.base_url)
+        
+        with pytest.raises(GeminiFileError):
+            store.get_or_upload(video, 'video-1', 'video/mp4')
+
+def test_handle_is_cached_until_expiry_margin(video):
+    redis_client = fakeredis.FakeRedis()
+    with GeminiStub() as stub:
+        store = GeminiFileStore('test-key', redis_client, base_url=stub.base_url)
+        first = store.get_or_upload(video, 'video-1', 'video/mp4')
+        second = store.get_or_upload(video, 'video-1', 'video/mp4')
+        
+        assert second == first
+        assert stub.commands().count(None) == 0
+        assert len(stub.sessions) == 1
+        
+        ttl = redis_client.ttl('gemini_file:video-1')
+        expected = 48 * 3600 - Config.GEMINI_FILE_EXPIRY_MARGIN
+        assert expected - 60 < ttl <= expected
+        assert not redis_client.exists('gemini_file_lock:video-1')
+
+def test_handle_expiring_within_margin_is_not_cached(video):
+    redis_client = fakeredis.FakeRedis()
+    with GeminiStub(expires_in=Config.GEMINI_FILE_EXPIRY_MARGIN - 60) as stub:
+        store = GeminiFileStore('test-key', redis_client, base_url=stub.base_url)
+        store.get_or_upload(video, 'video-1', 'video/mp4')
+        store.get_or_upload(video, 'video-1', 'video/mp4')
+        
+        assert len(stub.sessions) == 2
+        assert not redis_client.exists('gemini_file:video-1')
+
+def test_parse_expiry_handles_nanoseconds_and_garbage():
+    assert GeminiFileStore._parse_expiry('2030-01-01T00:00:00.500000000Z') == 1893456000.5
+    assert GeminiFileStore._parse_expiry(None) > time.time()
+
+def test_falls_back_to_inline_for_small_videos(video, monkeypatch):
+    from gemini_client import GeminiClient
+    monkeypatch.setattr(Config, 'GEMINI_API_KEY', 'test-key')
+    monkeypatch.setattr(Config, 'GEMINI_VIDEO_MODE', 'upload')
+    
+    with GeminiStub(fail_start=True) as stub:
+        client = GeminiClient()
+        client.file_store = GeminiFileStore('test-key', base_url=stub.base_url)
+        part = client._get_video_part(video, 'video-1', 'video/mp4')
+        assert part.inline_data.data == open(video, 'rb').read()
+        
+        monkeypatch.setattr(Config, 'GEMINI_INLINE_MAX_BYTES', 100)
+        with pytest.raises(OSError):
+            client._get_video_part(video, 'video-1', 'video/mp4')
+
+def test_follower_takes_over_when_leader_fails(video, redis_client):
+    # Başka bir süreç yüklemeyi başlatmış, sonra sonuç yazmadan düşmüş
+    redis_client.set('gemini_file_lock:video-1', '1')
+    threading.Timer(0.2, redis_client.delete, ['gemini_file_lock:video-1']).start()
+    
+    with GeminiStub() as stub:
+        store = GeminiFileStore('test-key', redis_client, base_url=stub.base_url)
+        started = time.time()
+        file_info = store.get_or_upload(video, 'video-1', 'video/mp4')
+        
+        assert time.time() - started < 5
+        assert file_info['state'] == 'ACTIVE'
+        assert len(stub.sessions) == 1
+        assert not redis_client.exists('gemini_file_lock:video-1')
+
+def test_follower_reuses_leader_upload(video, redis_client):
+    with GeminiStub() as stub:
+        leader = GeminiFileStore('test-key', redis_client, base_url=stub.base_url)
+        redis_client.set('gemini_file_lock:video-1', '1')
+        
+        def finish_leader():
+            file_info = leader._wait_until_active(leader._upload(video, 'video/mp4'))
+            leader._set_cached('video-1', file_info)
+            redis_client.delete('gemini_file_lock:video-1')
+        threading.Timer(0.2, finish_leader).start()
+        
+        follower = GeminiFileStore('test-key', redis_client, base_url=stub.base_url)
+        file_info = follower.get_or_upload(video, 'video-1', 'video/mp4')
+        
+        assert file_info['state'] == 'ACTIVE'
+        assert len(stub.sessions) == 1
@@ -0,0 +1,56 @@
+import threading
+import time
+from utils import cut_video_segments_parallel
+
+def _jobs(tmp_path, count):
+    return [(str(tmp_path / f'segment_{i}.mp4'), i, i + 1) for i in range(count)]
+
+def _waiting_cutter(failing=()):
+    """Başarısız olan ya da durdurulana kadar çalışan sahte kesici"""
+    stopped = []
+    
+    def cutter(input_path, output_path, start, end, cancel_event, on_progress):
+        if start in failing:
+            return False
+        if cancel_event.wait(5):
+            stopped.append(start)
+            return False
+        open(output_path, 'wb').close()
+        return True
+    return cutter, stopped
+
+def test_failed_segment_stops_siblings_without_cancelling_caller(tmp_path):
+    cutter, stopped = _waiting_cutter(failing={0})
+    cancel_event = threading.Event()
+    started = time.monotonic()
+    
+    assert not cut_video_segments_parallel(
+        'in.mp4', _jobs(tmp_path, 3), max_workers=3, cutter=cutter, cancel_event=cancel_event
+    )
+    assert time.monotonic() - started < 2
+    assert sorted(stopped) == [1, 2]
+    # Görevin iptal olayı kullanıcı iptali değildir, dokunulmaz
+    assert not cancel_event.is_set()
+
+def test_caller_cancel_reaches_running_segments(tmp_path):
+    cutter, stopped = _waiting_cutter()
+    cancel_event = threading.Event()
+    threading.Timer(0.2, cancel_event.set).start()
+    
+    assert not cut_video_segments_parallel(
+        'in.mp4', _jobs(tmp_path, 2), max_workers=2, cutter=cutter, cancel_event=cancel_event
+    )
+    assert sorted(stopped) == [0, 1]
+    assert not list(tmp_path.glob('segment_*.mp4'))
+
+def test_all_segments_done_in_order(tmp_path):
+    done = []
+    
+    def cutter(input_path, output_path, start, end, cancel_event, on_progress):
+        open(output_path, 'wb').close()
+        return True
+    
+    assert cut_video_segments_parallel(
+        'in.mp4', _jobs(tmp_path, 4), cutter=cutter, on_segment_done=done.append
+    )
+    assert sorted(done) == [0, 1, 2, 3]
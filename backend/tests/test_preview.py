@@ -0,0 +1,48 @@
+import pytest
+from config import Config
+import preview
+
+@pytest.fixture(autouse=True)
+def four_second_segments(monkeypatch):
+    monkeypatch.setattr(Config, 'PREVIEW_SEGMENT_SECONDS', 4)
+
+def test_cuts_are_split_into_segments_on_one_timeline(make_cuts):
+    segments = preview.plan_preview_segments(make_cuts((10, 19), (100, 103)))
+    
+    assert segments == [
+        {'start': 10, 'duration': 4, 'offset': 0},
+        {'start': 14, 'duration': 4, 'offset': 4},
+        {'start': 18, 'duration': 1, 'offset': 8},
+        {'start': 100, 'duration': 3, 'offset': 9}
+    ]
+
+def test_fractional_cut_leaves_no_empty_segment(make_cuts):
+    segments = preview.plan_preview_segments(make_cuts((0, 8.0004)))
+    assert [segment['duration'] for segment in segments] == [4, 4]
+
+def test_playlist_lists_every_segment(make_cuts):
+    segments = preview.plan_preview_segments(make_cuts((0, 6.5)))
+    playlist = preview.build_playlist(segments)
+    
+    assert playlist.splitlines() == [
+        '#EXTM3U',
+        '#EXT-X-VERSION:3',
+        '#EXT-X-PLAYLIST-TYPE:VOD',
+        '#EXT-X-TARGETDURATION:4',
+        '#EXT-X-MEDIA-SEQUENCE:0',
+        '#EXTINF:4.000,',
+        'segment/0.ts',
+        '#EXTINF:2.500,',
+        'segment/1.ts',
+        '#EXT-X-ENDLIST'
+    ]
+
+def test_preview_id_and_segment_paths_are_stable(make_cuts):
+    cuts = make_cuts((0, 10))
+    assert preview.make_preview_id('content', cuts) == preview.make_preview_id('content', make_cuts((0, 10)))
+    assert preview.make_preview_id('content', cuts) != preview.make_preview_id('content', make_cuts((0, 11)))
+    
+    first, second = preview.plan_preview_segments(make_cuts((0, 4), (0, 4)))
+    # Aynı kaynak aralığı farklı konumda ayrı segmenttir (zaman damgaları farklı)
+    assert preview.segment_cache_path('content', first) != preview.segment_cache_path('content', second)
+    assert preview.segment_cache_path('content', first) == preview.segment_cache_path('content', dict(first))
@@ -0,0 +1,39 @@
+from utils import FFmpegProgress, _progress_seconds
+
+def test_progress_seconds_reads_microseconds():
+    assert _progress_seconds({'out_time_us': '2500000'}) == 2.5
+    # out_time_ms da mikro saniyedir
+    assert _progress_seconds({'out_time_ms': '1000000'}) == 1.0
+    assert _progress_seconds({'out_time_us': 'N/A'}) == 0.0
+    assert _progress_seconds({'out_time_us': '-5'}) == 0.0
+
+def test_progress_sums_parallel_processes():
+    published = []
+    progress = FFmpegProgress(100, published.append, interval=0)
+    
+    progress.callback(0)({'out_time_us': '20000000', 'progress': 'continue'})
+    progress.callback(1)({'out_time_us': '30000000', 'progress': 'continue'})
+    
+    assert published[-1]['processed_seconds'] == 50
+    assert published[-1]['percent'] == 50.0
+    assert published[-1]['total_seconds'] == 100
+    assert published[-1]['speed'] > 0
+
+def test_progress_is_throttled_but_end_is_always_published():
+    published = []
+    progress = FFmpegProgress(10, published.append, interval=3600)
+    on_progress = progress.callback()
+    
+    on_progress({'out_time_us': '1000000', 'progress': 'continue'})
+    on_progress({'out_time_us': '2000000', 'progress': 'continue'})
+    assert len(published) == 1
+    
+    on_progress({'out_time_us': '10000000', 'progress': 'end'})
+    assert len(published) == 2
+    assert published[-1]['percent'] == 100.0
+
+def test_progress_is_capped_at_total():
+    published = []
+    progress = FFmpegProgress(10, published.append, interval=0)
+    progress.callback()({'out_time_us': '15000000', 'progress': 'end'})
+    assert published[-1]['percent'] == 100.0
@@ -0,0 +1,43 @@
+from utils import cuts_in_order, _cut_inputs, _build_trim_filter, _build_variants_filter
+
+def test_cuts_in_order(make_cuts):
+    assert cuts_in_order(make_cuts((0, 10), (10, 20), (30, 40)))
+    assert not cuts_in_order(make_cuts((30, 40), (0, 10)))
+    assert not cuts_in_order(make_cuts((0, 20), (10, 30)))
+
+def test_unsorted_cuts_get_one_seeked_input_each(make_cuts):
+    cuts = make_cuts((300, 310), (5, 20), (100, 130))
+    args = _cut_inputs('in.mp4', cuts, threads=2)
+    
+    assert args == [
+        '-threads', '2', '-ss', '300.0', '-t', '10.0', '-i', 'in.mp4',
+        '-threads', '2', '-ss', '5.0', '-t', '15.0', '-i', 'in.mp4',
+        '-threads', '2', '-ss', '100.0', '-t', '30.0', '-i', 'in.mp4'
+    ]
+    
+    graph = _build_trim_filter(cuts, with_audio=True)
+    # Tek girişi trim ile bölen grafik sırasız kesimlerde kareleri biriktirir
+    assert 'trim' not in graph
+    assert '[0:v:0]' in graph and '[2:a:0]' in graph
+    assert graph.endswith('[v0][a0][v1][a1][v2][a2]concat=n=3:v=1:a=1[outv][outa]')
+
+def test_variants_filter_shares_decode_only_for_ordered_cuts(make_cuts):
+    variants = [
+        {'cuts': make_cuts((0, 10), (20, 30)), 'profile': None},
+        {'cuts': make_cuts((50, 60), (0, 5)), 'profile': {'height': 720}}
+    ]
+    graph, inputs = _build_variants_filter(variants, with_audio=False)
+    
+    assert inputs == [None] + variants[1]['cuts']
+    assert '[0:v]split=2[s0][s1]' in graph
+    assert '[1:v:0]setpts=PTS-STARTPTS[v1_0]' in graph
+    assert '[2:v:0]setpts=PTS-STARTPTS[v1_1]' in graph
+    assert '[cv1]scale' in graph
+
+def test_variants_filter_without_ordered_variants_skips_full_input(make_cuts):
+    variants = [{'cuts': make_cuts((50, 60), (0, 5)), 'profile': None}]
+    graph, inputs = _build_variants_filter(variants, with_audio=True)
+    
+    assert inputs == variants[0]['cuts']
+    assert 'split' not in graph
+    assert '[1:a:0]asetpts=PTS-STARTPTS[a0_1]' in graph
@@ -0,0 +1,57 @@
+import pytest
+from config import Config
+from render_planner import plan_render, X264_PRESET_THROUGHPUT
+
+def _probe(container='mov,mp4,m4a,3gp,3g2,mj2', video_codec='h264', audio_codec='aac'):
+    return {
+        'container': container,
+        'bit_rate': 8000000,
+        'video': {'codec': video_codec, 'width': 1920, 'height': 1080, 'fps': 30},
+        'audio': {'codec': audio_codec} if audio_codec else None
+    }
+
+@pytest.fixture(autouse=True)
+def fixed_threads(monkeypatch):
+    monkeypatch.setattr(Config, 'RENDER_THREADS', 4)
+
+def test_mp4_source_is_copied():
+    plan = plan_render(_probe(), 60)
+    assert plan['strategy'] == 'copy'
+    assert plan['segmentable']
+    assert (plan['video_codec'], plan['audio_codec']) == ('copy', 'copy')
+    assert plan['estimated_seconds'] >= 0
+
+def test_mkv_with_compatible_codecs_is_remuxed():
+    plan = plan_render(_probe(container='matroska,webm'), 60)
+    assert plan['strategy'] == 'remux'
+    assert plan['segmentable']
+
+def test_incompatible_audio_is_converted_and_not_segmentable():
+    plan = plan_render(_probe(container='matroska,webm', audio_codec='opus'), 60)
+    assert plan['strategy'] == 'remux'
+    assert plan['audio_codec'] == 'aac'
+    assert not plan['segmentable']
+
+def test_incompatible_video_is_transcoded():
+    plan = plan_render(_probe(container='matroska,webm', video_codec='vp9'), 60)
+    assert plan['strategy'] == 'transcode'
+    assert plan['video_codec'] == 'libx264'
+    assert plan['preset'] in [preset for preset, _ in X264_PRESET_THROUGHPUT]
+    assert plan['threads'] == 4
+    assert not plan['segmentable']
+
+def test_reencode_request_forces_transcode():
+    assert plan_render(_probe(), 60, reencode=True)['strategy'] == 'transcode'
+
+def test_faster_target_picks_faster_preset(monkeypatch):
+    presets = [preset for preset, _ in X264_PRESET_THROUGHPUT]
+    monkeypatch.setattr(Config, 'RENDER_TARGET_SPEED', 0.01)
+    slow = plan_render(_probe(video_codec='vp9'), 60)['preset']
+    monkeypatch.setattr(Config, 'RENDER_TARGET_SPEED', 1000)
+    fast = plan_render(_probe(video_codec='vp9'), 60)['preset']
+    assert presets.index(fast) < presets.index(slow)
+
+def test_missing_probe_falls_back_to_copy():
+    plan = plan_render(None, 60)
+    assert plan['strategy'] == 'copy'
+    assert plan['segmentable']
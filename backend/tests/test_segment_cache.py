@@ -0,0 +1,73 @@
+import os
+import pytest
+from types import SimpleNamespace
+from config import Config
+from segment_cache import SegmentCache
+import tasks
+
+@pytest.fixture
+def cache(redis_client):
+    return SegmentCache(redis_client)
+
+def _segment(name, data=b'segment'):
+    path = os.path.join(Config.PROCESSED_FOLDER, name)
+    with open(path, 'wb') as f:
+        f.write(data)
+    return path
+
+def test_checkout_survives_eviction(cache, monkeypatch):
+    cache.put('key', _segment('rendered.mp4'))
+    work_path = os.path.join(Config.PROCESSED_FOLDER, 'job_segment_0.mp4')
+    
+    assert cache.checkout('key', work_path) == work_path
+    
+    monkeypatch.setattr(Config, 'SEGMENT_CACHE_MAX_BYTES', 0)
+    cache.evict()
+    
+    assert not cache.contains('key')
+    assert open(work_path, 'rb').read() == b'segment'
+
+def test_checkout_misses_when_segment_is_gone(cache):
+    work_path = os.path.join(Config.PROCESSED_FOLDER, 'job_segment_0.mp4')
+    
+    assert cache.checkout('key', work_path) is None
+    assert not os.path.exists(work_path)
+    assert cache.stats()['misses'] == 1
+
+def test_linked_put_keeps_the_callers_copy(cache, monkeypatch):
+    work_path = _segment('job_segment_0.mp4')
+    cache.put('key', work_path, link=True)
+    assert cache.contains('key')
+    
+    monkeypatch.setattr(Config, 'SEGMENT_CACHE_MAX_BYTES', 0)
+    cache.evict()
+    
+    assert open(work_path, 'rb').read() == b'segment'
+    assert cache.stats()['total_bytes'] == 0
+
+def test_render_merges_hits_evicted_by_another_job(cache, redis_client, monkeypatch, make_cuts):
+    monkeypatch.setattr(tasks, 'segment_cache', cache)
+    monkeypatch.setattr(tasks, 'artifacts', SimpleNamespace(forget=lambda path: None))
+    monkeypatch.setattr(Config, 'SEGMENT_CACHE_MAX_BYTES', 0)
+    
+    cuts = make_cuts((0, 10), (20, 30))
+    keys = ['first', 'second']
+    for key in keys:
+        cache.put(key, _segment(f'{key}.mp4', key.encode()))
+    
+    merged = []
+    
+    def merge(segment_paths, output_path, **kwargs):
+        # Birleştirmeden hemen önce başka bir iş önbelleği boşaltır
+        cache.evict()
+        merged.append([open(path, 'rb').read() for path in segment_paths])
+        return True
+    monkeypatch.setattr(tasks, 'merge_video_segments', merge)
+    
+    task = SimpleNamespace(_update_status=lambda *args, **kwargs: None)
+    tasks._render_with_segments(
+        task, 'video-1', 'source.mp4', cuts, 'out.mp4', cache_keys=keys, work_id='job'
+    )
+    
+    assert merged == [[b'first', b'second']]
+    assert not os.path.exists(tasks._segment_path('job', 0))
@@ -0,0 +1,81 @@
+import os
+import pytest
+from types import SimpleNamespace
+from config import Config
+import finalize_jobs
+import tasks
+
+PLAN = {'strategy': 'copy', 'audio_codec': 'copy', 'preset': None, 'threads': None}
+
+@pytest.fixture
+def render(redis_client, monkeypatch):
+    """render_cuts_single_pass ve merge_video_segments yerine dosya yazan sahteler"""
+    monkeypatch.setattr(tasks, 'redis_client', redis_client)
+    monkeypatch.setattr(tasks, 'artifacts', SimpleNamespace(
+        register=lambda *args: None, remove=lambda path: os.path.exists(path) and os.remove(path)
+    ))
+    monkeypatch.setattr(Config, 'FINALIZE_CHUNK_SECONDS', 60)
+    calls = SimpleNamespace(rendered=[], merged=[], fail_at=None)
+    
+    def render_cuts_single_pass(video_path, output_path, cuts, **kwargs):
+        if calls.fail_at == len(calls.rendered):
+            return False
+        calls.rendered.append([cut['start_seconds'] for cut in cuts])
+        with open(output_path, 'w') as f:
+            f.write(','.join(f"{cut['start_seconds']:g}" for cut in cuts))
+        return True
+    
+    def merge_video_segments(paths, output_path, **kwargs):
+        calls.merged.append([open(path).read() for path in paths])
+        open(output_path, 'w').close()
+        return True
+    
+    monkeypatch.setattr(tasks, 'render_cuts_single_pass', render_cuts_single_pass)
+    monkeypatch.setattr(tasks, 'merge_video_segments', merge_video_segments)
+    
+    def run():
+        return tasks._render_single_pass(
+            SimpleNamespace(_update_status=lambda *args, **kwargs: None),
+            'video-1', 'source.mp4', calls.cuts, 'out.mp4', PLAN, None,
+            'job', finalize_jobs.FinalizeCheckpoint(redis_client, 'job')
+        )
+    calls.run = run
+    return calls
+
+def test_short_output_is_rendered_in_one_pass(render, make_cuts):
+    render.cuts = make_cuts((0, 30), (40, 60))
+    
+    assert render.run()
+    assert render.rendered == [[0, 40]]
+    assert render.merged == []
+
+def test_long_output_is_rendered_in_checkpointed_chunks(render, make_cuts):
+    render.cuts = make_cuts((0, 50), (60, 100), (120, 130), (200, 300))
+    
+    assert render.run()
+    assert render.rendered == [[0, 60], [120, 200]]
+    assert render.merged == [['0,60', '120,200']]
+    # Birleştirilen parçalar silinir
+    assert not os.path.exists(tasks._chunk_path('job', 0))
+
+def test_resume_skips_verified_chunks(render, make_cuts):
+    render.cuts = make_cuts((0, 50), (60, 100), (120, 130), (200, 300))
+    render.fail_at = 1
+    
+    assert not render.run()
+    assert os.path.exists(tasks._chunk_path('job', 0))
+    
+    render.fail_at = None
+    assert render.run()
+    assert render.rendered == [[0, 60], [120, 200]]
+    assert render.merged == [['0,60', '120,200']]
+
+def test_discarded_job_removes_chunks(render, redis_client, make_cuts):
+    render.cuts = make_cuts((0, 50), (60, 100), (120, 130), (200, 300))
+    render.fail_at = 1
+    render.run()
+    
+    tasks._discard_job_outputs('job', len(render.cuts))
+    
+    assert not os.path.exists(tasks._chunk_path('job', 0))
+    assert not finalize_jobs.FinalizeCheckpoint(redis_client, 'job').exists()
@@ -0,0 +1,82 @@
+import json
+import time
+import threading
+import pytest
+from config import Config
+import tasks
+
+@pytest.fixture
+def client(api, redis_client, monkeypatch):
+    monkeypatch.setattr(tasks, 'redis_client', redis_client)
+    monkeypatch.setattr(Config, 'STATUS_STREAM_HEARTBEAT', 0.05)
+    monkeypatch.setattr(Config, 'STATUS_STREAM_MAX_SECONDS', 5)
+    return api.app.test_client()
+
+def _later(*updates):
+    """Durum güncellemelerini kısa aralıklarla başka bir iş parçacığından yayınla"""
+    def publish():
+        for status, message in updates:
+            time.sleep(0.1)
+            tasks.update_video_status('video-1', status, message)
+    thread = threading.Thread(target=publish)
+    thread.start()
+    return thread
+
+def _events(response):
+    return [
+        json.loads(line[len('data: '):])
+        for line in response.get_data(as_text=True).splitlines()
+        if line.startswith('data: ')
+    ]
+
+def test_stream_ends_on_terminal_status(client):
+    tasks.update_video_status('video-1', 'completed', 'Video hazır')
+    response = client.get('/api/status/video-1/stream')
+    
+    assert response.mimetype == 'text/event-stream'
+    assert [event['status'] for event in _events(response)] == ['completed']
+
+def test_stream_pushes_updates_until_requested_status(client):
+    tasks.update_video_status('video-1', 'processing', 'Video kesiliyor...')
+    thread = _later(('processing', '%50'), ('completed', 'Video hazır'), ('error', 'geç'))
+    
+    events = _events(client.get('/api/status/video-1/stream?until=completed,error'))
+    thread.join()
+    
+    assert [event['message'] for event in events] == ['Video kesiliyor...', '%50', 'Video hazır']
+    assert [event['seq'] for event in events] == [1, 2, 3]
+
+def test_stream_resumes_after_last_event_id(client):
+    tasks.update_video_status('video-1', 'processing', 'Video kesiliyor...')
+    thread = _later(('completed', 'Video hazır'))
+    
+    response = client.get('/api/status/video-1/stream', headers={'Last-Event-ID': '1'})
+    thread.join()
+    # Görülen olay tekrar gönderilmez
+    assert [event['seq'] for event in _events(response)] == [2]
+
+def test_stream_for_unknown_video(client):
+    assert _events(client.get('/api/status/missing/stream')) == [
+        {'status': 'not_found', 'message': 'Video bulunamadı'}
+    ]
+
+def test_long_poll_returns_newer_status_immediately(client):
+    tasks.update_video_status('video-1', 'processing', 'Video kesiliyor...')
+    response = client.get('/api/status/video-1/wait?since=0&timeout=5')
+    assert response.get_json()['seq'] == 1
+
+def test_long_poll_waits_for_next_status(client):
+    tasks.update_video_status('video-1', 'processing', 'Video kesiliyor...')
+    thread = _later(('completed', 'Video hazır'))
+    
+    response = client.get('/api/status/video-1/wait?since=1&timeout=5')
+    thread.join()
+    assert response.get_json()['status'] == 'completed'
+
+def test_long_poll_times_out_with_current_status(client):
+    tasks.update_video_status('video-1', 'processing', 'Video kesiliyor...')
+    response = client.get('/api/status/video-1/wait?since=1&timeout=0.2')
+    
+    assert response.status_code == 200
+    assert response.get_json()['seq'] == 1
+    assert client.get('/api/status/missing/wait').status_code == 404
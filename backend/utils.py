@@ -1,9 +1,16 @@
 import os
 import uuid
 import subprocess
+import time
 import logging
+import threading
+import contextvars
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from werkzeug.utils import secure_filename
 from config import Config
+from media_probe import probe_media
+import ffmpeg_governor
 
 logger = logging.getLogger(__name__)
 
@@ -17,20 +24,9 @@ def generate_video_id():
     return str(uuid.uuid4())
 
 def get_video_duration(video_path):
-    """Video süresini saniye cinsinden al"""
-    try:
-        cmd = [
-            'ffprobe', 
-            '-v', 'error', 
-            '-show_entries', 'format=duration', 
-            '-of', 'default=noprint_wrappers=1:nokey=1', 
-            video_path
-        ]
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        return float(result.stdout.strip())
-    except Exception as e:
-        logger.error(f"Video süresi alınamadı: {str(e)}")
-        return 0
+    """Video süresini saniye cinsinden al (ayrıntılar için media_probe.probe_media)"""
+    probe = probe_media(video_path)
+    return probe['duration'] if probe else 0
 
 def timestamp_to_seconds(timestamp):
     """HH:MM:SS formatındaki zaman damgasını saniyeye çevir"""
@@ -47,15 +43,144 @@ def timestamp_to_seconds(timestamp):
     except:
         return 0
 
-def cut_video_segment(input_path, output_path, start_time, end_time):
+def seconds_to_timestamp(seconds):
+    """Saniyeyi HH:MM:SS.mmm formatına çevir"""
+    milliseconds = int(round(seconds * 1000))
+    hours, milliseconds = divmod(milliseconds, 3600 * 1000)
+    minutes, milliseconds = divmod(milliseconds, 60 * 1000)
+    return f"{hours:02d}:{minutes:02d}:{milliseconds / 1000:06.3f}"
+
+def run_ffmpeg(cmd, cancel_event=None, on_progress=None):
+    """FFmpeg komutunu çalıştır, iptal sinyali gelirse süreci sonlandır
+    
+    on_progress verilirse ffmpeg makine okunur ilerleme çıktısıyla
+    (-progress pipe:1) çalıştırılır ve her ilerleme bloğu sözlük olarak
+    bu fonksiyona iletilir. Süreç ffmpeg_governor üzerinden host genelindeki
+    bir yuvada, iş parçacığı bütçesi ve öncelik sınıfıyla çalışır.
+    (returncode, stderr) döner; iptal edilen süreçler için returncode None olur.
+    """
+    if on_progress is not None:
+        cmd = [cmd[0], '-progress', 'pipe:1', '-nostats'] + list(cmd[1:])
+    
+    priority = ffmpeg_governor.current_priority()
+    
+    with ffmpeg_governor.slot(priority, cancel_event) as waited:
+        if waited is None:
+            # Yuva beklenirken iptal edildi
+            return None, ''
+        
+        started = time.monotonic()
+        process = subprocess.Popen(
+            ffmpeg_governor.prepare(cmd, priority),
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True
+        )
+        
+        # stderr ayrı thread'de okunur, aksi halde dolan boru ffmpeg'i kilitler
+        stderr_tail = deque(maxlen=Config.FFMPEG_STDERR_TAIL_LINES)
+        stderr_thread = threading.Thread(target=stderr_tail.extend, args=(process.stderr,), daemon=True)
+        stderr_thread.start()
+        
+        cancelled = threading.Event()
+        finished = threading.Event()
+        
+        def watch_cancel():
+            # poll() kullanılmaz: süreci os.wait4'ten önce toplayıp kaynak bilgisini kaybettirir
+            while not finished.is_set():
+                if cancel_event.wait(0.5):
+                    if not finished.is_set():
+                        cancelled.set()
+                        process.kill()
+                    return
+        
+        if cancel_event is not None:
+            threading.Thread(target=watch_cancel, daemon=True).start()
+        
+        block = {}
+        for line in process.stdout:
+            key, _, value = line.strip().partition('=')
+            if not key:
+                continue
+            block[key] = value
+            # Her ilerleme bloğu 'progress=continue|end' satırıyla biter
+            if key == 'progress':
+                if on_progress is not None:
+                    on_progress(block)
+                block = {}
+        
+        returncode, usage = ffmpeg_governor.wait(process)
+        finished.set()
+        stderr_thread.join()
+        ffmpeg_governor.record(cmd, priority, returncode, usage, time.monotonic() - started, waited)
+    
+    if cancelled.is_set():
+        return None, ''
+    
+    return returncode, ''.join(stderr_tail)
+
+def _progress_seconds(block):
+    """İlerleme bloğundaki işlenmiş medya süresini saniye olarak al"""
+    # out_time_ms adına rağmen mikro saniye cinsindendir
+    for key in ('out_time_us', 'out_time_ms'):
+        value = block.get(key, '')
+        if value.lstrip('-').isdigit():
+            return max(int(value), 0) / 1000000
+    return 0.0
+
+class FFmpegProgress:
+    """Bir veya daha fazla ffmpeg sürecinin ilerlemesini birleştirip raporlar
+    
+    Paralel işlerde her süreç kendi anahtarıyla raporlar; toplam işlenen
+    medya süresinden yüzde, hız (medya saniyesi / duvar saniyesi) ve
+    kalan süre hesaplanır. Yayın PROGRESS_UPDATE_INTERVAL ile kısıtlanır.
+    """
+    def __init__(self, total_seconds, publish, interval=None):
+        self.total_seconds = max(total_seconds, 0.001)
+        self.publish = publish
+        self.interval = Config.PROGRESS_UPDATE_INTERVAL if interval is None else interval
+        self._processed = {}
+        self._lock = threading.Lock()
+        self._started_at = time.time()
+        self._published_at = 0
+    
+    def callback(self, key=0):
+        """run_ffmpeg için bu anahtara bağlı on_progress fonksiyonu"""
+        def on_progress(block):
+            with self._lock:
+                self._processed[key] = _progress_seconds(block)
+                finished = block.get('progress') == 'end'
+                if not finished and time.time() - self._published_at < self.interval:
+                    return
+                self._published_at = time.time()
+                snapshot = self.snapshot()
+            self.publish(snapshot)
+        return on_progress
+    
+    def snapshot(self):
+        processed = min(sum(self._processed.values()), self.total_seconds)
+        elapsed = max(time.time() - self._started_at, 0.001)
+        speed = processed / elapsed
+        
+        return {
+            'percent': round(processed / self.total_seconds * 100, 1),
+            'processed_seconds': round(processed, 2),
+            'total_seconds': round(self.total_seconds, 2),
+            'speed': round(speed, 2),
+            'eta_seconds': round((self.total_seconds - processed) / speed, 1) if speed > 0 else None
+        }
+
+def cut_video_segment(input_path, output_path, start_time, end_time, cancel_event=None,
+                      on_progress=None):
     """Video segmentini kes"""
     try:
         duration = timestamp_to_seconds(end_time) - timestamp_to_seconds(start_time)
         
         cmd = [
             'ffmpeg',
+            '-ss', str(start_time),  # Girişte arama: dosya baştan okunmaz
             '-i', input_path,
-            '-ss', str(start_time),
             '-t', str(duration),
             '-c', 'copy',  # Codec'i kopyala (hızlı kesim)
             '-avoid_negative_ts', 'make_zero',
@@ -63,10 +188,14 @@ def cut_video_segment(input_path, output_path, start_time, end_time):
             '-y'  # Üzerine yaz
         ]
         
-        result = subprocess.run(cmd, capture_output=True, text=True)
+        returncode, stderr = run_ffmpeg(cmd, cancel_event, on_progress)
         
-        if result.returncode != 0:
-            logger.error(f"FFmpeg hatası: {result.stderr}")
+        if returncode is None:
+            logger.info(f"Segment kesimi iptal edildi: {output_path}")
+            return False
+        
+        if returncode != 0:
+            logger.error(f"FFmpeg hatası: {stderr}")
             return False
             
         return True
@@ -75,34 +204,523 @@ def cut_video_segment(input_path, output_path, start_time, end_time):
         logger.error(f"Video kesme hatası: {str(e)}")
         return False
 
-def merge_video_segments(segment_paths, output_path):
-    """Video segmentlerini birleştir"""
+class _ChildEvent(threading.Event):
+    """Kendisi ya da üst olay ayarlanınca ayarlı sayılan olay
+    
+    Kardeş işleri durdurmak için ayarlanır; üst olaya (ör. görevin iptal
+    olayı) hiçbir zaman yazılmaz.
+    """
+    POLL_INTERVAL = 0.1
+    
+    def __init__(self, parent=None):
+        super().__init__()
+        self.parent = parent
+    
+    def is_set(self):
+        return super().is_set() or (self.parent is not None and self.parent.is_set())
+    
+    def wait(self, timeout=None):
+        if self.parent is None:
+            return super().wait(timeout)
+            
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self.is_set():
+            step = self.POLL_INTERVAL
+            if deadline is not None:
+                step = min(step, deadline - time.monotonic())
+                if step <= 0:
+                    return False
+            super().wait(step)
+        return True
+
+def get_segment_worker_count(job_count):
+    """Paralel kesim havuzu boyutunu CPU ve disk limitine göre belirle"""
+    workers = Config.SEGMENT_WORKERS or min(os.cpu_count() or 1, Config.DISK_PARALLELISM)
+    return max(1, min(workers, job_count))
+
+def cut_video_segments_parallel(input_path, jobs, max_workers=None, cutter=None, progress=None,
+                                on_segment_done=None, keep_completed=False, cancel_event=None):
+    """Segmentleri sınırlı bir ffmpeg havuzunda paralel kes
+    
+    jobs: (output_path, start_time, end_time) listesi; çıktı sırası korunur.
+    cutter: (input, output, start, end, cancel_event, on_progress) imzalı
+    kesici, varsayılan cut_video_segment.
+    progress: segment başına ilerlemeyi birleştiren FFmpegProgress.
+    on_segment_done: her başarılı segmentten hemen sonra indeksiyle çağrılır.
+    Bir segment başarısız olursa çalışan diğer ffmpeg süreçleri durdurulur
+    ve üretilen tüm segmentler silinir; keep_completed=True ise yalnızca
+    tamamlanmamış segmentler silinir (devam ettirilebilir işler için).
+    cancel_event: dışarıdan iptal; ayarlanınca çalışan tüm kesimler durur.
+    """
+    cutter = cutter or cut_video_segment
+    if not jobs:
+        return True
+    
+    workers = max_workers or get_segment_worker_count(len(jobs))
+    # Başarısız segment yalnızca kardeşlerini durdurur, çağıranın iptal olayını değil
+    stop_event = _ChildEvent(cancel_event)
+    failed_index = None
+    completed = set()
+    
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # Her iş parçacığı çağıranın ffmpeg öncelik sınıfını devralır
+        futures = {
+            executor.submit(
+                contextvars.copy_context().run,
+                cutter, input_path, output_path,
+                start_time, end_time, stop_event,
+                progress.callback(i) if progress else None
+            ): i
+            for i, (output_path, start_time, end_time) in enumerate(jobs)
+        }
+        
+        for future in as_completed(futures):
+            if future.cancelled():
+                continue
+            if future.result():
+                completed.add(futures[future])
+                if on_segment_done:
+                    on_segment_done(futures[future])
+            elif failed_index is None:
+                failed_index = futures[future]
+                # Kardeş işleri durdur, bekleyenler hiç başlamasın
+                stop_event.set()
+                for pending in futures:
+                    pending.cancel()
+    
+    if failed_index is not None:
+        logger.error(f"Paralel kesim başarısız, segment {failed_index}: {input_path}")
+        clean_temp_files([
+            output_path for i, (output_path, _, _) in enumerate(jobs)
+            if not (keep_completed and i in completed)
+        ])
+        return False
+    
+    return True
+
+def build_keyframe_index(video_path, codec=None):
+    """Video akışının keyframe indeksini çıkar (zaman damgası + bayt ofseti)
+    
+    Paketler çözülmeden yalnızca demux edilir, bu yüzden yükleme başına
+    bir kez çalıştırmak ucuzdur. codec verilmezse (probe yoksa) ayrıca
+    sorgulanır. Hata durumunda None döner.
+    """
     try:
-        # Geçici concat dosyası oluştur
-        concat_file = f"/tmp/concat_{uuid.uuid4()}.txt"
+        if codec is None:
+            probe = probe_media(video_path)
+            codec = probe['video']['codec'] if probe and probe['video'] else ''
+        
+        cmd = [
+            'ffprobe',
+            '-v', 'error',
+            '-select_streams', 'v:0',
+            '-show_entries', 'packet=pts_time,pos,flags',
+            '-of', 'csv=p=0',
+            video_path
+        ]
+        # Tüm paketleri demux ettiği için yuva bekler
+        result = ffmpeg_governor.run_capture(cmd, use_slot=True)
         
+        if result.returncode != 0:
+            logger.error(f"Keyframe indeksi alınamadı: {result.stderr}")
+            return None
+        
+        times = []
+        offsets = []
+        for line in result.stdout.splitlines():
+            parts = line.strip().split(',')
+            if len(parts) < 3 or 'K' not in parts[2] or parts[0] == 'N/A':
+                continue
+            times.append(round(float(parts[0]), 6))
+            offsets.append(int(parts[1]) if parts[1].isdigit() else -1)
+        
+        # Paketler dts sırasında gelir, zaman sırasına koy
+        order = sorted(range(len(times)), key=lambda i: times[i])
+        
+        return {
+            'codec': codec,
+            'times': [times[i] for i in order],
+            'offsets': [offsets[i] for i in order]
+        }
+        
+    except Exception as e:
+        logger.error(f"Keyframe indeksi hatası: {str(e)}")
+        return None
+
+# ffprobe profil adı -> libx264 -profile:v
+_X264_PROFILES = {
+    'Constrained Baseline': 'baseline',
+    'Baseline': 'baseline',
+    'Main': 'main',
+    'High': 'high',
+    'High 10': 'high10',
+    'High 4:2:2': 'high422',
+    'High 4:4:4 Predictive': 'high444'
+}
+
+def _source_encode_args(source_video):
+    """Sınır parçalarını kaynağın profil, seviye ve piksel biçimiyle kodlayan argümanlar
+    
+    source_video: probe_media çıktısındaki 'video' sözlüğü (None olabilir).
+    """
+    source_video = source_video or {}
+    args = []
+    
+    profile = _X264_PROFILES.get(source_video.get('profile'))
+    if profile:
+        args += ['-profile:v', profile]
+    level = source_video.get('level')
+    if level and level > 0:
+        args += ['-level', f'{level // 10}.{level % 10}']
+    if source_video.get('pix_fmt'):
+        args += ['-pix_fmt', source_video['pix_fmt']]
+    if source_video.get('refs'):
+        args += ['-refs', str(source_video['refs'])]
+    return args
+
+def _encode_range(input_path, output_path, start, duration, cancel_event=None, on_progress=None,
+                  source_video=None):
+    """Aralığın videosunu kare hassasiyetli yeniden kodla (MPEG-TS, ses yok)
+    
+    SPS/PPS her keyframe'de akış içine yazılır; kopyalanan parçalarla
+    birleştirildiğinde her parça kendi parametre setleriyle çözülür.
+    """
+    cmd = [
+        'ffmpeg',
+        '-ss', str(start),
+        '-i', input_path,
+        '-t', str(duration),
+        '-map', '0:v:0',
+        '-an',
+        '-c:v', 'libx264',
+        '-preset', 'veryfast',
+        '-crf', '18',
+        '-threads', str(ffmpeg_governor.thread_budget())
+    ] + _source_encode_args(source_video) + [
+        '-bsf:v', 'dump_extra',
+        '-avoid_negative_ts', 'make_zero',
+        '-f', 'mpegts',
+        output_path,
+        '-y'
+    ]
+    return run_ffmpeg(cmd, cancel_event, on_progress)
+
+def _copy_range(input_path, output_path, start, duration, cancel_event=None, on_progress=None,
+                source_video=None):
+    """Keyframe'den başlayan aralığın videosunu kopyalayarak kes (MPEG-TS, ses yok)"""
+    cmd = [
+        'ffmpeg',
+        '-ss', str(start),
+        '-i', input_path,
+        '-t', str(duration),
+        '-map', '0:v:0',
+        '-an',
+        '-c:v', 'copy',
+        # Annex-B'ye çevir ve kaynağın SPS/PPS'ini her keyframe'e ekle
+        '-bsf:v', 'h264_mp4toannexb,dump_extra',
+        '-avoid_negative_ts', 'make_zero',
+        '-f', 'mpegts',
+        output_path,
+        '-y'
+    ]
+    return run_ffmpeg(cmd, cancel_event, on_progress)
+
+def _mux_smart_parts(part_paths, input_path, output_path, start, duration, cancel_event=None):
+    """Video parçalarını birleştir, sesi tüm aralık için tek seferde kopyala
+    
+    Ses parça başına yeniden kodlanmaz: her sınırda AAC başlangıç boşluğu
+    oluşmaz. Parametre setleri örneklerin içinde kaldığı için MP4'e 'avc3'
+    olarak yazılır.
+    """
+    concat_file = f"/tmp/concat_{uuid.uuid4()}.txt"
+    
+    try:
         with open(concat_file, 'w') as f:
-            for segment_path in segment_paths:
-                f.write(f"file '{segment_path}'\n")
+            for part_path in part_paths:
+                f.write(f"file {_concat_quote(part_path)}\n")
         
         cmd = [
             'ffmpeg',
             '-f', 'concat',
             '-safe', '0',
             '-i', concat_file,
+            '-ss', str(start),
+            '-t', str(duration),
+            '-i', input_path,
+            '-map', '0:v:0',
+            '-map', '1:a?',
             '-c', 'copy',
+            '-tag:v', 'avc3',
+            '-avoid_negative_ts', 'make_zero',
+            output_path,
+            '-y'
+        ]
+        return run_ffmpeg(cmd, cancel_event)
+        
+    finally:
+        if os.path.exists(concat_file):
+            os.remove(concat_file)
+
+def _reencode_segment(input_path, output_path, start, duration, cancel_event=None,
+                      on_progress=None, source_video=None):
+    """Akıllı kesim yapılamadığında aralığın tamamını yeniden kodla
+    
+    Parametre setleri yine akış içine yazılır; diğer akıllı kesim
+    segmentleriyle birleştirilebilir.
+    """
+    cmd = [
+        'ffmpeg',
+        '-ss', str(start),
+        '-i', input_path,
+        '-t', str(duration),
+        '-map', '0:v:0',
+        '-map', '0:a?',
+        '-c:v', 'libx264',
+        '-preset', 'veryfast',
+        '-crf', '18',
+        '-threads', str(ffmpeg_governor.thread_budget())
+    ] + _source_encode_args(source_video) + [
+        '-bsf:v', 'dump_extra',
+        '-tag:v', 'avc3',
+        # Diğer akıllı kesim segmentleri gibi ses kopyalanır
+        '-c:a', 'copy',
+        '-avoid_negative_ts', 'make_zero',
+        output_path,
+        '-y'
+    ]
+    return run_ffmpeg(cmd, cancel_event, on_progress)
+
+def _offset_progress(on_progress, offset):
+    """Parça ilerlemesini segment başından itibaren raporla"""
+    if on_progress is None:
+        return None
+    
+    def wrapped(block):
+        seconds = offset + _progress_seconds(block)
+        on_progress(dict(block, out_time_us=str(int(seconds * 1000000))))
+    return wrapped
+
+def smart_cut_segment(input_path, output_path, start_time, end_time, keyframe_times,
+                      cancel_event=None, on_progress=None, source_video=None):
+    """GOP farkındalıklı kesim: iç GOP'ları kopyala, yalnızca sınırları yeniden kodla
+    
+    keyframe_times: build_keyframe_index çıktısındaki sıralı 'times' listesi.
+    source_video: probe_media çıktısındaki 'video'; sınırlar kaynağın
+    profil/seviye/piksel biçimiyle kodlanır.
+    Video parçaları SPS/PPS akış içinde olacak şekilde MPEG-TS ara
+    dosyalarına yazılıp birleştirilir, ses tüm aralık için bir kez
+    kopyalanır. Bu yol başarısız olursa aralık tamamen yeniden kodlanır.
+    """
+    start = timestamp_to_seconds(start_time)
+    end = timestamp_to_seconds(end_time)
+    epsilon = 0.001
+    
+    inner = [t for t in keyframe_times if start - epsilon <= t <= end + epsilon]
+    parts = []
+    
+    try:
+        if len(inner) < 2:
+            # Tam bir GOP içermeyen kısa aralık: tamamını kodla
+            plan = [(_encode_range, start, end - start)]
+        else:
+            first_key, last_key = inner[0], inner[-1]
+            plan = []
+            if first_key - start > epsilon:
+                plan.append((_encode_range, start, first_key - start))
+            # Keyframe'in biraz sonrasına arama, tam o keyframe'e denk gelir
+            plan.append((_copy_range, first_key + epsilon, last_key - first_key))
+            if end - last_key > epsilon:
+                plan.append((_encode_range, last_key, end - last_key))
+        
+        part_offset = 0.0
+        returncode, stderr = 0, ''
+        for i, (renderer, part_start, part_duration) in enumerate(plan):
+            part_path = f"{output_path}.part{i}.ts"
+            parts.append(part_path)
+            
+            returncode, stderr = renderer(
+                input_path, part_path, part_start, part_duration, cancel_event,
+                _offset_progress(on_progress, part_offset), source_video
+            )
+            part_offset += part_duration
+            if returncode != 0:
+                break
+        
+        if returncode == 0:
+            returncode, stderr = _mux_smart_parts(
+                parts, input_path, output_path, start, end - start, cancel_event
+            )
+        
+        if returncode is None:
+            logger.info(f"Akıllı kesim iptal edildi: {output_path}")
+            return False
+        if returncode == 0:
+            return True
+        
+        logger.warning(f"Akıllı kesim başarısız, aralık yeniden kodlanacak: {stderr}")
+        returncode, stderr = _reencode_segment(
+            input_path, output_path, start, end - start, cancel_event, on_progress, source_video
+        )
+        if returncode is None:
+            logger.info(f"Akıllı kesim iptal edildi: {output_path}")
+            return False
+        if returncode != 0:
+            logger.error(f"FFmpeg akıllı kesim hatası: {stderr}")
+            return False
+        return True
+        
+    except Exception as e:
+        logger.error(f"Akıllı kesim hatası: {str(e)}")
+        return False
+        
+    finally:
+        clean_temp_files(parts)
+
+def build_analysis_proxy(input_path, output_path):
+    """AI analizi için küçük bir vekil video üret
+    
+    Düşük çözünürlük, düşük fps ve mono düşük bit hızlı ses kullanılır.
+    Zaman ekseni korunur (hız değişimi yok, çıktı kaynakla aynı sıfır
+    noktasından başlar), bu yüzden vekil üzerindeki zaman damgaları
+    kaynakta doğrudan kullanılabilir.
+    """
+    try:
+        cmd = [
+            'ffmpeg',
+            '-i', input_path,
+            '-map', '0:v:0',
+            '-map', '0:a:0?',
+            '-vf', f"scale=-2:'min({Config.ANALYSIS_PROXY_HEIGHT},ih)',fps={Config.ANALYSIS_PROXY_FPS}",
+            '-c:v', 'libx264',
+            '-preset', 'veryfast',
+            '-crf', '32',
+            '-threads', str(ffmpeg_governor.thread_budget()),
+            '-c:a', 'aac',
+            '-ac', '1',
+            '-ar', '16000',
+            '-b:a', '32k',
+            '-movflags', '+faststart',
             output_path,
             '-y'
         ]
         
-        result = subprocess.run(cmd, capture_output=True, text=True)
+        returncode, stderr = run_ffmpeg(cmd)
+        
+        if returncode != 0:
+            logger.error(f"FFmpeg vekil video hatası: {stderr}")
+            return False
+            
+        return True
+        
+    except Exception as e:
+        logger.error(f"Vekil video oluşturma hatası: {str(e)}")
+        return False
+
+def render_preview_segment(input_path, output_path, start, duration, ts_offset):
+    """Önizleme oynatma listesi için tek bir MPEG-TS segmenti üret
+    
+    Hız için ultrafast ve düşük çözünürlük kullanılır. ts_offset segmentin
+    önizleme zaman ekseninde başladığı nokta; zaman damgaları kesimler
+    boyunca kesintisiz ilerler.
+    """
+    try:
+        cmd = [
+            'ffmpeg',
+            '-ss', str(start),
+            '-i', input_path,
+            '-t', str(duration),
+            '-map', '0:v:0',
+            '-map', '0:a:0?',
+            '-vf', f"scale=-2:'min({Config.PREVIEW_HEIGHT},ih)'",
+            '-c:v', 'libx264',
+            '-preset', 'ultrafast',
+            '-crf', '28',
+            '-threads', str(ffmpeg_governor.thread_budget()),
+            '-pix_fmt', 'yuv420p',
+            '-c:a', 'aac',
+            '-ac', '2',
+            '-b:a', '128k',
+            '-output_ts_offset', str(ts_offset),
+            '-muxdelay', '0',
+            '-f', 'mpegts',
+            output_path,
+            '-y'
+        ]
+        
+        returncode, stderr = run_ffmpeg(cmd)
+        
+        if returncode != 0:
+            logger.error(f"FFmpeg önizleme segmenti hatası: {stderr}")
+            return False
+            
+        return True
+        
+    except Exception as e:
+        logger.error(f"Önizleme segmenti oluşturma hatası: {str(e)}")
+        return False
+
+def map_proxy_cuts(cuts, video_duration):
+    """Vekil video üzerinde önerilen kesimleri kaynak zaman eksenine taşı
+    
+    Vekil aynı zaman eksenini kullandığından dönüşüm birebirdir; yalnızca
+    kaynak süresinin dışına taşan değerler kırpılır ve boşalan kesimler atılır.
+    """
+    mapped = []
+    
+    for cut in cuts:
+        start = min(max(timestamp_to_seconds(cut['start']), 0), video_duration)
+        end = min(max(timestamp_to_seconds(cut['end']), 0), video_duration)
+        
+        if end <= start:
+            continue
+        
+        mapped_cut = dict(cut)
+        if start != timestamp_to_seconds(cut['start']):
+            mapped_cut['start'] = seconds_to_timestamp(start)
+        if end != timestamp_to_seconds(cut['end']):
+            mapped_cut['end'] = seconds_to_timestamp(end)
+        mapped.append(mapped_cut)
+    
+    return mapped
+
+def _concat_quote(path):
+    """Concat demuxer dosyası için yolu tırnakla"""
+    return "'" + path.replace("'", "'\\''") + "'"
+
+def merge_video_segments(segment_paths, output_path, cancel_event=None, on_progress=None,
+                         video_tag=None):
+    """Video segmentlerini birleştir
+    
+    video_tag: akıllı kesim segmentleri için 'avc3' (parametre setleri
+    örneklerin içinde, segmentten segmente değişebilir).
+    """
+    try:
+        # Geçici concat dosyası oluştur
+        concat_file = f"/tmp/concat_{uuid.uuid4()}.txt"
+        
+        with open(concat_file, 'w') as f:
+            for segment_path in segment_paths:
+                f.write(f"file {_concat_quote(segment_path)}\n")
+        
+        cmd = [
+            'ffmpeg',
+            '-f', 'concat',
+            '-safe', '0',
+            '-i', concat_file,
+            '-c', 'copy'
+        ]
+        if video_tag:
+            cmd += ['-tag:v', video_tag]
+        cmd += [output_path, '-y']
+        
+        returncode, stderr = run_ffmpeg(cmd, cancel_event, on_progress)
         
         # Geçici dosyayı temizle
         if os.path.exists(concat_file):
             os.remove(concat_file)
         
-        if result.returncode != 0:
-            logger.error(f"FFmpeg birleştirme hatası: {result.stderr}")
+        if returncode != 0:
+            logger.error(f"FFmpeg birleştirme hatası: {stderr}")
             return False
             
         return True
@@ -111,6 +729,266 @@ def merge_video_segments(segment_paths, output_path):
         logger.error(f"Video birleştirme hatası: {str(e)}")
         return False
 
+def has_audio_stream(video_path):
+    """Videoda ses akışı olup olmadığını kontrol et"""
+    try:
+        cmd = [
+            'ffprobe',
+            '-v', 'error',
+            '-select_streams', 'a',
+            '-show_entries', 'stream=index',
+            '-of', 'csv=p=0',
+            video_path
+        ]
+        result = ffmpeg_governor.run_capture(cmd)
+        return bool(result.stdout.strip())
+    except Exception as e:
+        logger.error(f"Ses akışı kontrol edilemedi: {str(e)}")
+        return False
+
+def cuts_in_order(cuts):
+    """Kesimler kaynakta sıralı ve çakışmasız mı"""
+    return all(
+        prev['end_seconds'] <= cut['start_seconds']
+        for prev, cut in zip(cuts, cuts[1:])
+    )
+
+def _cut_inputs(input_path, cuts, threads=0):
+    """Her kesim için girişte aranan ayrı bir ffmpeg girişi (-ss/-t)
+    
+    Tek girişi trim ile bölmek, sırasız ya da çakışan kesimlerde concat
+    sırası gelene kadar çözülmüş kareleri bellekte biriktirir. Ayrı
+    girişlerde her kesim sırası gelince okunur, kesimler arası çözülmez.
+    """
+    args = []
+    for cut in cuts:
+        if threads:
+            args += ['-threads', str(threads)]
+        args += [
+            '-ss', str(cut['start_seconds']),
+            '-t', str(cut['end_seconds'] - cut['start_seconds']),
+            '-i', input_path
+        ]
+    return args
+
+def _build_trim_filter(cuts, with_audio):
+    """_cut_inputs girişlerini sırayla birleştiren concat filtre grafiği"""
+    filters = []
+    concat_inputs = ''
+    
+    for i in range(len(cuts)):
+        filters.append(f"[{i}:v:0]setpts=PTS-STARTPTS[v{i}]")
+        concat_inputs += f"[v{i}]"
+        if with_audio:
+            filters.append(f"[{i}:a:0]asetpts=PTS-STARTPTS[a{i}]")
+            concat_inputs += f"[a{i}]"
+    
+    audio_count = 1 if with_audio else 0
+    outputs = '[outv][outa]' if with_audio else '[outv]'
+    filters.append(
+        f"{concat_inputs}concat=n={len(cuts)}:v=1:a={audio_count}{outputs}"
+    )
+    return ';'.join(filters)
+
+def render_cuts_single_pass(input_path, output_path, cuts, reencode=False, cancel_event=None,
+                            on_progress=None, with_audio=None, audio_codec='copy',
+                            preset='veryfast', threads=0):
+    """Tüm kesim listesini tek ffmpeg çağrısıyla işle
+    
+    cuts: validate_cuts çıktısı (start_seconds/end_seconds alanları gerekli)
+    reencode=False: concat demuxer + inpoint/outpoint ile codec kopyalama
+    reencode=True: kesim başına -ss/-t girişi ve concat filtresi ile kare
+    hassasiyetli kesim (kesim sırası ve çakışma belleği büyütmez)
+    with_audio: probe sonucundan biliniyorsa ses akışı yeniden sorgulanmaz
+    audio_codec: kopyalama modunda ses MP4'e uyumsuzsa 'aac'
+    preset/threads: yeniden kodlama ayarları (render planından)
+    """
+    concat_file = None
+    
+    try:
+        if reencode:
+            if with_audio is None:
+                with_audio = has_audio_stream(input_path)
+            cmd = ['ffmpeg'] + _cut_inputs(
+                input_path, cuts, threads or ffmpeg_governor.thread_budget()
+            ) + [
+                '-filter_complex', _build_trim_filter(cuts, with_audio),
+                '-map', '[outv]'
+            ]
+            if with_audio:
+                cmd += ['-map', '[outa]', '-c:a', 'aac', '-b:a', '192k']
+            if threads:
+                cmd += ['-threads', str(threads)]
+            cmd += [
+                '-c:v', 'libx264',
+                '-preset', preset,
+                '-crf', '20',
+                '-movflags', '+faststart',
+                output_path,
+                '-y'
+            ]
+        else:
+            # Aynı kaynak dosyayı her kesim için inpoint/outpoint ile listele
+            concat_file = f"/tmp/concat_{uuid.uuid4()}.txt"
+            
+            with open(concat_file, 'w') as f:
+                f.write("ffconcat version 1.0\n")
+                for cut in cuts:
+                    f.write(f"file {_concat_quote(input_path)}\n")
+                    f.write(f"inpoint {cut['start_seconds']}\n")
+                    f.write(f"outpoint {cut['end_seconds']}\n")
+            
+            cmd = [
+                'ffmpeg',
+                '-f', 'concat',
+                '-safe', '0',
+                '-i', concat_file,
+                '-map', '0:v:0',
+                '-map', '0:a?',
+                '-c:v', 'copy',
+                '-c:a', audio_codec
+            ]
+            if audio_codec != 'copy':
+                cmd += ['-b:a', '192k']
+            cmd += [
+                '-avoid_negative_ts', 'make_zero',
+                '-movflags', '+faststart',
+                output_path,
+                '-y'
+            ]
+        
+        returncode, stderr = run_ffmpeg(cmd, cancel_event, on_progress)
+        
+        if returncode != 0:
+            logger.error(f"FFmpeg tek geçiş hatası: {stderr}")
+            return False
+            
+        return True
+        
+    except Exception as e:
+        logger.error(f"Tek geçiş render hatası: {str(e)}")
+        return False
+        
+    finally:
+        if concat_file and os.path.exists(concat_file):
+            os.remove(concat_file)
+
+def _profile_filter(profile):
+    """Çıktı profili için kırpma/ölçekleme filtresi (kaynak çözünürlükte None)"""
+    if not profile:
+        return None
+        
+    filters = []
+    if profile.get('aspect'):
+        ratio_w, ratio_h = profile['aspect'].split(':')
+        filters.append(
+            f"crop=w='trunc(min(iw,ih*{ratio_w}/{ratio_h})/2)*2'"
+            f":h='trunc(min(ih,iw*{ratio_h}/{ratio_w})/2)*2'"
+        )
+    if profile.get('height'):
+        filters.append(f"scale=-2:'min({profile['height']},ih)'")
+    return ','.join(filters) or None
+
+def _build_variants_filter(variants, with_audio):
+    """Tek çözülen girdiyi split/asplit ile her varyantın kesimlerine dağıt
+    
+    Yalnızca kesimleri sıralı ve çakışmasız varyantlar ortak çözmeden
+    beslenir; diğerlerinde trim kareleri concat sırası gelene kadar
+    biriktireceğinden bu varyantların her kesimi ayrı girişten okunur.
+    (filtre, girişler) döner: girişler sırayla None (tüm kaynak) ya da
+    _cut_inputs ile eklenecek kesimdir.
+    """
+    ordered = [variant for variant in variants if cuts_in_order(variant['cuts'])]
+    total = sum(len(variant['cuts']) for variant in ordered)
+    inputs = [None] if total else []
+    filters = []
+    if total:
+        filters.append(f"[0:v]split={total}" + ''.join(f"[s{k}]" for k in range(total)))
+        if with_audio:
+            filters.append(f"[0:a]asplit={total}" + ''.join(f"[as{k}]" for k in range(total)))
+    
+    k = 0
+    for j, variant in enumerate(variants):
+        shared = cuts_in_order(variant['cuts'])
+        concat_inputs = ''
+        for i, cut in enumerate(variant['cuts']):
+            start, end = cut['start_seconds'], cut['end_seconds']
+            if shared:
+                filters.append(f"[s{k}]trim=start={start}:end={end},setpts=PTS-STARTPTS[v{j}_{i}]")
+                if with_audio:
+                    filters.append(f"[as{k}]atrim=start={start}:end={end},asetpts=PTS-STARTPTS[a{j}_{i}]")
+                k += 1
+            else:
+                n = len(inputs)
+                inputs.append(cut)
+                filters.append(f"[{n}:v:0]setpts=PTS-STARTPTS[v{j}_{i}]")
+                if with_audio:
+                    filters.append(f"[{n}:a:0]asetpts=PTS-STARTPTS[a{j}_{i}]")
+            concat_inputs += f"[v{j}_{i}]"
+            if with_audio:
+                concat_inputs += f"[a{j}_{i}]"
+        
+        profile_filter = _profile_filter(variant.get('profile'))
+        video_label = f"[cv{j}]" if profile_filter else f"[outv{j}]"
+        outputs = video_label + (f"[outa{j}]" if with_audio else '')
+        filters.append(
+            f"{concat_inputs}concat=n={len(variant['cuts'])}:v=1:a={1 if with_audio else 0}{outputs}"
+        )
+        if profile_filter:
+            filters.append(f"[cv{j}]{profile_filter}[outv{j}]")
+    
+    return ';'.join(filters), inputs
+
+def render_variants_shared_pass(input_path, variants, with_audio=None, cancel_event=None,
+                                on_progress=None, preset='veryfast', threads=0):
+    """Birden fazla kesim listesini/profili tek çözmeyle render et
+    
+    variants: [{'output_path', 'cuts', 'profile'}] (cuts: validate_cuts
+    çıktısı, profile: Config.OUTPUT_PROFILES değeri)
+    Kaynak bir kez demux edilip çözülür, kareler split/asplit ile her
+    varyantın trim/concat zincirine ve ayrı kodlayıcı/muxer'ına dağıtılır.
+    Kesimleri sırasız ya da çakışan varyantlar kesim başına ayrı girişten
+    okunur (bkz. _build_variants_filter).
+    threads: toplam kodlama iş parçacığı bütçesi, varyantlara bölünür.
+    """
+    try:
+        if with_audio is None:
+            with_audio = has_audio_stream(input_path)
+            
+        filter_graph, inputs = _build_variants_filter(variants, with_audio)
+        cmd = ['ffmpeg', '-y']
+        for cut in inputs:
+            cmd += ['-i', input_path] if cut is None else _cut_inputs(input_path, [cut])
+        cmd += ['-filter_complex', filter_graph]
+        
+        variant_threads = max(threads // len(variants), 1) if threads else 0
+        for j, variant in enumerate(variants):
+            cmd += ['-map', f'[outv{j}]']
+            if with_audio:
+                cmd += ['-map', f'[outa{j}]', '-c:a', 'aac', '-b:a', '192k']
+            if variant_threads:
+                cmd += ['-threads', str(variant_threads)]
+            cmd += [
+                '-c:v', 'libx264',
+                '-preset', preset,
+                '-crf', '20',
+                '-pix_fmt', 'yuv420p',
+                '-movflags', '+faststart',
+                variant['output_path']
+            ]
+        
+        returncode, stderr = run_ffmpeg(cmd, cancel_event, on_progress)
+        
+        if returncode != 0:
+            logger.error(f"FFmpeg çoklu varyant hatası: {stderr}")
+            return False
+            
+        return True
+        
+    except Exception as e:
+        logger.error(f"Çoklu varyant render hatası: {str(e)}")
+        return False
+
 def clean_temp_files(file_paths):
     """Geçici dosyaları temizle"""
     for file_path in file_paths:
@@ -22,6 +22,57 @@ import Timeline from '../components/Timeline'
 
 const API_URL = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:5000'
 
+// Durum değişikliklerini sunucu itmesiyle izle; 'until' durumlarından birine
+// ulaşınca durur. Geri dönen fonksiyon izlemeyi iptal eder.
+const watchStatus = (videoId, until, onStatus) => {
+  let stopped = false
+  let source = null
+
+  const handle = (data) => {
+    onStatus(data)
+    if (until.includes(data.status)) stop()
+  }
+
+  const stop = () => {
+    stopped = true
+    if (source) source.close()
+  }
+
+  const longPoll = async () => {
+    let since = -1
+    while (!stopped) {
+      try {
+        const response = await axios.get(`${API_URL}/api/status/${videoId}/wait`, {
+          params: { since, timeout: 25 },
+          timeout: 35000
+        })
+        since = response.data.seq ?? since
+        handle(response.data)
+      } catch (error) {
+        console.error('Status wait error:', error)
+        await new Promise(resolve => setTimeout(resolve, 2000))
+      }
+    }
+  }
+
+  if (typeof window !== 'undefined' && window.EventSource) {
+    source = new EventSource(`${API_URL}/api/status/${videoId}/stream?until=${until.join(',')}`)
+    source.addEventListener('status', (event) => handle(JSON.parse(event.data)))
+    source.onerror = () => {
+      // Sunucu akışı kapattıysa EventSource kendisi yeniden bağlanır;
+      // bağlantı hiç kurulamıyorsa long-poll'a geç
+      if (source.readyState === EventSource.CLOSED && !stopped) {
+        source = null
+        longPoll()
+      }
+    }
+  } else {
+    longPoll()
+  }
+
+  return stop
+}
+
 export default function Home() {
   // State tanımlamaları
   const [videoFile, setVideoFile] = useState(null)
@@ -47,48 +98,88 @@ export default function Home() {
   // Snackbar state
   const [snackbar, setSnackbar] = useState({ open: false, message: '', severity: 'info' })
 
-  // Video durumunu kontrol et
+  // Video durumunu izle (SSE, desteklenmiyorsa long-poll)
   useEffect(() => {
     if (videoId && !uploadStatus?.includes('ready')) {
-      const interval = setInterval(async () => {
-        try {
-          const response = await axios.get(`${API_URL}/api/status/${videoId}`)
-          const { status, message } = response.data
-          
-          if (status === 'ready') {
-            setUploadStatus('Video hazır!')
-            clearInterval(interval)
-          } else if (status === 'error') {
-            setUploadStatus(`Hata: ${message}`)
-            clearInterval(interval)
-          }
-        } catch (error) {
-          console.error('Status check error:', error)
+      return watchStatus(videoId, ['ready', 'error'], ({ status, message }) => {
+        if (status === 'ready') {
+          setUploadStatus('Video hazır!')
+        } else if (status === 'error') {
+          setUploadStatus(`Hata: ${message}`)
         }
-      }, 2000)
-      
-      return () => clearInterval(interval)
+      })
     }
-  }, [videoId, uploadStatus])
+  }, [videoId])
+
+  // Tek bir parçayı yeniden deneyerek gönder
+  const uploadChunk = async (uploadId, file, start, end) => {
+    const maxAttempts = 5
 
-  // Video yükleme fonksiyonunu güncelle
+    for (let attempt = 1; attempt <= maxAttempts; attempt++) {
+      try {
+        return await axios.put(`${API_URL}/api/uploads/${uploadId}`, file.slice(start, end + 1), {
+          headers: {
+            'Content-Type': 'application/octet-stream',
+            'Content-Range': `bytes ${start}-${end}/${file.size}`
+          },
+          timeout: 120000
+        })
+      } catch (error) {
+        // İstemci hataları tekrar denenmez
+        const status = error.response?.status
+        if (attempt === maxAttempts || (status && status < 500 && status !== 408 && status !== 429)) {
+          throw error
+        }
+        await new Promise(resolve => setTimeout(resolve, 1000 * 2 ** (attempt - 1)))
+      }
+    }
+  }
+
+  // Video yükleme: oturum oluştur -> parçaları gönder -> tamamla
   const handleVideoUpload = async (file) => {
     setIsUploading(true)
     setUploadStatus('Video yükleniyor...')
     
-    const formData = new FormData()
-    formData.append('video', file)
-    
     // Debug için
     console.log('Uploading file:', file.name, file.size)
     
     try {
-      const response = await axios.post(`${API_URL}/api/upload`, formData, {
-        headers: {
-          'Content-Type': 'multipart/form-data'
-        },
-        timeout: 300000 // 5 dakika timeout
-      })
+      // Aynı dosya için yarım kalan oturum varsa devam et
+      const resumeKey = `upload:${file.name}:${file.size}:${file.lastModified}`
+      let uploadId = window.localStorage.getItem(resumeKey)
+      let session = null
+
+      if (uploadId) {
+        try {
+          session = (await axios.get(`${API_URL}/api/uploads/${uploadId}`)).data
+        } catch (error) {
+          uploadId = null
+        }
+      }
+
+      if (!uploadId) {
+        session = (await axios.post(`${API_URL}/api/uploads`, {
+          filename: file.name,
+          size: file.size
+        })).data
+        uploadId = session.upload_id
+        window.localStorage.setItem(resumeKey, uploadId)
+      }
+
+      const chunkSize = session.chunk_size
+      const received = session.received || []
+      const isReceived = (start, end) => received.some(([s, e]) => s <= start && end <= e)
+
+      for (let start = 0; start < file.size; start += chunkSize) {
+        const end = Math.min(start + chunkSize, file.size) - 1
+        if (isReceived(start, end)) continue
+
+        await uploadChunk(uploadId, file, start, end)
+        setUploadStatus(`Video yükleniyor... %${Math.round(((end + 1) / file.size) * 100)}`)
+      }
+
+      const response = await axios.post(`${API_URL}/api/uploads/${uploadId}/commit`)
+      window.localStorage.removeItem(resumeKey)
       
       const { video_id, message } = response.data
       console.log('Upload successful:', video_id)
@@ -170,38 +261,36 @@ export default function Home() {
       
       setSnackbar({
         open: true,
-        message: 'Video işleniyor, lütfen bekleyin...',}
+        message: 'Video işleniyor, lütfen bekleyin...',
         severity: 'info'
       })
       
-      // Durum kontrolü
-      const checkInterval = setInterval(async () => {
-        try {
-          const statusResponse = await axios.get(`${API_URL}/api/status/${videoId}`)
-          const { status } = statusResponse.data
-          
-          if (status === 'completed') {
-            clearInterval(checkInterval)
-            setDownloadUrl(`${API_URL}/api/download/${videoId}`)
-            setSnackbar({
-              open: true,
-              message: 'Video hazır!',
-              severity: 'success'
-            })
-            setIsFinalizing(false)
-          } else if (status === 'error') {
-            clearInterval(checkInterval)
-            setSnackbar({
-              open: true,
-              message: 'Video işlenirken hata oluştu!',
-              severity: 'error'
-            })
-            setIsFinalizing(false)
-          }
-        } catch (error) {
-          console.error('Status check error:', error)
+      // Durum değişikliklerini izle
+      watchStatus(videoId, ['completed', 'error', 'cancelled'], ({ status }) => {
+        if (status === 'completed') {
+          setDownloadUrl(`${API_URL}/api/download/${videoId}`)
+          setSnackbar({
+            open: true,
+            message: 'Video hazır!',
+            severity: 'success'
+          })
+          setIsFinalizing(false)
+        } else if (status === 'error') {
+          setSnackbar({
+            open: true,
+            message: 'Video işlenirken hata oluştu!',
+            severity: 'error'
+          })
+          setIsFinalizing(false)
+        } else if (status === 'cancelled') {
+          setSnackbar({
+            open: true,
+            message: 'Video işleme iptal edildi',
+            severity: 'warning'
+          })
+          setIsFinalizing(false)
         }
-      }, 2000)
+      })
       
     } catch (error) {
       console.error('Finalize error:', error)